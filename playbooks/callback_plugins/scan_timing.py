@@ -0,0 +1,269 @@
+"""
+Callback Plugin - Scan Phase Timing
+===================================
+Records how long each scan phase takes, per team and per host, and writes
+the timings as JSON. The report role shows them in a timing section of the
+HTML report.
+
+Phases:
+    connect, probe, deploy, path_stat, scan, transfer, parse, cleanup
+        Per host (tasks of the scan role, matched by task name)
+    history, report, email
+        Per team (tasks of the history, report and email roles)
+
+Teams:
+    The execution playbooks set the scan_timing_team fact when they start
+    working on a team; every following task is attributed to that team.
+
+Hosts:
+    Tasks delegated to a target host are attributed to that host. Scan role
+    tasks that run on the controller for a host (result transfer, parsing)
+    are attributed to the target of the preceding scan task.
+
+Output:
+    JSON written to output_path when a team's report role starts and at
+    the end of the playbook. With history_path set, one JSON line per run is
+    appended for tracking timings over time.
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: scan_timing
+    type: aggregate
+    short_description: Per-phase timing of credential scan runs
+    description:
+        - Records the time spent in each scan phase per team and host and writes it as JSON.
+    requirements:
+        - enable in ansible.cfg (callbacks_enabled = scan_timing)
+    options:
+      output_path:
+        description: File the timing JSON is written to.
+        default: /tmp/credscan_timing.json
+        env:
+          - name: SCAN_TIMING_OUTPUT
+        ini:
+          - section: callback_scan_timing
+            key: output_path
+      history_path:
+        description: JSON lines file each run's timings are appended to (empty to disable).
+        default: ''
+        env:
+          - name: SCAN_TIMING_HISTORY
+        ini:
+          - section: callback_scan_timing
+            key: history_path
+'''
+
+import json
+import os
+import time
+from datetime import datetime
+
+from ansible.plugins.callback import CallbackBase
+
+# Scan role tasks (by name) and the phase they belong to
+TASK_PHASES = {
+    'Gathering Facts': 'connect',
+    'Verify connection to target host': 'connect',
+    'Probe filesystem identity of scan paths': 'probe',
+    'Plan scan cost of scan paths': 'probe',
+    'Copy credential scan script to target host': 'deploy',
+    'Verify script is deployed': 'deploy',
+    'Create scan configuration JSON on target': 'deploy',
+    'Deploy baseline file to target': 'deploy',
+    'Check if scan paths exist': 'path_stat',
+    'Execute credential scan': 'scan',
+    'Start credential scan shards': 'scan',
+    'Check credential scan shard status': 'scan',
+    'Wait before polling scan shards': 'scan',
+    'Fetch scan results to spool directory': 'transfer',
+    'Fetch scan shard results to spool directory': 'transfer',
+    'Spool server scan result': 'parse',
+    'Remove scan script from target': 'cleanup',
+    'Remove results file from target': 'cleanup',
+    'Remove shard results files from target': 'cleanup',
+    'Clean up scan shard jobs': 'cleanup',
+    'Remove config file from target': 'cleanup',
+    'Remove baseline file from target': 'cleanup',
+}
+
+# Roles whose tasks all belong to one per-team phase
+ROLE_PHASES = {
+    'history': 'history',
+    'report': 'report',
+    'email': 'email',
+}
+
+# Tasks that run once for all teams
+RUN_TASK_PHASES = {
+    'Send all queued emails over pooled SMTP sessions': 'email',
+}
+
+HOST_PHASES = ['connect', 'probe', 'deploy', 'path_stat', 'scan', 'transfer', 'parse', 'cleanup']
+TEAM_PHASES = ['history', 'report', 'email']
+CONTROLLER_HOSTS = ('localhost', '127.0.0.1')
+UNASSIGNED_TEAM = '(no team)'
+
+
+class CallbackModule(CallbackBase):
+    """Aggregate callback recording scan phase durations."""
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'scan_timing'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.started = time.time()
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.playbook = ''
+        self.team = UNASSIGNED_TEAM
+        self.flushed_team = None
+        self.starts = {}
+        self.last_target = {}
+        self.run_phases = {}
+        self.teams = {}
+
+    # ------------------------------------------------------------------
+    # Attribution helpers
+    # ------------------------------------------------------------------
+    def _phase(self, task):
+        name = task.get_name().split(' : ')[-1].strip()
+        if name in RUN_TASK_PHASES:
+            return RUN_TASK_PHASES[name], True
+        if name in TASK_PHASES:
+            return TASK_PHASES[name], False
+        role = task._role.get_name() if task._role else None
+        return ROLE_PHASES.get(role), False
+
+    @staticmethod
+    def _delegated_host(result):
+        if result._task.delegate_to and '{{' not in result._task.delegate_to:
+            return result._task.delegate_to
+        delegated = result._result.get('_ansible_delegated_vars')
+        if not delegated:
+            for item in result._result.get('results') or []:
+                if isinstance(item, dict) and item.get('_ansible_delegated_vars'):
+                    delegated = item['_ansible_delegated_vars']
+                    break
+        return (delegated or {}).get('ansible_host')
+
+    def _target(self, result):
+        """Return the scan target a host-phase task worked on."""
+        host = result._host.get_name()
+        target = self._delegated_host(result) or host
+        if target in CONTROLLER_HOSTS:
+            # Controller-side task for a scan target (transfer, parse)
+            target = host if host not in CONTROLLER_HOSTS else self.last_target.get(host, target)
+        else:
+            self.last_target[host] = target
+        return target
+
+    def _team(self):
+        return self.teams.setdefault(self.team, {'phases': {}, 'hosts': {}})
+
+    def _record(self, result):
+        task = result._task
+        facts = result._result.get('ansible_facts') or {}
+        if 'scan_timing_team' in facts:
+            self.team = facts['scan_timing_team'] or UNASSIGNED_TEAM
+
+        started = self.starts.pop((result._host.get_name(), task._uuid), None)
+        phase, run_level = self._phase(task)
+        if started is None or phase is None:
+            return
+
+        target = self._target(result) if phase in HOST_PHASES else None
+        if target in CONTROLLER_HOSTS:
+            # e.g. fact gathering on the controller - not a scan target
+            return
+
+        duration = time.time() - started
+        self.run_phases[phase] = self.run_phases.get(phase, 0.0) + duration
+        if run_level:
+            return
+        team = self._team()
+        team['phases'][phase] = team['phases'].get(phase, 0.0) + duration
+        if target is not None:
+            host = team['hosts'].setdefault(target, {})
+            host[phase] = host.get(phase, 0.0) + duration
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def _summary(self):
+        teams = {}
+        for name, data in self.teams.items():
+            hosts = {}
+            for host, phases in data['hosts'].items():
+                hosts[host] = {phase: round(seconds, 3) for phase, seconds in phases.items()}
+                hosts[host]['total'] = round(sum(phases.values()), 3)
+            teams[name] = {
+                'phases': {phase: round(seconds, 3) for phase, seconds in data['phases'].items()},
+                'total': round(sum(data['phases'].values()), 3),
+                'hosts': hosts,
+                'slowest_hosts': sorted(hosts, key=lambda h: hosts[h]['total'], reverse=True)[:10]
+            }
+        return {
+            'playbook': self.playbook,
+            'started_at': self.started_at,
+            'duration_seconds': round(time.time() - self.started, 3),
+            'phase_order': HOST_PHASES + TEAM_PHASES,
+            'phases': {phase: round(seconds, 3) for phase, seconds in self.run_phases.items()},
+            'teams': teams
+        }
+
+    def _write(self):
+        path = self.get_option('output_path')
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._summary(), f, indent=2)
+            os.replace(tmp_path, path)
+        except (IOError, OSError) as e:
+            self._display.warning('scan_timing: could not write {}: {}'.format(path, e))
+
+    # ------------------------------------------------------------------
+    # Callback events
+    # ------------------------------------------------------------------
+    def v2_playbook_on_start(self, playbook):
+        self.playbook = os.path.basename(playbook._file_name)
+        self._write()
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        phase, run_level = self._phase(task)
+        # Make this team's scan timings available to the report being rendered
+        if phase == 'report' and not run_level and self.flushed_team != self.team:
+            self.flushed_team = self.team
+            self._write()
+
+    def v2_runner_on_start(self, host, task):
+        self.starts[(host.get_name(), task._uuid)] = time.time()
+
+    def v2_runner_on_ok(self, result):
+        self._record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result)
+
+    def v2_runner_on_unreachable(self, result):
+        self._record(result)
+
+    def v2_runner_on_skipped(self, result):
+        self.starts.pop((result._host.get_name(), result._task._uuid), None)
+
+    def v2_playbook_on_stats(self, stats):
+        self._write()
+        history_path = self.get_option('history_path')
+        if history_path:
+            try:
+                with open(history_path, 'a') as f:
+                    f.write(json.dumps(self._summary()) + '\n')
+            except (IOError, OSError) as e:
+                self._display.warning('scan_timing: could not append to {}: {}'.format(history_path, e))
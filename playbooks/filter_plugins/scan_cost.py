@@ -0,0 +1,103 @@
+"""
+Playbook Filters - Scan Cost Planning
+=====================================
+Filters used by the execution playbooks to order hosts by the scan cost
+estimated with `creds_scan.py --plan` (scan role, tasks_from: plan).
+
+Filters:
+    scan_cost_order:    Order hosts longest estimated scan first.
+    scan_cost_summary:  Per-host estimates, the estimated run time for a
+                        number of forks, and hosts worth sharding.
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+def _hostname(host: Any) -> str:
+    """Return the hostname of a host config dict or hostname string."""
+    return host.get('hostname', '') if isinstance(host, dict) else str(host)
+
+
+def _estimate(plans: Dict[str, Dict[str, Any]], host: Any) -> Optional[float]:
+    """Return the estimated scan seconds of a host, or None if it was not planned."""
+    plan = (plans or {}).get(_hostname(host)) or {}
+    if 'estimated_seconds' not in plan:
+        return None
+    return float(plan['estimated_seconds'])
+
+
+def scan_cost_order(hosts: List[Any], plans: Dict[str, Dict[str, Any]]) -> List[Any]:
+    """
+    Order hosts (hostnames or host config dicts) longest estimated scan first.
+
+    Starting the longest scans first keeps a parallel run from waiting on one
+    large host at the end. Hosts without a plan keep their order after the
+    planned ones.
+    """
+    planned = [h for h in hosts or [] if _estimate(plans, h) is not None]
+    unplanned = [h for h in hosts or [] if _estimate(plans, h) is None]
+    return sorted(planned, key=lambda h: _estimate(plans, h), reverse=True) + unplanned
+
+
+def _makespan(estimates: List[float], forks: int) -> float:
+    """Longest-first greedy schedule of estimates over forks workers."""
+    workers = [0.0] * max(1, forks)
+    for estimate in sorted(estimates, reverse=True):
+        workers[workers.index(min(workers))] += estimate
+    return max(workers) if workers else 0.0
+
+
+def scan_cost_summary(plans: Dict[str, Dict[str, Any]], forks: int = 5,
+                      shard_min_seconds: float = 300) -> Dict[str, Any]:
+    """
+    Summarize host scan plans.
+
+    estimated_run_seconds is the longest-first schedule over forks parallel
+    hosts. recommended_forks is the smallest fork count that reaches the
+    shortest possible run time (the longest single host). Hosts estimated
+    at more than shard_min_seconds and more than an even share of the total
+    across forks are listed as shard_candidates: they bound the run time
+    and only splitting their paths makes the run shorter.
+    """
+    hosts = sorted(
+        [
+            {
+                'host': host,
+                'estimated_seconds': float(plan.get('estimated_seconds', 0)),
+                'candidate_files': int(plan.get('candidate_files', 0)),
+                'candidate_bytes': int(plan.get('candidate_bytes', 0))
+            }
+            for host, plan in (plans or {}).items() if plan
+        ],
+        key=lambda h: h['estimated_seconds'], reverse=True
+    )
+    estimates = [h['estimated_seconds'] for h in hosts]
+    total = sum(estimates)
+    longest = estimates[0] if estimates else 0.0
+    forks = max(1, int(forks))
+
+    recommended = 1
+    while recommended < len(estimates) and _makespan(estimates, recommended) > longest * 1.05:
+        recommended += 1
+
+    fair_share = max(total / forks, float(shard_min_seconds))
+    return {
+        'hosts': hosts,
+        'total_estimated_seconds': round(total, 1),
+        'longest_host': hosts[0]['host'] if hosts else None,
+        'longest_seconds': round(longest, 1),
+        'forks': forks,
+        'estimated_run_seconds': round(_makespan(estimates, forks), 1),
+        'recommended_forks': recommended,
+        'shard_candidates': [h['host'] for h in hosts if h['estimated_seconds'] > fair_share]
+    }
+
+
+class FilterModule(object):
+    """Ansible filter plugin entry point."""
+
+    def filters(self):
+        return {
+            'scan_cost_order': scan_cost_order,
+            'scan_cost_summary': scan_cost_summary,
+        }
@@ -0,0 +1,212 @@
+"""
+Playbook Filters - Shared Filesystem Scanning
+=============================================
+Filters used by the execution playbooks to scan each shared network export
+(NFS, CIFS, ...) once per run and attribute its findings to every host that
+mounts it.
+
+Filters:
+    shared_scan_plan:          Choose one owner host per shared export and
+                               the paths every other host can skip.
+    shared_export_slices:      Extract the results of owned exports from the
+                               owners' scan results (reused by later teams).
+    attribute_shared_results:  Add the findings of skipped shared paths to
+                               every host that mounts them.
+
+Results may be spooled summaries (see the scan role): their findings are read
+from result_file, and attribution rewrites the spooled file of each host.
+"""
+
+import copy
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+SEVERITIES = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO']
+
+# Keys kept only in spooled result files, never in facts
+SPOOL_ONLY_KEYS = ('hardcoded_info', 'file_paths_scanned', 'patterns_checked')
+
+
+def _load(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the full result, reading the spooled result file if referenced."""
+    if 'hardcoded_info' not in result and result.get('result_file'):
+        with open(result['result_file'], 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return copy.deepcopy(result)
+
+
+def _save(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Rewrite a spooled result file and return its summary."""
+    tmp_path = result['result_file'] + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, separators=(',', ':'))
+    os.replace(tmp_path, result['result_file'])
+    summary = {key: value for key, value in result.items() if key not in SPOOL_ONLY_KEYS}
+    summary['files_with_findings'] = len(result.get('hardcoded_info') or [])
+    return summary
+
+
+def _under(file_path: str, root: str) -> bool:
+    """Return True if file_path is root or lies below it."""
+    root = root.rstrip('/') or '/'
+    return file_path == root or file_path.startswith(root if root == '/' else root + '/')
+
+
+def _translate(file_path: str, from_root: str, to_root: str) -> str:
+    """Move file_path from one mount location to another."""
+    from_root = from_root.rstrip('/')
+    to_root = to_root.rstrip('/')
+    return to_root + file_path[len(from_root):]
+
+
+def shared_scan_plan(probes: Dict[str, Dict[str, Any]],
+                     known_exports: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Any]:
+    """
+    Build the scan plan for a set of hosts.
+
+    probes maps each host to the path_filesystems output of
+    `creds_scan.py --probe`. The first host (in probe order) that mounts an
+    export owns it, unless an owner is already known from earlier in the run
+    (known_exports). Every other host skips the path and receives the owner's
+    results afterwards.
+    """
+    exports = dict(known_exports or {})
+    skip = {}
+    shared = {}
+
+    for host, paths in (probes or {}).items():
+        skip[host] = []
+        shared[host] = []
+        for path, info in (paths or {}).items():
+            export_id = (info or {}).get('export_id')
+            if not export_id:
+                continue
+            owner = exports.get(export_id)
+            if owner is None:
+                exports[export_id] = {'host': host, 'path': path}
+            elif owner['host'] != host or owner['path'] != path:
+                skip[host].append(path)
+                shared[host].append({
+                    'path': path,
+                    'export_id': export_id,
+                    'owner_host': owner['host'],
+                    'owner_path': owner['path']
+                })
+
+    return {'exports': exports, 'skip': skip, 'shared': shared}
+
+
+def shared_export_slices(scan_results: List[Dict[str, Any]], plan: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Extract per-export results from the owners' scan results.
+
+    Returns {export_id: {host, path, hardcoded_info, scanned_files}} for every
+    export whose owner is in scan_results and scanned it successfully. For
+    spooled owners the slice is {host, path, result_file} and is read when
+    attributed, so findings are not held in facts between teams.
+    """
+    by_host = {r.get('server_name'): r for r in scan_results or []}
+    slices = {}
+    for export_id, owner in (plan or {}).get('exports', {}).items():
+        result = by_host.get(owner['host'])
+        if result is None or result.get('scan_status') == 'failed':
+            continue
+        if owner['path'] not in (result.get('paths_scanned') or []):
+            continue
+        if 'hardcoded_info' not in result and result.get('result_file'):
+            slices[export_id] = {'host': owner['host'], 'path': owner['path'], 'result_file': result['result_file']}
+            continue
+        slices[export_id] = {
+            'host': owner['host'],
+            'path': owner['path'],
+            'hardcoded_info': [f for f in result.get('hardcoded_info') or [] if _under(f.get('file', ''), owner['path'])],
+            'scanned_files': [f for f in result.get('file_paths_scanned') or [] if _under(f, owner['path'])]
+        }
+    return slices
+
+
+def _resolve_slice(export: Dict[str, Any], loaded: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Return a slice with its findings, reading spooled owner results once."""
+    if 'result_file' not in export:
+        return export
+    path = export['result_file']
+    if path not in loaded:
+        with open(path, 'r', encoding='utf-8') as f:
+            loaded[path] = json.load(f)
+    result = loaded[path]
+    return {
+        'host': export['host'],
+        'path': export['path'],
+        'hardcoded_info': [f for f in result.get('hardcoded_info') or [] if _under(f.get('file', ''), export['path'])],
+        'scanned_files': [f for f in result.get('file_paths_scanned') or [] if _under(f, export['path'])]
+    }
+
+
+def attribute_shared_results(scan_results: List[Dict[str, Any]], plan: Dict[str, Any],
+                             slices: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Add the owner's findings for every skipped shared path to each host.
+
+    File paths are translated to the host's own mount location. Totals,
+    severity counts and patterns are recomputed. A shared path whose owner
+    has no results (e.g. the owner's scan failed) is reported as missing.
+    """
+    all_slices = dict(slices or {})
+    all_slices.update(shared_export_slices(scan_results, plan))
+    shared = (plan or {}).get('shared', {})
+    loaded = {}
+
+    attributed = []
+    for result in scan_results or []:
+        entries = shared.get(result.get('server_name')) or []
+        if not entries or result.get('scan_status') == 'failed':
+            attributed.append(result)
+            continue
+
+        result = _load(result)
+        result.setdefault('shared_paths', [])
+        for entry in entries:
+            export = all_slices.get(entry['export_id'])
+            if export is not None:
+                export = _resolve_slice(export, loaded)
+            if export is None:
+                result['paths_missing'] = list(result.get('paths_missing') or []) + [entry['path']]
+                result['shared_paths'].append(dict(entry, status='owner_unavailable'))
+                continue
+
+            for file_info in export['hardcoded_info']:
+                result['hardcoded_info'].append({
+                    'file': _translate(file_info['file'], export['path'], entry['path']),
+                    'findings': copy.deepcopy(file_info['findings'])
+                })
+            result['file_paths_scanned'] = list(result.get('file_paths_scanned') or []) + [
+                _translate(f, export['path'], entry['path']) for f in export['scanned_files']
+            ]
+            result['paths_scanned'] = list(result.get('paths_scanned') or []) + [entry['path']]
+            result['shared_paths'].append(dict(entry, owner_host=export['host'], status='attributed'))
+
+        findings = [f for file_info in result['hardcoded_info'] for f in file_info.get('findings') or []]
+        by_severity = {severity: 0 for severity in SEVERITIES}
+        for finding in findings:
+            severity = finding.get('severity', 'INFO')
+            by_severity[severity] = by_severity.get(severity, 0) + 1
+        result['total_findings'] = len(findings)
+        result['findings_by_severity'] = by_severity
+        result['patterns_found'] = sorted(set(f.get('pattern', '') for f in findings))
+        result['file_paths_scanned_count'] = len(result['file_paths_scanned'])
+        result['scan_status'] = 'findings_detected' if findings else 'clean'
+        attributed.append(_save(result) if result.get('result_file') else result)
+
+    return attributed
+
+
+class FilterModule(object):
+    """Ansible filter plugin entry point."""
+
+    def filters(self):
+        return {
+            'shared_scan_plan': shared_scan_plan,
+            'shared_export_slices': shared_export_slices,
+            'attribute_shared_results': attribute_shared_results,
+        }
@@ -0,0 +1,41 @@
+"""
+Playbook Filters - Scan Result Spool
+====================================
+The scan role writes every host's full result to a controller-side spool
+directory and keeps only a summary as a fact. These filters collect the
+summaries of a team in one pass instead of appending facts host by host.
+
+Filters:
+    spooled_scan_results:  Load the result summaries of the given hosts from
+                           a spool directory, in host order.
+"""
+
+import json
+import os
+from typing import Any, Dict, List
+
+
+def spooled_scan_results(hostnames: List[str], spool_dir: str) -> List[Dict[str, Any]]:
+    """
+    Return the spooled result summaries for hostnames.
+
+    Hosts without a summary file (not scanned, or unreachable in a parallel
+    play) are left out, as they were when results were collected from facts.
+    """
+    results = []
+    for hostname in hostnames or []:
+        path = os.path.join(spool_dir, '{}.summary.json'.format(hostname))
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            results.append(json.load(f))
+    return results
+
+
+class FilterModule(object):
+    """Ansible filter plugin entry point."""
+
+    def filters(self):
+        return {
+            'spooled_scan_results': spooled_scan_results,
+        }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Email Attachment Preparation Script
+===================================
+Prepares report attachments for email delivery, keeping them under the
+size limits of the mail relay.
+
+Usage:
+    python3 prepare_attachments.py --html report.html --csv report.csv \\
+        --output-dir /tmp/email_attachments --compress-threshold-kb 1024 \\
+        --max-total-kb 10240 --format zip --split-csv
+
+Behaviour:
+    - Attachments larger than the compress threshold are zipped or gzipped
+    - A CSV larger than the threshold can be split into one file per server
+      (the Hostname column); with zip format the per-server files are bundled
+      into a single archive
+    - If the prepared attachments still exceed the total limit, no files are
+      attached and the manifest requests a summary-only email
+
+Output:
+    JSON manifest printed to stdout for Ansible consumption.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import shutil
+import zipfile
+from typing import Any, Dict, List
+
+
+def file_kb(path: str) -> float:
+    """Return file size in KB."""
+    return os.path.getsize(path) / 1024.0
+
+
+def safe_name(value: str) -> str:
+    """Make a string safe for use in a filename."""
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', value).strip('_') or 'unknown'
+
+
+def gzip_file(path: str, output_dir: str) -> str:
+    """Gzip a file into output_dir and return the archive path."""
+    archive = os.path.join(output_dir, os.path.basename(path) + '.gz')
+    with open(path, 'rb') as src, gzip.open(archive, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    return archive
+
+
+def zip_files(paths: List[str], archive: str) -> str:
+    """Bundle files into a zip archive and return its path."""
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for path in paths:
+            zf.write(path, arcname=os.path.basename(path))
+    return archive
+
+
+def compress(paths: List[str], output_dir: str, fmt: str, zip_name: str) -> List[str]:
+    """Compress files using the requested format."""
+    if fmt == 'gzip':
+        return [gzip_file(path, output_dir) for path in paths]
+    return [zip_files(paths, os.path.join(output_dir, zip_name))]
+
+
+def split_csv_by_server(csv_path: str, output_dir: str) -> List[str]:
+    """Split a report CSV into one file per server (the Hostname column).
+
+    The column is looked up in the header, so the standard report and the
+    delta report (which starts with the Change column) are both split by host.
+    Without a Hostname column the first column is used.
+    """
+    base = os.path.splitext(os.path.basename(csv_path))[0]
+    writers = {}
+    handles = []
+    paths = []
+
+    try:
+        with open(csv_path, 'r', newline='', encoding='utf-8', errors='replace') as src:
+            reader = csv.reader(src)
+            header = next(reader, None)
+            if header is None:
+                return [csv_path]
+            column = header.index('Hostname') if 'Hostname' in header else 0
+            for row in reader:
+                if not row:
+                    continue
+                server = row[column] if column < len(row) else ''
+                if server not in writers:
+                    path = os.path.join(output_dir, '{}_{}.csv'.format(base, safe_name(server)))
+                    handle = open(path, 'w', newline='', encoding='utf-8')
+                    handles.append(handle)
+                    paths.append(path)
+                    writers[server] = csv.writer(handle, quoting=csv.QUOTE_ALL)
+                    writers[server].writerow(header)
+                writers[server].writerow(row)
+    finally:
+        for handle in handles:
+            handle.close()
+
+    return paths or [csv_path]
+
+
+def prepare_attachments(
+    html_path: str,
+    csv_path: str,
+    output_dir: str,
+    compress_threshold_kb: float,
+    max_total_kb: float,
+    fmt: str,
+    split_csv: bool
+) -> Dict[str, Any]:
+    """Build the list of attachments to send and return a manifest."""
+    os.makedirs(output_dir, exist_ok=True)
+    actions = []
+    attachments = []
+    original_kb = file_kb(html_path) + file_kb(csv_path)
+
+    # HTML report
+    if file_kb(html_path) > compress_threshold_kb:
+        base = os.path.basename(html_path)
+        attachments.extend(compress([html_path], output_dir, fmt, base + '.zip'))
+        actions.append('Compressed {} ({})'.format(base, fmt))
+    else:
+        attachments.append(html_path)
+
+    # CSV report
+    csv_base = os.path.splitext(os.path.basename(csv_path))[0]
+    if file_kb(csv_path) > compress_threshold_kb:
+        csv_parts = [csv_path]
+        if split_csv:
+            csv_parts = split_csv_by_server(csv_path, output_dir)
+            actions.append('Split {} into {} per-server files'.format(os.path.basename(csv_path), len(csv_parts)))
+        attachments.extend(compress(csv_parts, output_dir, fmt, csv_base + '_by_server.zip'))
+        actions.append('Compressed CSV report ({})'.format(fmt))
+    else:
+        attachments.append(csv_path)
+
+    total_kb = sum(file_kb(path) for path in attachments)
+    summary_only = total_kb > max_total_kb
+    if summary_only:
+        actions.append('Attachments total {:.0f} KB exceeds limit of {:.0f} KB - sending summary only'.format(
+            total_kb, max_total_kb))
+
+    return {
+        'attachments': [] if summary_only else attachments,
+        'prepared_files': [path for path in attachments if path not in (html_path, csv_path)],
+        'original_kb': round(original_kb, 1),
+        'total_kb': round(total_kb, 1),
+        'summary_only': summary_only,
+        'actions': actions
+    }
+
+
+def main():
+    """Main entry point for attachment preparation."""
+    parser = argparse.ArgumentParser(description='Prepare report attachments for email delivery')
+    parser.add_argument('--html', required=True, help='Path to HTML report')
+    parser.add_argument('--csv', required=True, help='Path to CSV report')
+    parser.add_argument('--output-dir', required=True, help='Directory for prepared attachments')
+    parser.add_argument('--compress-threshold-kb', type=float, default=1024,
+                        help='Compress attachments larger than this size in KB')
+    parser.add_argument('--max-total-kb', type=float, default=10240,
+                        help='Send summary only when attachments exceed this total size in KB')
+    parser.add_argument('--format', choices=['zip', 'gzip'], default='zip', help='Compression format')
+    parser.add_argument('--split-csv', action='store_true', help='Split large CSV reports per server')
+
+    args = parser.parse_args()
+
+    manifest = prepare_attachments(
+        html_path=args.html,
+        csv_path=args.csv,
+        output_dir=args.output_dir,
+        compress_threshold_kb=args.compress_threshold_kb,
+        max_total_kb=args.max_total_kb,
+        fmt=args.format,
+        split_csv=args.split_csv
+    )
+    print(json.dumps(manifest))
+
+
+if __name__ == '__main__':
+    main()
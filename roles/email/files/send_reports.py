@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Pooled Report Sender Script
+===========================
+Sends queued team report emails over a small pool of reused, authenticated
+SMTP sessions instead of one connection per team.
+
+Usage:
+    SMTP_PASSWORD=secret python3 send_reports.py --queue-dir /tmp/email_queue \\
+        --host smtp.example.com --port 587 --username user --security starttls \\
+        --workers 2 --retries 3
+
+Behaviour:
+    - Every *.json file in the queue directory is one message (written by the
+      email role when email_delivery_mode is "pooled")
+    - Up to --workers sessions are opened; each one connects, negotiates
+      STARTTLS and authenticates once, then sends many messages (RSET between
+      messages)
+    - Sessions are recycled after --max-per-connection messages
+    - A failed send is retried with back-off on a fresh session if the error is
+      temporary (4xx reply or connection error); permanent 5xx errors are not
+      retried
+    - With --cleanup, queued files and attachment work directories are removed
+      after a message is delivered
+
+Testing:
+    python3 -m aiosmtpd -n -l 127.0.0.1:8025
+    python3 send_reports.py --queue-dir /tmp/email_queue --host 127.0.0.1 \\
+        --port 8025 --security none
+
+Output:
+    JSON delivery report printed to stdout for Ansible consumption.
+"""
+
+import argparse
+import glob
+import json
+import mimetypes
+import os
+import queue
+import shutil
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid, parseaddr
+from typing import Any, Dict, List, Optional
+
+
+def load_queue(queue_dir: str) -> List[Dict[str, Any]]:
+    """Load queued messages, ordered by file name."""
+    messages = []
+    for path in sorted(glob.glob(os.path.join(queue_dir, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            message = json.load(f)
+        message['queue_file'] = path
+        messages.append(message)
+    return messages
+
+
+def build_message(spec: Dict[str, Any]) -> EmailMessage:
+    """Build a MIME message from a queued message spec."""
+    msg = EmailMessage()
+    msg['From'] = spec['from']
+    msg['To'] = ', '.join(spec['to']) if isinstance(spec['to'], list) else spec['to']
+    if spec.get('cc'):
+        msg['Cc'] = ', '.join(spec['cc']) if isinstance(spec['cc'], list) else spec['cc']
+    msg['Subject'] = spec['subject']
+    msg['Date'] = formatdate(localtime=True)
+    sender_domain = parseaddr(spec['from'])[1].rpartition('@')[2]
+    msg['Message-ID'] = make_msgid(domain=sender_domain or None)
+
+    msg.set_content(spec.get('text_body') or 'This report is best viewed as HTML.')
+    if spec.get('html_body'):
+        msg.add_alternative(spec['html_body'], subtype='html')
+
+    for path in spec.get('attachments') or []:
+        ctype, encoding = mimetypes.guess_type(path)
+        if ctype is None or encoding is not None:
+            ctype = 'application/octet-stream'
+        maintype, subtype = ctype.split('/', 1)
+        with open(path, 'rb') as f:
+            msg.add_attachment(f.read(), maintype=maintype, subtype=subtype, filename=os.path.basename(path))
+
+    return msg
+
+
+def is_transient(error: Exception) -> bool:
+    """Return True for errors worth retrying: 4xx replies and connection errors."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # SMTPException subclasses OSError; other SMTP errors are permanent
+    return not isinstance(error, smtplib.SMTPException)
+
+
+class SmtpSession(object):
+    """One reusable SMTP connection owned by a single worker thread."""
+
+    def __init__(self, args: argparse.Namespace, password: Optional[str]):
+        self.args = args
+        self.password = password
+        self.conn = None
+        self.sent = 0
+        self.opened = 0
+
+    def _connect(self):
+        args = self.args
+        if args.security == 'ssl':
+            conn = smtplib.SMTP_SSL(args.host, args.port, timeout=args.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            conn = smtplib.SMTP(args.host, args.port, timeout=args.timeout)
+            conn.ehlo()
+            if args.security == 'starttls' or (args.security == 'try' and conn.has_extn('starttls')):
+                conn.starttls(context=ssl.create_default_context())
+                conn.ehlo()
+        if args.username:
+            conn.login(args.username, self.password or '')
+        self.conn = conn
+        self.sent = 0
+        self.opened += 1
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.quit()
+            except (smtplib.SMTPException, OSError):
+                self.conn.close()
+            self.conn = None
+
+    def send(self, msg: EmailMessage):
+        if self.conn is not None and self.sent >= self.args.max_per_connection:
+            self.close()
+        if self.conn is None:
+            self._connect()
+        elif self.sent > 0:
+            self.conn.rset()
+        self.conn.send_message(msg)
+        self.sent += 1
+
+
+def cleanup_message(spec: Dict[str, Any]):
+    """Remove the queue file and any attachment work directory for a sent message."""
+    for path in [spec.get('queue_file')] + list(spec.get('cleanup') or []):
+        if not path:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def worker(work: 'queue.Queue', results: List[Dict[str, Any]], lock: threading.Lock,
+           args: argparse.Namespace, password: Optional[str], stats: Dict[str, int]):
+    """Send messages from the work queue over a single pooled session."""
+    session = SmtpSession(args, password)
+    try:
+        while True:
+            try:
+                spec = work.get_nowait()
+            except queue.Empty:
+                break
+
+            result = {'team_name': spec.get('team_name', ''), 'to': spec.get('to'), 'sent': False,
+                      'attempts': 0, 'error': None}
+            try:
+                msg = build_message(spec)
+            except (OSError, KeyError, ValueError) as e:
+                result['error'] = 'Could not build message: {}'.format(e)
+                msg = None
+
+            while msg is not None and result['attempts'] <= args.retries:
+                result['attempts'] += 1
+                try:
+                    session.send(msg)
+                    result['sent'] = True
+                    result['error'] = None
+                    break
+                except smtplib.SMTPRecipientsRefused as e:
+                    # Permanent for this message - retrying will not help
+                    result['error'] = 'Recipients refused: {}'.format(', '.join(e.recipients))
+                    break
+                except (smtplib.SMTPException, OSError) as e:
+                    result['error'] = '{}: {}'.format(type(e).__name__, e)
+                    session.close()
+                    if not is_transient(e):
+                        # Permanent (5xx) - retrying will not help
+                        break
+                    if result['attempts'] <= args.retries:
+                        time.sleep(args.retry_delay * (2 ** (result['attempts'] - 1)))
+
+            if result['sent'] and args.cleanup:
+                cleanup_message(spec)
+
+            with lock:
+                results.append(result)
+    finally:
+        session.close()
+        with lock:
+            stats['connections'] += session.opened
+
+
+def send_all(messages: List[Dict[str, Any]], args: argparse.Namespace, password: Optional[str]) -> Dict[str, Any]:
+    """Deliver all queued messages using a bounded pool of SMTP sessions."""
+    work = queue.Queue()
+    for message in messages:
+        work.put(message)
+
+    results = []
+    lock = threading.Lock()
+    stats = {'connections': 0}
+    started = time.time()
+
+    threads = [
+        threading.Thread(target=worker, args=(work, results, lock, args, password, stats))
+        for _ in range(max(1, min(args.workers, len(messages))))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results.sort(key=lambda r: r['team_name'])
+    return {
+        'total': len(messages),
+        'sent': sum(1 for r in results if r['sent']),
+        'failed': sum(1 for r in results if not r['sent']),
+        'workers': len(threads),
+        'connections': stats['connections'],
+        'duration_seconds': round(time.time() - started, 2),
+        'results': results
+    }
+
+
+def main():
+    """Main entry point for pooled report delivery."""
+    parser = argparse.ArgumentParser(description='Send queued report emails over pooled SMTP sessions')
+    parser.add_argument('--queue-dir', required=True, help='Directory containing queued message files')
+    parser.add_argument('--host', required=True, help='SMTP server')
+    parser.add_argument('--port', type=int, default=25, help='SMTP port')
+    parser.add_argument('--username', default='', help='SMTP username (password from SMTP_PASSWORD)')
+    parser.add_argument('--security', choices=['none', 'try', 'starttls', 'ssl'], default='try',
+                        help='Connection security')
+    parser.add_argument('--workers', type=int, default=2, help='Maximum concurrent SMTP sessions')
+    parser.add_argument('--max-per-connection', type=int, default=50,
+                        help='Messages to send before recycling a session')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per message')
+    parser.add_argument('--retry-delay', type=float, default=2.0, help='Initial retry delay in seconds')
+    parser.add_argument('--timeout', type=float, default=30.0, help='SMTP socket timeout in seconds')
+    parser.add_argument('--cleanup', action='store_true', help='Remove queued files after successful delivery')
+
+    args = parser.parse_args()
+
+    messages = load_queue(args.queue_dir)
+    report = send_all(messages, args, os.environ.get('SMTP_PASSWORD'))
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Historical Findings Store
+=========================
+Keeps the results of every scan run in a local SQLite database so that
+questions like "when did this secret first appear" or "which hosts still
+have CRITICAL findings" can be answered without re-scanning.
+
+Usage:
+    python3 findings_store.py --db findings.db ingest --team "App Team" --input results.json \\
+        --delta-output delta.json
+    python3 findings_store.py --db findings.db query --severity CRITICAL --status open --group-by host
+    python3 findings_store.py --db findings.db query --fingerprint 3f2a9c...
+    python3 findings_store.py --db findings.db runs --team "App Team"
+    python3 findings_store.py --db findings.db compact --detail-days 90 --run-days 730 --min-interval-hours 24
+
+Data model:
+    runs         One row per team scan run
+    findings     One row per distinct finding of a team (team, fingerprint),
+                 with first/last seen and resolution time; a host or shared
+                 export scanned by two teams has its own rows in each
+    occurrences  Per-run detail (line number) for each finding; this is the
+                 only table that grows with every run and is what compaction
+                 prunes
+    meta         Time of the last compaction
+
+Fingerprints:
+    sha1 of host, file, pattern and the whitespace-normalized line content.
+    Line numbers are excluded so that a finding keeps its identity when
+    unrelated lines are added above it.
+
+Delta:
+    ingest --delta-output writes the changes since the team's previous run:
+    new findings (first seen or reopened), resolved findings, and the count
+    of still-open findings per host.
+
+Output:
+    JSON printed to stdout (ingest/compact), or a text table / JSON (query, runs).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+
+# Version of the schema below, stored in PRAGMA user_version
+SCHEMA_VERSION = 2
+
+FINDINGS_TABLE = '''
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    team TEXT NOT NULL,
+    host TEXT NOT NULL,
+    file TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    value TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    first_run_id INTEGER NOT NULL,
+    last_run_id INTEGER NOT NULL,
+    resolved_at TEXT,
+    UNIQUE (team, fingerprint)
+);
+'''
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    team TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    hosts_scanned INTEGER NOT NULL,
+    total_findings INTEGER NOT NULL,
+    new_findings INTEGER NOT NULL,
+    resolved_findings INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_team ON runs (team, started_at);
+''' + FINDINGS_TABLE.format(name='findings') + '''
+CREATE INDEX IF NOT EXISTS idx_findings_fingerprint ON findings (fingerprint);
+CREATE INDEX IF NOT EXISTS idx_findings_team ON findings (team, resolved_at);
+CREATE INDEX IF NOT EXISTS idx_findings_host ON findings (host, resolved_at);
+CREATE INDEX IF NOT EXISTS idx_findings_file ON findings (file);
+CREATE INDEX IF NOT EXISTS idx_findings_pattern ON findings (pattern);
+CREATE INDEX IF NOT EXISTS idx_findings_severity ON findings (severity, resolved_at);
+
+CREATE TABLE IF NOT EXISTS occurrences (
+    run_id INTEGER NOT NULL,
+    finding_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    PRIMARY KEY (run_id, finding_id, line)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_occurrences_finding ON occurrences (finding_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+# Version 1 keyed findings by fingerprint alone, so a finding moved between
+# teams whenever two teams scanned the same host or shared export
+MIGRATE_TEAM_KEY = '''
+BEGIN;
+''' + FINDINGS_TABLE.format(name='findings_v2') + '''
+INSERT INTO findings_v2 SELECT * FROM findings;
+DROP TABLE findings;
+ALTER TABLE findings_v2 RENAME TO findings;
+COMMIT;
+'''
+
+QUERY_COLUMNS = ['team', 'host', 'file', 'pattern', 'severity', 'first_seen', 'last_seen', 'resolved_at',
+                 'fingerprint']
+
+
+def normalize_line(value: str) -> str:
+    """Collapse whitespace so indentation changes do not alter a fingerprint."""
+    return re.sub(r'\s+', ' ', value or '').strip()
+
+
+def finding_fingerprint(host: str, file_path: str, pattern: str, value: str) -> str:
+    """Return the stable fingerprint for a finding."""
+    key = '\x1f'.join([host, file_path, pattern, normalize_line(value)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open (and create if needed) the findings database."""
+    directory = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    # Only takes effect on a new database; migrate() converts existing ones
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    migrate(conn)
+    conn.executescript(SCHEMA)
+    conn.execute('PRAGMA user_version = {}'.format(SCHEMA_VERSION))
+    return conn
+
+
+def migrate(conn: sqlite3.Connection):
+    """Bring a database created by an older version up to SCHEMA_VERSION."""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if version >= SCHEMA_VERSION or 'findings' not in tables:
+        return
+    if version < 2:
+        conn.executescript(MIGRATE_TEAM_KEY)
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        # One full VACUUM to switch to incremental vacuum; compact() never runs one
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('VACUUM')
+
+
+def load_server_result(server: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the full server result, reading the spooled result file if referenced."""
+    if 'hardcoded_info' not in server and server.get('result_file'):
+        with open(server['result_file'], 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return server
+
+
+def iter_findings(server: Dict[str, Any]):
+    """Yield normalized findings for one server scan result (or spooled summary)."""
+    host = server.get('server_name', '')
+    server = load_server_result(server)
+    for file_info in server.get('hardcoded_info') or []:
+        for finding in file_info.get('findings') or []:
+            yield {
+                'host': host,
+                'file': file_info.get('file', ''),
+                'line': int(finding.get('line', 0) or 0),
+                'pattern': finding.get('pattern', ''),
+                'type': finding.get('type', ''),
+                'severity': finding.get('severity', 'INFO'),
+                'value': finding.get('value', '')
+            }
+
+
+def delta_entry(finding: Dict[str, Any], fingerprint: str, first_seen: str) -> Dict[str, Any]:
+    """Build a delta list entry for a finding."""
+    return {
+        'host': finding['host'],
+        'file': finding['file'],
+        'line': finding['line'],
+        'pattern': finding['pattern'],
+        'type': finding['type'],
+        'severity': finding['severity'],
+        'value': finding['value'],
+        'fingerprint': fingerprint,
+        'first_seen': first_seen
+    }
+
+
+def ingest(conn: sqlite3.Connection, team: str, scan_results: List[Dict[str, Any]],
+           run_time: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Record one team run and return the summary and delta.
+
+    Findings seen in this run are inserted or refreshed (a resolved finding
+    that reappears is reopened). Open findings on successfully scanned hosts
+    that were not seen are marked resolved. Hosts whose scan failed are left
+    untouched so an unreachable host does not look clean, and on hosts whose
+    scan stopped at its deadline only findings in files that were scanned
+    can be resolved.
+    """
+    run_time = run_time or datetime.now().isoformat(timespec='seconds')
+    scanned_hosts = [s.get('server_name', '') for s in scan_results if s.get('scan_status') != 'failed']
+
+    with conn:
+        previous = conn.execute('SELECT MAX(id) FROM runs WHERE team = ?', (team,)).fetchone()[0]
+        cur = conn.execute(
+            'INSERT INTO runs (team, started_at, hosts_scanned, total_findings, new_findings, resolved_findings) '
+            'VALUES (?, ?, ?, 0, 0, 0)', (team, run_time, len(scanned_hosts)))
+        run_id = cur.lastrowid
+
+        total = 0
+        new_findings = []
+        open_by_host = {}
+        seen_ids = set()
+        covered_files = {}
+        for server in scan_results:
+            full = load_server_result(server)
+            if server.get('scan_status') != 'failed' and (server.get('coverage') or {}).get('deadline_reached'):
+                covered_files[server.get('server_name', '')] = set(full.get('file_paths_scanned') or [])
+            for finding in iter_findings(full):
+                total += 1
+                fingerprint = finding_fingerprint(finding['host'], finding['file'], finding['pattern'],
+                                                  finding['value'])
+                row = conn.execute(
+                    'SELECT id, first_seen, resolved_at, last_run_id FROM findings '
+                    'WHERE team = ? AND fingerprint = ?', (team, fingerprint)).fetchone()
+                if row is None:
+                    cur = conn.execute(
+                        'INSERT INTO findings (fingerprint, team, host, file, pattern, type, severity, value, '
+                        'first_seen, last_seen, first_run_id, last_run_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (fingerprint, team, finding['host'], finding['file'], finding['pattern'], finding['type'],
+                         finding['severity'], normalize_line(finding['value']), run_time, run_time, run_id, run_id))
+                    finding_id = cur.lastrowid
+                    new_findings.append(delta_entry(finding, fingerprint, run_time))
+                else:
+                    finding_id = row['id']
+                    if row['resolved_at'] is not None:
+                        new_findings.append(delta_entry(finding, fingerprint, row['first_seen']))
+                    elif row['last_run_id'] != run_id:
+                        open_by_host[finding['host']] = open_by_host.get(finding['host'], 0) + 1
+                    conn.execute(
+                        'UPDATE findings SET severity = ?, last_seen = ?, last_run_id = ?, resolved_at = NULL '
+                        'WHERE id = ?', (finding['severity'], run_time, run_id, finding_id))
+                seen_ids.add(finding_id)
+                conn.execute('INSERT OR IGNORE INTO occurrences (run_id, finding_id, line) VALUES (?, ?, ?)',
+                             (run_id, finding_id, finding['line']))
+
+        resolved_findings = []
+        for host in scanned_hosts:
+            rows = conn.execute(
+                'SELECT id, fingerprint, host, file, pattern, type, severity, value, first_seen, '
+                '(SELECT MIN(line) FROM occurrences WHERE finding_id = findings.id AND run_id = findings.last_run_id) '
+                'AS line FROM findings WHERE host = ? AND team = ? AND resolved_at IS NULL AND last_run_id != ?',
+                (host, team, run_id)).fetchall()
+            if host in covered_files:
+                rows = [row for row in rows if row['file'] in covered_files[host]]
+            for row in rows:
+                entry = dict(row)
+                entry['line'] = entry['line'] or 0
+                resolved_findings.append(delta_entry(entry, entry['fingerprint'], entry['first_seen']))
+            conn.executemany('UPDATE findings SET resolved_at = ? WHERE id = ?', [(run_time, row['id']) for row in rows])
+
+        conn.execute('UPDATE runs SET total_findings = ?, new_findings = ?, resolved_findings = ? WHERE id = ?',
+                     (total, len(new_findings), len(resolved_findings), run_id))
+
+    summary = {
+        'run_id': run_id,
+        'team': team,
+        'started_at': run_time,
+        'hosts_scanned': len(scanned_hosts),
+        'total_findings': total,
+        'distinct_findings': len(seen_ids),
+        'new_findings': len(new_findings),
+        'still_open_findings': sum(open_by_host.values()),
+        'resolved_findings': len(resolved_findings)
+    }
+    delta = {
+        'run_id': run_id,
+        'previous_run_id': previous,
+        'baseline': previous is None,
+        'new': new_findings,
+        'resolved': resolved_findings,
+        'still_open_by_host': open_by_host
+    }
+    return {'summary': summary, 'delta': delta}
+
+
+def query(conn: sqlite3.Connection, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Query findings using the indexed columns."""
+    clauses = []
+    params = []
+    for column in ('team', 'host', 'pattern', 'severity', 'fingerprint'):
+        value = getattr(args, column)
+        if value:
+            clauses.append('{} = ?'.format(column))
+            params.append(value)
+    if args.file:
+        clauses.append('file LIKE ?')
+        params.append(args.file)
+    if args.status == 'open':
+        clauses.append('resolved_at IS NULL')
+    elif args.status == 'resolved':
+        clauses.append('resolved_at IS NOT NULL')
+    if args.since:
+        clauses.append('first_seen >= ?')
+        params.append(args.since)
+    where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+
+    if args.group_by:
+        sql = ('SELECT {0}, COUNT(*) AS findings, MIN(first_seen) AS first_seen, MAX(last_seen) AS last_seen '
+               'FROM findings{1} GROUP BY {0} ORDER BY findings DESC').format(args.group_by, where)
+    else:
+        sql = 'SELECT {} FROM findings{} ORDER BY first_seen DESC LIMIT ?'.format(', '.join(QUERY_COLUMNS), where)
+        params.append(args.limit)
+
+    rows = [dict(row) for row in conn.execute(sql, params)]
+
+    if args.fingerprint and not args.group_by:
+        for row in rows:
+            row['occurrences'] = [
+                dict(r) for r in conn.execute(
+                    'SELECT runs.started_at, occurrences.line FROM occurrences '
+                    'JOIN runs ON runs.id = occurrences.run_id '
+                    'JOIN findings ON findings.id = occurrences.finding_id '
+                    'WHERE findings.team = ? AND findings.fingerprint = ? ORDER BY runs.started_at',
+                    (row['team'], row['fingerprint']))
+            ]
+    return rows
+
+
+def list_runs(conn: sqlite3.Connection, team: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """List recorded runs, newest first."""
+    sql = 'SELECT id, team, started_at, hosts_scanned, total_findings, new_findings, resolved_findings FROM runs'
+    params = []
+    if team:
+        sql += ' WHERE team = ?'
+        params.append(team)
+    sql += ' ORDER BY started_at DESC LIMIT ?'
+    params.append(limit)
+    return [dict(row) for row in conn.execute(sql, params)]
+
+
+def compact(conn: sqlite3.Connection, detail_days: int, run_days: int, resolved_days: int,
+            min_interval_hours: int = 0) -> Dict[str, Any]:
+    """
+    Apply the retention policy.
+
+    - Per-run occurrence detail older than detail_days is dropped (the
+      findings table still records first/last seen for every finding)
+    - Run records older than run_days are dropped
+    - Findings resolved more than resolved_days ago are dropped, with their
+      occurrences
+    Then the query planner statistics are refreshed and free pages returned
+    to the file system (incremental vacuum, no full rewrite of the file).
+    Nothing is done if the previous compaction finished less than
+    min_interval_hours ago.
+    """
+    now = datetime.now()
+    last = conn.execute("SELECT value FROM meta WHERE key = 'last_compacted_at'").fetchone()
+    result = {
+        'skipped': False,
+        'last_compacted_at': last['value'] if last else None,
+        'occurrences_removed': 0,
+        'findings_removed': 0,
+        'runs_removed': 0,
+        'pages_freed': 0
+    }
+    if last and min_interval_hours > 0 and \
+            datetime.fromisoformat(last['value']) > now - timedelta(hours=min_interval_hours):
+        result['skipped'] = True
+        return result
+
+    detail_cutoff = (now - timedelta(days=detail_days)).isoformat(timespec='seconds')
+    run_cutoff = (now - timedelta(days=run_days)).isoformat(timespec='seconds')
+    resolved_cutoff = (now - timedelta(days=resolved_days)).isoformat(timespec='seconds')
+
+    with conn:
+        result['occurrences_removed'] = conn.execute(
+            'DELETE FROM occurrences WHERE run_id IN (SELECT id FROM runs WHERE started_at < ?)',
+            (detail_cutoff,)).rowcount
+        conn.execute(
+            'DELETE FROM occurrences WHERE finding_id IN '
+            '(SELECT id FROM findings WHERE resolved_at IS NOT NULL AND resolved_at < ?)', (resolved_cutoff,))
+        result['findings_removed'] = conn.execute(
+            'DELETE FROM findings WHERE resolved_at IS NOT NULL AND resolved_at < ?', (resolved_cutoff,)).rowcount
+        result['runs_removed'] = conn.execute('DELETE FROM runs WHERE started_at < ?', (run_cutoff,)).rowcount
+        result['last_compacted_at'] = now.isoformat(timespec='seconds')
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_compacted_at', ?)",
+                     (result['last_compacted_at'],))
+
+    conn.execute('PRAGMA optimize')
+    result['pages_freed'] = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    conn.execute('PRAGMA incremental_vacuum').fetchall()
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return result
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    """Print rows as an aligned text table."""
+    if not rows:
+        print('No matching records')
+        return
+    columns = [c for c in rows[0].keys() if c != 'occurrences']
+    widths = {c: min(60, max(len(c), max(len(str(r[c] or '')) for r in rows))) for c in columns}
+    print('  '.join(c.upper().ljust(widths[c]) for c in columns))
+    for row in rows:
+        print('  '.join(str(row[c] if row[c] is not None else '-')[:60].ljust(widths[c]) for c in columns))
+        for occurrence in row.get('occurrences') or []:
+            print('    seen {} at line {}'.format(occurrence['started_at'], occurrence['line']))
+
+
+def main():
+    """Main entry point for the findings store."""
+    parser = argparse.ArgumentParser(description='Historical credential scan findings store')
+    parser.add_argument('--db', required=True, help='Path to SQLite database')
+    sub = parser.add_subparsers(dest='command')
+    sub.required = True
+
+    p_ingest = sub.add_parser('ingest', help='Record a team scan run')
+    p_ingest.add_argument('--team', required=True, help='Team name')
+    p_ingest.add_argument('--input', required=True, help='JSON file with the list of server scan results')
+    p_ingest.add_argument('--run-time', help='Run timestamp (ISO 8601, default: now)')
+    p_ingest.add_argument('--delta-output', help='Write new/resolved findings since the previous run to this file')
+
+    p_query = sub.add_parser('query', help='Query findings')
+    p_query.add_argument('--team', help='Team name')
+    p_query.add_argument('--host', help='Hostname')
+    p_query.add_argument('--file', help='File path (SQL LIKE pattern, e.g. %%/config/%%)')
+    p_query.add_argument('--pattern', help='Pattern name (e.g. aws_secret_key)')
+    p_query.add_argument('--severity', help='Severity (e.g. CRITICAL)')
+    p_query.add_argument('--fingerprint', help='Finding fingerprint (shows per-run history)')
+    p_query.add_argument('--status', choices=['open', 'resolved', 'all'], default='all', help='Finding status')
+    p_query.add_argument('--since', help='Only findings first seen on or after this date')
+    p_query.add_argument('--group-by', choices=['team', 'host', 'file', 'pattern', 'severity'],
+                         help='Return counts grouped by this column')
+    p_query.add_argument('--limit', type=int, default=200, help='Maximum rows (ungrouped queries)')
+    p_query.add_argument('--json', action='store_true', help='Output JSON')
+
+    p_runs = sub.add_parser('runs', help='List recorded runs')
+    p_runs.add_argument('--team', help='Team name')
+    p_runs.add_argument('--limit', type=int, default=20, help='Maximum rows')
+    p_runs.add_argument('--json', action='store_true', help='Output JSON')
+
+    p_compact = sub.add_parser('compact', help='Apply retention policy and compact the database')
+    p_compact.add_argument('--detail-days', type=int, default=90, help='Keep per-run detail for this many days')
+    p_compact.add_argument('--run-days', type=int, default=730, help='Keep run records for this many days')
+    p_compact.add_argument('--resolved-days', type=int, default=365,
+                           help='Keep resolved findings for this many days')
+    p_compact.add_argument('--min-interval-hours', type=int, default=0,
+                           help='Skip if the previous compaction is more recent than this (default: always run)')
+
+    args = parser.parse_args()
+    conn = connect(args.db)
+
+    try:
+        if args.command == 'ingest':
+            with open(args.input, 'r', encoding='utf-8') as f:
+                scan_results = json.load(f)
+            result = ingest(conn, args.team, scan_results, args.run_time)
+            if args.delta_output:
+                with open(args.delta_output, 'w', encoding='utf-8') as f:
+                    json.dump(result['delta'], f)
+            print(json.dumps(result['summary']))
+        elif args.command == 'compact':
+            print(json.dumps(compact(conn, args.detail_days, args.run_days, args.resolved_days,
+                                     args.min_interval_hours)))
+        else:
+            if args.command == 'query':
+                rows = query(conn, args)
+            else:
+                rows = list_runs(conn, args.team, args.limit)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+            else:
+                print_table(rows)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print('Error: {}'.format(e), file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
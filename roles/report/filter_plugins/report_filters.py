@@ -0,0 +1,202 @@
+"""
+Report Role - Custom Jinja2 Filters
+===================================
+Filters used by the report templates to prepare scan result data.
+
+Filters:
+    report_spooled_results:  Stream full server results, reading each
+                             spooled result file only while it is rendered.
+    report_findings_payload: Build the compact data block embedded in
+                             large-mode HTML reports.
+    report_dedupe_findings:  Merge identical findings found on several
+                             servers (replicated deployments) into one entry.
+    report_unique_findings:  Count the merged entries without keeping them.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List
+
+SEVERITY_ORDER = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO']
+
+
+def report_spooled_results(scan_results: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the full result of each server.
+
+    Results are summaries that reference a spooled result_file (see the scan
+    role); the file is read when the server is reached, so only one server's
+    findings are held in memory at a time. Results that already carry
+    hardcoded_info are yielded unchanged.
+    """
+    for server in scan_results or []:
+        if 'hardcoded_info' not in server and server.get('result_file'):
+            with open(server['result_file'], 'r', encoding='utf-8') as f:
+                full = json.load(f)
+            # Summary fields may have been updated after spooling (shared paths)
+            full.update(server)
+            yield full
+        else:
+            yield server
+
+
+def _index(table: Dict[str, int], values: List[str], value: Any) -> int:
+    """Return the position of value in a string table, adding it if new."""
+    key = str(value)
+    if key not in table:
+        table[key] = len(values)
+        values.append(key)
+    return table[key]
+
+
+def build_findings_payload(scan_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Flatten server scan results into a columnar structure.
+
+    Repeated strings (file paths, types, patterns, severities) are stored
+    once in lookup tables and every finding becomes a short row of indexes:
+    [server, file, line, type, severity, pattern, value]
+    """
+    tables = {'files': ({}, []), 'types': ({}, []), 'patterns': ({}, []), 'severities': ({}, [])}
+    servers = []
+    rows = []
+
+    for server_idx, server in enumerate(report_spooled_results(scan_results)):
+        servers.append({
+            'name': server.get('server_name', ''),
+            'user': server.get('automation_user', ''),
+            'total': int(server.get('total_findings', 0) or 0),
+        })
+        for file_info in server.get('hardcoded_info') or []:
+            file_idx = _index(*tables['files'], file_info.get('file', ''))
+            for finding in file_info.get('findings') or []:
+                rows.append([
+                    server_idx,
+                    file_idx,
+                    int(finding.get('line', 0) or 0),
+                    _index(*tables['types'], finding.get('type', '')),
+                    _index(*tables['severities'], finding.get('severity', 'INFO')),
+                    _index(*tables['patterns'], finding.get('pattern', '')),
+                    finding.get('value', ''),
+                ])
+
+    payload = {'v': 1, 'servers': servers, 'rows': rows}
+    for name, (_, values) in tables.items():
+        payload[name] = values
+    return payload
+
+
+def report_findings_payload(scan_results: List[Dict[str, Any]], compress: bool = True) -> str:
+    """
+    Serialize findings for embedding in an HTML <script> data block.
+
+    With compress=True the JSON is gzipped and base64 encoded (decoded in the
+    browser with DecompressionStream). Otherwise the JSON is emitted with
+    HTML-sensitive characters escaped so it cannot terminate the script tag.
+    """
+    data = json.dumps(build_findings_payload(scan_results or []), separators=(',', ':'))
+    if compress:
+        return base64.b64encode(gzip.compress(data.encode('utf-8'), mtime=0)).decode('ascii')
+    return data.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026')
+
+
+def relative_file(file_path: str, scan_roots: List[str]) -> str:
+    """Return file_path relative to the longest scan root that contains it."""
+    best = ''
+    for root in scan_roots or []:
+        root = root.rstrip('/') or '/'
+        if file_path == root:
+            return os.path.basename(file_path)
+        prefix = root if root.endswith('/') else root + '/'
+        if file_path.startswith(prefix) and len(root) > len(best):
+            best = root
+    if not best:
+        return file_path
+    return file_path[len(best):].lstrip('/')
+
+
+def shared_fingerprint(rel_file: str, pattern: str, value: str) -> str:
+    """Host-independent fingerprint: relative file, pattern and normalized line."""
+    key = '\x1f'.join([rel_file, pattern, re.sub(r'\s+', ' ', value or '').strip()])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _fingerprinted_findings(scan_results: List[Dict[str, Any]]) -> Iterator[tuple]:
+    """
+    Yield (server name, file, relative file, finding, fingerprint) for every finding.
+
+    Server results are streamed from their spooled files, one server at a time.
+    """
+    for server in report_spooled_results(scan_results):
+        name = server.get('server_name', '')
+        roots = server.get('paths_scanned') or []
+        for file_info in server.get('hardcoded_info') or []:
+            file_path = file_info.get('file', '')
+            rel_file = relative_file(file_path, roots)
+            for finding in file_info.get('findings') or []:
+                fingerprint = shared_fingerprint(rel_file, finding.get('pattern', ''), finding.get('value', ''))
+                yield name, file_path, rel_file, finding, fingerprint
+
+
+def report_unique_findings(scan_results: List[Dict[str, Any]]) -> int:
+    """
+    Count the groups report_dedupe_findings would return.
+
+    Only the fingerprints are kept, so the count can be stored in a fact
+    without holding the findings of every server.
+    """
+    return len({item[4] for item in _fingerprinted_findings(scan_results)})
+
+
+def report_dedupe_findings(scan_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group findings with the same fingerprint across servers.
+
+    Paths are made relative to each server's scan roots, so the same secret
+    in the same file of a release deployed on several servers becomes one
+    group listing every affected server. Groups are ordered by severity,
+    then by number of servers.
+
+    The groups hold every finding; call this from the template while it is
+    rendered rather than storing the result in a fact.
+    """
+    groups = {}
+    for name, file_path, rel_file, finding, fingerprint in _fingerprinted_findings(scan_results):
+        group = groups.get(fingerprint)
+        if group is None:
+            group = groups[fingerprint] = {
+                'fingerprint': fingerprint,
+                'relative_file': rel_file,
+                'pattern': finding.get('pattern', ''),
+                'type': finding.get('type', ''),
+                'severity': finding.get('severity', 'INFO'),
+                'value': finding.get('value', ''),
+                'servers': [],
+                'occurrences': []
+            }
+        if name not in group['servers']:
+            group['servers'].append(name)
+        group['occurrences'].append({'server': name, 'file': file_path, 'line': finding.get('line', 0)})
+
+    def sort_key(group):
+        severity = group['severity']
+        rank = SEVERITY_ORDER.index(severity) if severity in SEVERITY_ORDER else len(SEVERITY_ORDER)
+        return rank, -len(group['servers']), group['relative_file']
+
+    return sorted(groups.values(), key=sort_key)
+
+
+class FilterModule(object):
+    """Ansible filter plugin entry point."""
+
+    def filters(self):
+        return {
+            'report_spooled_results': report_spooled_results,
+            'report_findings_payload': report_findings_payload,
+            'report_dedupe_findings': report_dedupe_findings,
+            'report_unique_findings': report_unique_findings,
+        }
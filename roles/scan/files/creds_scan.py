@@ -6,21 +6,53 @@ Scans directories for hardcoded credentials in scripts and configuration files.
 
 Usage:
     python3 creds_scan.py --paths /path1 /path2 --output results.json --config config.json
+    python3 creds_scan.py --paths /path1 /path2 --probe
+    python3 creds_scan.py --paths /path1 --baseline baseline.json --output results.json
+    python3 creds_scan.py --paths /path1 /path2 --plan
+    python3 creds_scan.py --paths /path1 --skip-subtrees /path1/data --output shard0.json
+    python3 creds_scan.py --paths /path1 --checkpoint ckpt.json --resume --output results.json
+    python3 creds_scan.py --paths /path1 /path2 --deadline 3600 --output results.json
+    python3 creds_scan.py --paths /nfs/share --read-workers 8 --read-buffer-mb 128 --output results.json
 
 Features:
     - Scans multiple file types (configurable via scan_config.yml)
     - Detects common credential patterns
     - Outputs results in JSON format for Ansible consumption
     - Supports configuration from Ansible scan_config.yml
+    - Reports the filesystem identity of each scan path (from
+      /proc/self/mountinfo) so shared network exports can be scanned once
+    - Suppresses accepted findings listed in a baseline file (see
+      generate_baseline.py) before results are written
+    - Plans a scan without reading file contents (--plan): candidate file
+      counts, bytes by extension, excluded subtrees and an estimated scan time
+    - Leaves given subtrees out of a scan (--skip-subtrees) so one host's
+      paths can be split into shards scanned by concurrent processes
+    - Periodically checkpoints completed directories and their findings
+      (--checkpoint); --resume continues a killed scan from the checkpoint
+      unless it is older than --checkpoint-max-age
+    - Scans within a time budget (--deadline): files are scanned by risk
+      (credential-prone files in config/script directories first, large
+      data trees last) and the scan stops cleanly at the deadline,
+      reporting coverage and the paths left unscanned
+    - Reads upcoming files in a bounded thread pool (with posix_fadvise
+      hints) while the current file is matched, so scans of network
+      filesystems are not blocked on open/read; buffered content is kept
+      within a memory budget
 """
 
 import os
 import re
+import sys
 import json
+import time
+import hashlib
+import io
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
 
 # =============================================================================
@@ -141,6 +173,152 @@ DEFAULT_MAX_FILE_SIZE_KB = 1024
 # Default recursive scan setting
 DEFAULT_RECURSIVE_SCAN = True
 
+# Scan cost model used by --plan (estimated seconds =
+# files * ms_per_file / 1000 + bytes / (mb_per_second * 1 MiB))
+DEFAULT_PLAN_MB_PER_SECOND = 10.0
+DEFAULT_PLAN_MS_PER_FILE = 1.0
+
+# Number of excluded subtrees and largest subtrees listed per path in a plan
+PLAN_LIST_LIMIT = 20
+
+# Seconds between checkpoint writes (--checkpoint)
+DEFAULT_CHECKPOINT_INTERVAL = 60
+# Seconds after which a checkpoint is too old to resume from (0 = no limit);
+# the files of an old checkpoint may have changed since it was written
+DEFAULT_CHECKPOINT_MAX_AGE = 6 * 3600
+CHECKPOINT_VERSION = 1
+
+# Scan order with --deadline: files with these endings (credentials are
+# usually kept there) first, then files under these directory names
+RISK_FILE_ENDINGS = ('.env', '.envrc', '.properties', '.conf', '.sh', '.bash', '.zsh', '.ksh')
+RISK_DIRECTORY_NAMES = {
+    'config', 'configs', 'conf', 'etc', 'cfg', 'settings', 'secrets',
+    'script', 'scripts', 'bin', 'sbin',
+}
+
+# Number of unscanned paths listed when a scan stops at its deadline
+COVERAGE_LIST_LIMIT = 100
+
+# Read-ahead: threads reading upcoming files (0 = read each file when it is
+# scanned) and the memory budget of content read but not yet scanned
+DEFAULT_READ_WORKERS = 4
+DEFAULT_READ_BUFFER_MB = 64
+
+
+def finding_fingerprint(file_path: str, pattern: str, value: str) -> str:
+    """
+    Return the baseline fingerprint of a finding.
+
+    sha1 of file path, pattern name and the whitespace-normalized line, so
+    the fingerprint survives line number shifts and re-indentation.
+    """
+    normalized = re.sub(r'\s+', ' ', value or '').strip()
+    key = '\x1f'.join([file_path, pattern, normalized])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def load_baseline(baseline_path: str) -> set:
+    """Load baseline fingerprints into a set for O(1) lookup."""
+    try:
+        with open(baseline_path, 'r') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load baseline file {baseline_path}: {e}")
+        return set()
+    fingerprints = data.get('fingerprints', {}) if isinstance(data, dict) else data
+    return set(fingerprints)
+
+
+# Filesystem types whose content is shared between hosts (network exports)
+SHARED_FS_TYPES = [
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'glusterfs', 'ceph', 'fuse.glusterfs',
+    'fuse.sshfs', 'fuse.cephfs', 'lustre', 'gpfs', 'beegfs', 'ocfs2', 'gfs2',
+]
+
+
+def unescape_mount(value: str) -> str:
+    """Decode the octal escapes (\\040 for space, etc.) used in mountinfo."""
+    return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), value)
+
+
+def read_mountinfo(mountinfo_path: str = '/proc/self/mountinfo') -> List[Dict[str, str]]:
+    """
+    Parse /proc/self/mountinfo.
+
+    Each line looks like:
+        36 35 98:0 /export/app /mnt/app rw,noatime master:1 - nfs4 srv:/export rw
+    Fields before the '-' separator are mount id, parent id, major:minor,
+    root within the filesystem, mount point and options (plus optional
+    fields); after it come the filesystem type, mount source and super options.
+    """
+    mounts = []
+    try:
+        with open(mountinfo_path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if '-' not in fields:
+                    continue
+                sep = fields.index('-')
+                if sep < 6 or len(fields) < sep + 3:
+                    continue
+                mounts.append({
+                    'device': fields[2],
+                    'root': unescape_mount(fields[3]),
+                    'mount_point': unescape_mount(fields[4]),
+                    'fstype': fields[sep + 1],
+                    'source': unescape_mount(fields[sep + 2])
+                })
+    except OSError:
+        pass
+    return mounts
+
+
+def path_filesystem(path: str, mounts: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Return the filesystem identity of a path.
+
+    The mount is matched on st_dev (major:minor) and the longest mount point
+    containing the path. For network filesystems, export_id identifies the
+    exported directory independently of where each host mounts it:
+    "<fstype>:<source>:<root within export>/<path below mount point>".
+    """
+    real = os.path.realpath(path)
+    try:
+        st_dev = os.stat(real).st_dev
+    except OSError:
+        return {'exists': False}
+
+    device = '{}:{}'.format(os.major(st_dev), os.minor(st_dev))
+    containing = [
+        m for m in mounts
+        if real == m['mount_point'] or real.startswith(m['mount_point'].rstrip('/') + '/')
+    ]
+    # Prefer mounts of the same device; fall back to the longest mount point
+    candidates = [m for m in containing if m['device'] == device] or containing
+    best = max(candidates, key=lambda m: len(m['mount_point'])) if candidates else None
+
+    info = {'exists': True, 'st_dev': device, 'export_id': None}
+    if best is None:
+        return info
+
+    info.update({
+        'mount_point': best['mount_point'],
+        'mount_source': best['source'],
+        'fstype': best['fstype'],
+        'mount_root': best['root']
+    })
+    if best['fstype'] in SHARED_FS_TYPES or best['fstype'].startswith('nfs'):
+        below = os.path.relpath(real, best['mount_point'])
+        export_path = os.path.normpath(os.path.join(best['root'], '' if below == '.' else below))
+        info['export_id'] = '{}:{}:{}'.format(best['fstype'], best['source'], export_path)
+    return info
+
+
+def probe_paths(paths: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Return the filesystem identity of each scan path."""
+    mounts = read_mountinfo()
+    return {path: path_filesystem(path, mounts) for path in paths}
+
 
 def parse_extensions_from_config(config_extensions: List[str]) -> List[str]:
     """
@@ -172,6 +350,100 @@ def parse_exclude_from_config(config_exclude: List[str]) -> List[str]:
     return parsed
 
 
+def read_file_text(file_path: str) -> str:
+    """
+    Read a file as text the way the scan expects it (UTF-8, undecodable
+    bytes dropped).
+    
+    The kernel is told the whole file is about to be read sequentially, so
+    it widens readahead (one large request instead of many small ones on
+    network filesystems).
+    """
+    with open(file_path, 'rb') as f:
+        fd = f.fileno()
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+        data = f.read()
+    return data.decode('utf-8', errors='ignore')
+
+
+class ReadAhead:
+    """
+    Bounded read-ahead of the files a scan is about to match.
+    
+    stream() takes (key, path, size) items and yields (key, path, content)
+    in the same order. Files are read by a thread pool ahead of the
+    consumer, at most workers * 4 items ahead and with at most buffer_mb of
+    content read but not yet yielded (a file larger than the budget is read
+    alone). content is the file text, or the exception raised reading it.
+    Items with path None are passed through without a read (directory
+    boundaries, entries restored from a checkpoint).
+    """
+    
+    def __init__(self, workers: int = DEFAULT_READ_WORKERS, buffer_mb: int = DEFAULT_READ_BUFFER_MB):
+        self.workers = max(0, int(workers))
+        self.buffer_bytes = max(1, int(buffer_mb)) * 1024 * 1024
+        self.max_pending = self.workers * 4
+    
+    @staticmethod
+    def read(file_path: str) -> Any:
+        """Return the text of a file, or the exception raised reading it."""
+        try:
+            return read_file_text(file_path)
+        except Exception as e:
+            return e
+    
+    def stream(self, items: Iterable[Tuple[Any, Optional[str], int]]) -> Iterator[Tuple[Any, Optional[str], Any]]:
+        """Yield (key, path, content) for items, reading files ahead."""
+        if not self.workers:
+            for key, path, _ in items:
+                yield key, path, None if path is None else self.read(path)
+            return
+        
+        items = iter(items)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        pending = deque()
+        upcoming = None
+        buffered = 0
+        try:
+            while True:
+                # Read ahead while within the queue depth and memory budget
+                while len(pending) < self.max_pending:
+                    if upcoming is None:
+                        upcoming = next(items, None)
+                        if upcoming is None:
+                            break
+                    key, path, size = upcoming
+                    future = None
+                    if path is not None:
+                        if buffered and buffered + size > self.buffer_bytes:
+                            break
+                        future = executor.submit(self.read, path)
+                        buffered += size
+                    pending.append((key, path, size, future))
+                    upcoming = None
+                
+                if not pending:
+                    return
+                key, path, size, future = pending.popleft()
+                if future is None:
+                    yield key, path, None
+                    continue
+                content = future.result()
+                buffered -= size
+                yield key, path, content
+        finally:
+            # Consumer stopped early (deadline, error): drop reads not started
+            for _, _, _, future in pending:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=True)
+
+
 class CredentialScanner:
     """Scanner for detecting hardcoded credentials in files."""
     
@@ -181,7 +453,14 @@ class CredentialScanner:
         exclude_patterns: Optional[List[str]] = None,
         max_file_size_kb: int = DEFAULT_MAX_FILE_SIZE_KB,
         recursive_scan: bool = DEFAULT_RECURSIVE_SCAN,
-        custom_patterns: Optional[List[Dict]] = None
+        custom_patterns: Optional[List[Dict]] = None,
+        baseline_fingerprints: Optional[set] = None,
+        skip_subtrees: Optional[List[str]] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+        checkpoint_max_age: int = DEFAULT_CHECKPOINT_MAX_AGE,
+        read_workers: int = DEFAULT_READ_WORKERS,
+        read_buffer_mb: int = DEFAULT_READ_BUFFER_MB
     ):
         self.extensions = extensions or DEFAULT_EXTENSIONS
         self.exclude_patterns = exclude_patterns or DEFAULT_EXCLUDE_PATTERNS
@@ -189,6 +468,23 @@ class CredentialScanner:
         self.max_file_size_bytes = max_file_size_kb * 1024
         self.recursive_scan = recursive_scan
         self.patterns = CREDENTIAL_PATTERNS.copy()
+        self.baseline = baseline_fingerprints or set()
+        self.suppressed_count = 0
+        # Subtrees scanned by another shard of the same host
+        self.skip_subtrees = {os.path.normpath(p) for p in skip_subtrees or []}
+        # Checkpoint state: completed directory -> its findings, files and
+        # suppressed count; resumed holds directories restored from a
+        # checkpoint that have not been reached yet
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_max_age = checkpoint_max_age
+        self.checkpoint_signature = ''
+        self.checkpoint_written = time.time()
+        self.completed = {}
+        self.resumed = {}
+        self.resumed_directories = 0
+        # Files are read ahead of the one being matched
+        self.reader = ReadAhead(read_workers, read_buffer_mb)
         
         if custom_patterns:
             self.patterns.extend(custom_patterns)
@@ -248,18 +544,32 @@ class CredentialScanner:
         
         return file_path.suffix.lower() in self.extensions
     
-    def scan_file(self, file_path: Path) -> List[Dict[str, Any]]:
-        """Scan a single file for credentials."""
+    def scan_file(self, file_path: Path, content: Any = None) -> List[Dict[str, Any]]:
+        """
+        Scan a single file for credentials.
+        
+        content is the file text (or the exception raised reading it) when
+        the file was read ahead; otherwise the file is read here.
+        """
         findings = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+            if content is None:
+                content = read_file_text(str(file_path))
+            elif isinstance(content, Exception):
+                raise content
+            lines = io.StringIO(content, newline=None).readlines()
             
             for line_num, line in enumerate(lines, 1):
                 for pattern in self.compiled_patterns:
                     matches = pattern['compiled'].findall(line)
                     if matches:
+                        raw_line = line.strip()[:200]  # Truncate long lines
+                        fingerprint = finding_fingerprint(str(file_path), pattern['name'], raw_line)
+                        # Accepted findings from the baseline never leave the host
+                        if fingerprint in self.baseline:
+                            self.suppressed_count += 1
+                            continue
                         findings.append({
                             'file': str(file_path),
                             'line': line_num,
@@ -267,7 +577,8 @@ class CredentialScanner:
                             'severity': pattern['severity'],
                             'pattern': pattern['name'],
                             'match': str(matches[0]) if matches else '',
-                            'raw_line': line.strip()[:200]  # Truncate long lines
+                            'raw_line': raw_line,
+                            'fingerprint': fingerprint
                         })
         
         except Exception as e:
@@ -299,34 +610,22 @@ class CredentialScanner:
         
         all_findings = []
         scanned_files = []
+        current = None
+        mark = None
         
-        if dir_path.is_file():
-            # Single file scan
-            if self.should_scan_file(dir_path):
-                all_findings.extend(self.scan_file(dir_path))
-                scanned_files.append(str(dir_path))
-        else:
-            # Directory scan
-            if self.recursive_scan:
-                # Recursive scan
-                for root, dirs, files in os.walk(directory):
-                    # Filter excluded directories
-                    dirs[:] = [d for d in dirs if not self.should_exclude(Path(root) / d)]
-                    
-                    for file in files:
-                        file_path = Path(root) / file
-                        if self.should_scan_file(file_path):
-                            findings = self.scan_file(file_path)
-                            all_findings.extend(findings)
-                            scanned_files.append(str(file_path))
-            else:
-                # Non-recursive scan (only top-level files)
-                for file in os.listdir(directory):
-                    file_path = dir_path / file
-                    if file_path.is_file() and self.should_scan_file(file_path):
-                        findings = self.scan_file(file_path)
-                        all_findings.extend(findings)
-                        scanned_files.append(str(file_path))
+        for root, file_path, content in self.reader.stream(self._scan_items(directory)):
+            if file_path is None:
+                # Next directory: record the previous one, replay this one
+                # if it was completed before a resumed scan was killed
+                if current is not None:
+                    self._complete(current, all_findings, scanned_files, mark)
+                current = None if self._replay(root, all_findings, scanned_files) else root
+                mark = self._mark(all_findings, scanned_files)
+                continue
+            all_findings.extend(self.scan_file(file_path, content))
+            scanned_files.append(file_path)
+        if current is not None:
+            self._complete(current, all_findings, scanned_files, mark)
         
         return {
             'path': directory,
@@ -337,16 +636,70 @@ class CredentialScanner:
             'findings_count': len(all_findings)
         }
     
-    def scan_multiple_paths(self, paths: List[str]) -> Dict[str, Any]:
-        """Scan multiple paths and aggregate results."""
-        all_results = []
+    def _scan_items(self, directory: str) -> Iterator[Tuple[str, Optional[str], int]]:
+        """
+        List the files a scan of directory reads, for ReadAhead.stream().
+        
+        Yields (directory, None, 0) when a directory starts, then
+        (directory, file, size) for each of its files to scan. A single file
+        path is its own directory. Directories restored from a checkpoint
+        list no files.
+        """
+        dir_path = Path(directory)
+        
+        if dir_path.is_file():
+            # Single file scan
+            yield directory, None, 0
+            size = self._candidate_size(str(dir_path))
+            if directory not in self.resumed and size is not None:
+                yield directory, str(dir_path), size
+        elif self.recursive_scan:
+            # Recursive scan
+            for root, dirs, files in os.walk(directory):
+                # Filter excluded directories and subtrees scanned by another shard
+                dirs[:] = [
+                    d for d in dirs
+                    if not self.should_exclude(Path(root) / d)
+                    and os.path.normpath(os.path.join(root, d)) not in self.skip_subtrees
+                ]
+                
+                yield root, None, 0
+                if root in self.resumed:
+                    continue
+                for file in files:
+                    file_path = str(Path(root) / file)
+                    size = self._candidate_size(file_path)
+                    if size is not None:
+                        yield root, file_path, size
+        else:
+            # Non-recursive scan (only top-level files)
+            yield directory, None, 0
+            if directory in self.resumed:
+                return
+            for file in os.listdir(directory):
+                file_path = dir_path / file
+                size = self._candidate_size(str(file_path)) if file_path.is_file() else None
+                if size is not None:
+                    yield directory, str(file_path), size
+    
+    def scan_multiple_paths(self, paths: List[str], deadline_at: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Scan multiple paths and aggregate results.
+        
+        With deadline_at (epoch seconds), files are scanned in risk order and
+        the scan stops at the deadline; the result then has a coverage entry.
+        """
         all_findings = []
         all_scanned_files = []
         patterns_found = set()
+        coverage = None
         
-        for path in paths:
-            result = self.scan_directory(path)
-            all_results.append(result)
+        if deadline_at is None:
+            all_results = [self.scan_directory(path) for path in paths]
+        else:
+            all_results, coverage = self.scan_prioritized(paths, deadline_at)
+        
+        for result in all_results:
             all_findings.extend(result['findings'])
             all_scanned_files.extend(result['scanned_files'])
             
@@ -367,7 +720,8 @@ class CredentialScanner:
                 'type': finding['type'],
                 'value': finding['raw_line'],
                 'pattern': finding['pattern'],
-                'severity': finding['severity']
+                'severity': finding['severity'],
+                'fingerprint': finding.get('fingerprint', '')
             })
         
         for file_path, findings_list in files_with_findings.items():
@@ -380,14 +734,417 @@ class CredentialScanner:
             'scan_timestamp': datetime.now().isoformat(),
             'scan_config': self.config_info,
             'paths_scanned': paths,
+            'path_filesystems': probe_paths(paths),
             'scanned_files': all_scanned_files,
             'scanned_files_count': len(all_scanned_files),
             'patterns_checked': self.get_patterns_checked(),
             'patterns_found': list(patterns_found),
             'total_findings': len(all_findings),
+            'suppressed_findings': self.suppressed_count,
+            'resumed_directories': self.resumed_directories,
             'findings_by_severity': self._group_by_severity(all_findings),
             'hardcoded_info': hardcoded_info,
-            'path_results': all_results
+            'path_results': all_results,
+            **({'coverage': coverage} if coverage is not None else {})
+        }
+    
+    # -------------------------------------------------------------------------
+    # Deadline-aware, risk-ordered scan
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def risk_tier(file_path: str) -> int:
+        """
+        Return the scan priority of a file (lower is scanned first).
+        
+        0: credential-prone file (.env, .properties, .conf, shell script) in
+           a config or script directory
+        1: credential-prone file elsewhere
+        2: other file in a config or script directory
+        3: any other file
+        """
+        risky_file = os.path.basename(file_path).lower().endswith(RISK_FILE_ENDINGS)
+        risky_dir = any(part.lower() in RISK_DIRECTORY_NAMES for part in Path(file_path).parent.parts)
+        if risky_file:
+            return 0 if risky_dir else 1
+        return 2 if risky_dir else 3
+    
+    def _candidate_size(self, file_path: str) -> Optional[int]:
+        """Return the size of a file the scan would read, None if it is skipped."""
+        path = Path(file_path)
+        if path.suffix.lower() not in self.extensions or self.should_exclude(path):
+            return None
+        try:
+            size = os.stat(file_path).st_size
+        except OSError:
+            return None
+        return size if size <= self.max_file_size_bytes else None
+    
+    def _enumerate(self, paths: List[str], deadline_at: float) -> tuple:
+        """
+        List the candidate files of paths without reading them.
+        
+        Returns (candidates, unvisited): candidates are (path index, file,
+        size, first-level subtree) tuples; unvisited are (path index,
+        directory) tuples of directories not listed because the deadline
+        passed first.
+        """
+        candidates = []
+        unvisited = []
+        for index, path in enumerate(paths):
+            if time.time() >= deadline_at:
+                unvisited.extend((i, p) for i, p in enumerate(paths) if i >= index and os.path.exists(p))
+                break
+            if os.path.isfile(path):
+                size = self._candidate_size(path)
+                if size is not None:
+                    candidates.append((index, path, size, path))
+                continue
+            if not os.path.isdir(path):
+                continue
+            stack = [(path, path)]
+            while stack:
+                if time.time() >= deadline_at:
+                    unvisited.extend((index, directory) for directory, _ in stack)
+                    break
+                directory, subtree = stack.pop()
+                try:
+                    entries = list(os.scandir(directory))
+                except OSError:
+                    continue
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if (self.recursive_scan and not self.should_exclude(Path(entry.path))
+                                    and os.path.normpath(entry.path) not in self.skip_subtrees):
+                                stack.append((entry.path, entry.path if directory == path else subtree))
+                        elif entry.is_file():
+                            size = self._candidate_size(entry.path)
+                            if size is not None:
+                                candidates.append((index, entry.path, size, subtree))
+                    except OSError:
+                        continue
+        return candidates, unvisited
+    
+    def scan_prioritized(self, paths: List[str], deadline_at: float) -> tuple:
+        """
+        Scan the candidate files of paths by risk until deadline_at.
+        
+        Files are ordered by risk_tier, then by the size of their first-level
+        subtree (large data trees last). Files completed before a resumed
+        scan are replayed even after the deadline, including files in
+        directories the deadline left unlisted. Returns the per-path
+        results and the coverage of the scan.
+        """
+        candidates, unvisited = self._enumerate(paths, deadline_at)
+        subtree_bytes = {}
+        for index, _, size, subtree in candidates:
+            subtree_bytes[(index, subtree)] = subtree_bytes.get((index, subtree), 0) + size
+        candidates.sort(key=lambda c: (self.risk_tier(c[1]), subtree_bytes[(c[0], c[3])], c[1]))
+        
+        results = [
+            {'path': path, 'status': 'completed', 'findings': [], 'scanned_files': []}
+            for path in paths
+        ]
+        for result in results:
+            if not os.path.exists(result['path']):
+                result.update({'status': 'error', 'error': f"Directory does not exist: {result['path']}"})
+        
+        deadline_reached = bool(unvisited)
+        scanned_bytes = 0
+        unscanned = set()
+        for index, directory in unvisited:
+            results[index]['status'] = 'partial'
+            unscanned.add(directory)
+        
+        # Scan (reading ahead) until the deadline
+        stopped_at = 0 if deadline_reached else len(candidates)
+        if not deadline_reached:
+            reads = self.reader.stream(
+                (candidate, None if candidate[1] in self.resumed else candidate[1], candidate[2])
+                for candidate in candidates
+            )
+            for position, (candidate, _, content) in enumerate(reads):
+                index, file_path, size, _ = candidate
+                result = results[index]
+                if self._replay(file_path, result['findings'], result['scanned_files']):
+                    scanned_bytes += size
+                    continue
+                if time.time() >= deadline_at:
+                    stopped_at = position
+                    break
+                mark = self._mark(result['findings'], result['scanned_files'])
+                result['findings'].extend(self.scan_file(file_path, content))
+                result['scanned_files'].append(file_path)
+                scanned_bytes += size
+                self._complete(file_path, result['findings'], result['scanned_files'], mark)
+            reads.close()
+        
+        # Past the deadline only checkpointed files are added
+        for index, file_path, size, _ in candidates[stopped_at:]:
+            result = results[index]
+            if self._replay(file_path, result['findings'], result['scanned_files']):
+                scanned_bytes += size
+                continue
+            deadline_reached = True
+            result['status'] = 'partial'
+            unscanned.add(os.path.dirname(file_path))
+        
+        # Checkpointed files not listed before the deadline (in unvisited
+        # directories) are still added
+        replayed_files = 0
+        replayed_bytes = 0
+        for file_path in list(self.resumed):
+            index = self._path_index(paths, file_path)
+            if index is None or not os.path.isfile(file_path):
+                continue
+            result = results[index]
+            if self._replay(file_path, result['findings'], result['scanned_files']):
+                size = self._candidate_size(file_path) or 0
+                replayed_files += 1
+                replayed_bytes += size
+                scanned_bytes += size
+        
+        for result in results:
+            result['scanned_files_count'] = len(result['scanned_files'])
+            result['findings_count'] = len(result['findings'])
+        
+        # Nothing listed before the deadline means nothing is known to be covered
+        empty_percent = 0.0 if unvisited else 100.0
+        candidate_files = len(candidates) + replayed_files
+        candidate_bytes = sum(c[2] for c in candidates) + replayed_bytes
+        scanned_files = sum(r['scanned_files_count'] for r in results)
+        unscanned_paths = sorted(unscanned)
+        coverage = {
+            'deadline_at': datetime.fromtimestamp(deadline_at).isoformat(),
+            'deadline_reached': deadline_reached,
+            'enumeration_complete': not unvisited,
+            'candidate_files': candidate_files,
+            'scanned_files': scanned_files,
+            'percent_files': round(100.0 * scanned_files / candidate_files, 1) if candidate_files else empty_percent,
+            'candidate_bytes': candidate_bytes,
+            'scanned_bytes': scanned_bytes,
+            'percent_bytes': round(100.0 * scanned_bytes / candidate_bytes, 1) if candidate_bytes else empty_percent,
+            'unscanned_paths': unscanned_paths[:COVERAGE_LIST_LIMIT],
+            'unscanned_paths_count': len(unscanned_paths)
+        }
+        return results, coverage
+    
+    @staticmethod
+    def _path_index(paths: List[str], file_path: str) -> Optional[int]:
+        """Return the index of the (longest) scan path containing file_path."""
+        best, best_length = None, -1
+        for index, path in enumerate(paths):
+            root = path.rstrip('/')
+            if (file_path == path or file_path.startswith(root + '/')) and len(root) > best_length:
+                best, best_length = index, len(root)
+        return best
+    
+    # -------------------------------------------------------------------------
+    # Checkpoint and resume
+    # -------------------------------------------------------------------------
+    def start_checkpoint(self, paths: List[str], resume: bool = False, prioritized: bool = False) -> int:
+        """
+        Start checkpointing a scan of paths.
+
+        The checkpoint is tied to the paths and scan settings; with resume, a
+        checkpoint written by a scan with the same signature is loaded and
+        its completed directories (files, for a prioritized scan) are not
+        scanned again. A checkpoint saved more than checkpoint_max_age
+        seconds ago is ignored. Returns the number of entries restored.
+        """
+        self.checkpoint_signature = hashlib.sha1(json.dumps({
+            'paths': paths,
+            'scan_config': self.config_info,
+            'skip_subtrees': sorted(self.skip_subtrees),
+            'baseline': sorted(self.baseline),
+            'prioritized': prioritized
+        }, sort_keys=True).encode('utf-8')).hexdigest()
+        if not resume or not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load checkpoint {self.checkpoint_path}: {e}", file=sys.stderr)
+            return 0
+        if checkpoint.get('version') != CHECKPOINT_VERSION or \
+                checkpoint.get('signature') != self.checkpoint_signature:
+            print(f"Warning: Checkpoint {self.checkpoint_path} is for other paths or settings - starting over",
+                  file=sys.stderr)
+            return 0
+        if self.checkpoint_max_age > 0:
+            try:
+                age = (datetime.now() - datetime.fromisoformat(checkpoint.get('saved_at', ''))).total_seconds()
+            except (TypeError, ValueError):
+                age = None
+            if age is None or age > self.checkpoint_max_age:
+                print(f"Warning: Checkpoint {self.checkpoint_path} is older than {self.checkpoint_max_age}s "
+                      f"- starting over", file=sys.stderr)
+                return 0
+        self.resumed = checkpoint.get('directories', {})
+        return len(self.resumed)
+    
+    def _mark(self, findings: List[Dict], files: List[str]) -> tuple:
+        """Remember where a directory's findings and files start."""
+        return len(findings), len(files), self.suppressed_count
+    
+    def _replay(self, directory: str, findings: List[Dict], files: List[str]) -> bool:
+        """Add a directory completed before resuming instead of scanning it again."""
+        entry = self.resumed.pop(directory, None)
+        if entry is None:
+            return False
+        findings.extend(entry['findings'])
+        files.extend(entry['files'])
+        self.suppressed_count += entry['suppressed']
+        self.completed[directory] = entry
+        self.resumed_directories += 1
+        return True
+    
+    def _complete(self, directory: str, findings: List[Dict], files: List[str], mark: tuple):
+        """Record a completed directory and write the checkpoint when it is due."""
+        if not self.checkpoint_path:
+            return
+        self.completed[directory] = {
+            'findings': findings[mark[0]:],
+            'files': files[mark[1]:],
+            'suppressed': self.suppressed_count - mark[2]
+        }
+        if time.time() - self.checkpoint_written >= self.checkpoint_interval:
+            self.write_checkpoint()
+    
+    def write_checkpoint(self):
+        """Write the completed directories atomically to the checkpoint file."""
+        tmp_path = self.checkpoint_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'version': CHECKPOINT_VERSION,
+                    'signature': self.checkpoint_signature,
+                    'saved_at': datetime.now().isoformat(),
+                    # Restored directories not reached yet stay in the checkpoint
+                    'directories': dict(self.resumed, **self.completed)
+                }, f, separators=(',', ':'))
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            print(f"Warning: Could not write checkpoint {self.checkpoint_path}: {e}", file=sys.stderr)
+        self.checkpoint_written = time.time()
+    
+    def remove_checkpoint(self):
+        """Remove the checkpoint once the scan results are written."""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+    
+    def plan_paths(
+        self,
+        paths: List[str],
+        mb_per_second: float = DEFAULT_PLAN_MB_PER_SECOND,
+        ms_per_file: float = DEFAULT_PLAN_MS_PER_FILE
+    ) -> Dict[str, Any]:
+        """
+        Walk paths without reading file contents and estimate the scan cost.
+
+        Uses the same extension, exclusion, size and recursion rules as a
+        scan. For each path, reports candidate files and bytes by extension,
+        files skipped for size, excluded subtrees and the largest first-level
+        subtrees by estimated cost.
+        """
+        def estimate(files: int, size: int) -> float:
+            return round(files * ms_per_file / 1000.0 + size / (mb_per_second * 1024.0 * 1024.0), 3)
+
+        def add(counter: Dict[str, Dict[str, int]], key: str, size: int):
+            entry = counter.setdefault(key, {'files': 0, 'bytes': 0})
+            entry['files'] += 1
+            entry['bytes'] += size
+
+        path_plans = []
+        totals = {'files': 0, 'bytes': 0}
+        total_by_extension = {}
+
+        for path in paths:
+            plan = {
+                'path': path,
+                'exists': os.path.exists(path),
+                'candidate_files': 0,
+                'candidate_bytes': 0,
+                'by_extension': {},
+                'skipped_too_large': {'files': 0, 'bytes': 0},
+                'excluded_subtrees': [],
+                'excluded_subtrees_count': 0,
+                'directories': 0,
+                'errors': 0
+            }
+            subtrees = {}
+
+            def consider(file_path: str, size: int, subtree: Optional[str]):
+                entry_path = Path(file_path)
+                if entry_path.suffix.lower() not in self.extensions or self.should_exclude(entry_path):
+                    return
+                if size > self.max_file_size_bytes:
+                    plan['skipped_too_large']['files'] += 1
+                    plan['skipped_too_large']['bytes'] += size
+                    return
+                plan['candidate_files'] += 1
+                plan['candidate_bytes'] += size
+                add(plan['by_extension'], entry_path.suffix.lower(), size)
+                if subtree:
+                    add(subtrees, subtree, size)
+
+            if os.path.isfile(path):
+                try:
+                    consider(path, os.stat(path).st_size, None)
+                except OSError:
+                    plan['errors'] += 1
+            elif plan['exists']:
+                stack = [(path, None)]
+                while stack:
+                    directory, subtree = stack.pop()
+                    plan['directories'] += 1
+                    try:
+                        entries = list(os.scandir(directory))
+                    except OSError:
+                        plan['errors'] += 1
+                        continue
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.should_exclude(Path(entry.path)):
+                                    plan['excluded_subtrees_count'] += 1
+                                    if len(plan['excluded_subtrees']) < PLAN_LIST_LIMIT:
+                                        plan['excluded_subtrees'].append(entry.path)
+                                elif self.recursive_scan:
+                                    stack.append((entry.path, subtree or entry.path))
+                            elif entry.is_file():
+                                consider(entry.path, entry.stat().st_size, subtree)
+                        except OSError:
+                            plan['errors'] += 1
+
+            plan['estimated_seconds'] = estimate(plan['candidate_files'], plan['candidate_bytes'])
+            plan['largest_subtrees'] = sorted(
+                [
+                    {'path': subtree, 'files': counts['files'], 'bytes': counts['bytes'],
+                     'estimated_seconds': estimate(counts['files'], counts['bytes'])}
+                    for subtree, counts in subtrees.items()
+                ],
+                key=lambda s: s['estimated_seconds'], reverse=True
+            )[:PLAN_LIST_LIMIT]
+            path_plans.append(plan)
+
+            totals['files'] += plan['candidate_files']
+            totals['bytes'] += plan['candidate_bytes']
+            for ext, counts in plan['by_extension'].items():
+                entry = total_by_extension.setdefault(ext, {'files': 0, 'bytes': 0})
+                entry['files'] += counts['files']
+                entry['bytes'] += counts['bytes']
+
+        return {
+            'plan_timestamp': datetime.now().isoformat(),
+            'scan_config': self.config_info,
+            'cost_model': {'mb_per_second': mb_per_second, 'ms_per_file': ms_per_file},
+            'candidate_files': totals['files'],
+            'candidate_bytes': totals['bytes'],
+            'by_extension': total_by_extension,
+            'estimated_seconds': estimate(totals['files'], totals['bytes']),
+            'paths': path_plans
         }
     
     def _group_by_severity(self, findings: List[Dict]) -> Dict[str, int]:
@@ -457,13 +1214,112 @@ def main():
         help='Disable recursive directory scanning'
     )
     
+    parser.add_argument(
+        '--baseline', '-b',
+        help='Path to baseline JSON file of accepted finding fingerprints to suppress'
+    )
+    
+    parser.add_argument(
+        '--skip-subtrees',
+        nargs='+',
+        default=[],
+        help='Directories to leave out of the scan (scanned by another shard)'
+    )
+    
+    parser.add_argument(
+        '--checkpoint',
+        help='Checkpoint file periodically updated with completed directories and their findings'
+    )
+    
+    parser.add_argument(
+        '--checkpoint-interval',
+        type=int,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        help='Seconds between checkpoint writes'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue from the --checkpoint file of an interrupted scan (if it matches)'
+    )
+    
+    parser.add_argument(
+        '--checkpoint-max-age',
+        type=int,
+        default=DEFAULT_CHECKPOINT_MAX_AGE,
+        help='Do not resume from a checkpoint saved more than this many seconds ago (0 = no limit)'
+    )
+    
+    parser.add_argument(
+        '--deadline',
+        help='Time budget: seconds from now, or @EPOCH. Files are scanned by risk and '
+             'the scan stops cleanly at the deadline, reporting coverage'
+    )
+    
+    parser.add_argument(
+        '--read-workers',
+        type=int,
+        help=f'Threads reading upcoming files while the current one is matched '
+             f'(0 = no read-ahead, default {DEFAULT_READ_WORKERS}) - overrides config'
+    )
+    
+    parser.add_argument(
+        '--read-buffer-mb',
+        type=int,
+        help=f'Memory budget of read-ahead content in MB (default {DEFAULT_READ_BUFFER_MB}) - overrides config'
+    )
+    
+    parser.add_argument(
+        '--probe',
+        action='store_true',
+        help='Only report the filesystem identity of each path (no scan)'
+    )
+    
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Only walk the paths and estimate the scan cost (no file contents are read)'
+    )
+    
+    parser.add_argument(
+        '--plan-mb-per-second',
+        type=float,
+        default=DEFAULT_PLAN_MB_PER_SECOND,
+        help='Scan throughput assumed by --plan (MB of file content per second)'
+    )
+    
+    parser.add_argument(
+        '--plan-ms-per-file',
+        type=float,
+        default=DEFAULT_PLAN_MS_PER_FILE,
+        help='Per-file overhead assumed by --plan (milliseconds)'
+    )
+    
     args = parser.parse_args()
     
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint')
+    
+    deadline_at = None
+    if args.deadline:
+        try:
+            deadline_at = float(args.deadline[1:]) if args.deadline.startswith('@') \
+                else time.time() + float(args.deadline)
+        except ValueError:
+            parser.error('--deadline must be a number of seconds or @EPOCH')
+    
+    if args.probe:
+        print(json.dumps(probe_paths(args.paths), indent=2))
+        return
+    
     # Initialize settings from defaults
     extensions = None
     exclude_patterns = None
     max_file_size_kb = DEFAULT_MAX_FILE_SIZE_KB
     recursive_scan = DEFAULT_RECURSIVE_SCAN
+    read_workers = DEFAULT_READ_WORKERS
+    read_buffer_mb = DEFAULT_READ_BUFFER_MB
     
     # Load config file if provided
     if args.config:
@@ -476,6 +1332,10 @@ def main():
             max_file_size_kb = config['max_file_size_kb']
         if 'recursive_scan' in config:
             recursive_scan = config['recursive_scan']
+        if 'read_workers' in config:
+            read_workers = config['read_workers']
+        if 'read_buffer_mb' in config:
+            read_buffer_mb = config['read_buffer_mb']
     
     # Command-line arguments override config
     if args.extensions:
@@ -486,17 +1346,37 @@ def main():
         max_file_size_kb = args.max_file_size
     if args.no_recursive:
         recursive_scan = False
+    if args.read_workers is not None:
+        read_workers = args.read_workers
+    if args.read_buffer_mb is not None:
+        read_buffer_mb = args.read_buffer_mb
     
     # Initialize scanner with settings
     scanner = CredentialScanner(
         extensions=extensions,
         exclude_patterns=exclude_patterns,
         max_file_size_kb=max_file_size_kb,
-        recursive_scan=recursive_scan
+        recursive_scan=recursive_scan,
+        baseline_fingerprints=load_baseline(args.baseline) if args.baseline else None,
+        skip_subtrees=args.skip_subtrees,
+        checkpoint_path=args.checkpoint,
+        checkpoint_interval=args.checkpoint_interval,
+        checkpoint_max_age=args.checkpoint_max_age,
+        read_workers=read_workers,
+        read_buffer_mb=read_buffer_mb
     )
     
+    if args.plan:
+        print(json.dumps(scanner.plan_paths(args.paths, args.plan_mb_per_second, args.plan_ms_per_file), indent=2))
+        return
+    
+    if args.checkpoint:
+        restored = scanner.start_checkpoint(args.paths, resume=args.resume, prioritized=deadline_at is not None)
+        if restored:
+            print(f"Resuming from checkpoint: {restored} entries already scanned", file=sys.stderr)
+    
     # Perform scan on all paths
-    results = scanner.scan_multiple_paths(args.paths)
+    results = scanner.scan_multiple_paths(args.paths, deadline_at=deadline_at)
     
     # Format output as JSON
     output = json.dumps(results, indent=2, default=str)
@@ -511,6 +1391,13 @@ def main():
     else:
         print(output)
     
+    # A scan stopped at its deadline keeps its checkpoint, so the next run
+    # continues where it stopped; a complete scan starts over next time
+    if results.get('coverage', {}).get('deadline_reached') and args.checkpoint:
+        scanner.write_checkpoint()
+    else:
+        scanner.remove_checkpoint()
+    
     # Exit with appropriate code (0 = no findings, 1 = findings detected)
     exit(1 if results['total_findings'] > 0 else 0)
 
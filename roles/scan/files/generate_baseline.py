@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Credential Scan Baseline Generator
+==================================
+Generates or refreshes a baseline file of accepted finding fingerprints.
+Findings listed in the baseline are suppressed by creds_scan.py on the
+target host and never appear in results, reports or emails.
+
+Usage:
+    python3 generate_baseline.py --input results.json --output baseline.json
+    python3 generate_baseline.py --input results.json --output baseline.json \\
+        --refresh --prune --reason "Test fixtures, accepted by security team"
+    python3 generate_baseline.py --history-db history/findings.db --team TeamA \\
+        --output baseline.json --severity LOW --severity INFO
+
+Behaviour:
+    - --input accepts creds_scan.py output or a JSON list of server scan
+      results (server_scan_result / all_team_results); may be repeated
+    - --history-db reads the open findings of the findings history store
+    - --severity limits the baseline to findings of those severities
+    - --refresh keeps the entries already in the output file; --prune then
+      drops entries that are no longer present in the given inputs
+
+Output:
+    Baseline JSON file, and a JSON summary printed to stdout.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from creds_scan import finding_fingerprint
+
+
+def iter_result_findings(data: Any) -> Iterator[Dict[str, Any]]:
+    """Yield (file, pattern, value, severity) dicts from scan output JSON."""
+    results = data if isinstance(data, list) else [data]
+    for result in results:
+        for file_info in (result or {}).get('hardcoded_info') or []:
+            for finding in file_info.get('findings') or []:
+                yield {
+                    'file': file_info.get('file', ''),
+                    'pattern': finding.get('pattern', ''),
+                    'value': finding.get('value', ''),
+                    'severity': finding.get('severity', 'INFO'),
+                    'fingerprint': finding.get('fingerprint')
+                }
+
+
+def iter_history_findings(db_path: str, team: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Yield the open findings of the findings history store."""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    sql = 'SELECT file, pattern, value, severity FROM findings WHERE resolved_at IS NULL'
+    params = []
+    if team:
+        sql += ' AND team = ?'
+        params.append(team)
+    try:
+        for row in conn.execute(sql, params):
+            yield dict(row)
+    finally:
+        conn.close()
+
+
+def load_existing(path: str) -> Dict[str, Dict[str, Any]]:
+    """Load the entries of an existing baseline file."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    fingerprints = data.get('fingerprints', {}) if isinstance(data, dict) else data
+    if isinstance(fingerprints, list):
+        return {fp: {} for fp in fingerprints}
+    return dict(fingerprints)
+
+
+def build_baseline(
+    findings: List[Dict[str, Any]],
+    existing: Dict[str, Dict[str, Any]],
+    severities: List[str],
+    reason: str,
+    prune: bool
+) -> Dict[str, Any]:
+    """Merge findings into the existing baseline entries."""
+    now = datetime.now().isoformat(timespec='seconds')
+    seen = set()
+    entries = dict(existing)
+    added = 0
+
+    for finding in findings:
+        if severities and finding['severity'] not in severities:
+            continue
+        fingerprint = finding.get('fingerprint') or finding_fingerprint(
+            finding['file'], finding['pattern'], finding['value'])
+        seen.add(fingerprint)
+        if fingerprint in entries:
+            continue
+        entries[fingerprint] = {
+            'file': finding['file'],
+            'pattern': finding['pattern'],
+            'severity': finding['severity'],
+            'reason': reason,
+            'added': now
+        }
+        added += 1
+
+    pruned = 0
+    if prune:
+        for fingerprint in [fp for fp in entries if fp not in seen]:
+            del entries[fingerprint]
+            pruned += 1
+
+    return {
+        'baseline': {
+            'version': 1,
+            'generated_at': now,
+            'fingerprints': dict(sorted(entries.items()))
+        },
+        'summary': {
+            'total': len(entries),
+            'added': added,
+            'kept': len(entries) - added,
+            'pruned': pruned
+        }
+    }
+
+
+def main():
+    """Main entry point for baseline generation."""
+    parser = argparse.ArgumentParser(description='Generate or refresh a credential scan baseline file')
+    parser.add_argument('--input', '-i', action='append', default=[],
+                        help='Scan results JSON file (creds_scan.py output or list of server results)')
+    parser.add_argument('--history-db', help='Read open findings from the findings history store')
+    parser.add_argument('--team', help='Limit --history-db findings to one team')
+    parser.add_argument('--output', '-o', required=True, help='Baseline file to write')
+    parser.add_argument('--severity', action='append', default=[], help='Only baseline findings of this severity')
+    parser.add_argument('--reason', default='', help='Reason recorded for newly added entries')
+    parser.add_argument('--refresh', action='store_true', help='Keep the entries already in the output file')
+    parser.add_argument('--prune', action='store_true',
+                        help='With --refresh, drop entries not present in the inputs')
+
+    args = parser.parse_args()
+    if not args.input and not args.history_db:
+        parser.error('at least one --input or --history-db is required')
+
+    findings = []
+    for path in args.input:
+        with open(path, 'r', encoding='utf-8') as f:
+            findings.extend(iter_result_findings(json.load(f)))
+    if args.history_db:
+        findings.extend(iter_history_findings(args.history_db, args.team))
+
+    existing = load_existing(args.output) if args.refresh else {}
+    result = build_baseline(findings, existing, [s.upper() for s in args.severity], args.reason, args.prune)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result['baseline'], f, indent=2)
+        f.write('\n')
+
+    print(json.dumps(dict(result['summary'], output=args.output)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Scan Result Spooling Script
+===========================
+Runs on the controller after a host scan. Writes the full structured scan
+result of the host to the spool directory and prints only a small summary,
+so findings are not carried in Ansible facts or the fact cache.
+
+Usage:
+    python3 spool_result.py --raw /tmp/spool/host.raw.json \\
+        --output /tmp/spool/host.json --summary-output /tmp/spool/host.summary.json \\
+        --meta '{"server_name": "host", "automation_user": "svc", ...}'
+
+Behaviour:
+    - --raw is the creds_scan.py results file fetched from the host; when it
+      does not exist (no scan paths on the host) an empty result is spooled
+    - Several --raw files (one per shard of a sharded scan) are merged into
+      one result
+    - The full result (server_scan_result structure plus result_file) is
+      written to --output and the raw file is removed
+    - The summary (no hardcoded_info, file_paths_scanned or patterns_checked)
+      is written to --summary-output
+
+Output:
+    JSON {summary, preview} printed to stdout for Ansible consumption. The
+    preview lists the first --preview findings for display.
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Dict, List
+
+# Keys kept only in the spooled result file, never in facts
+SPOOL_ONLY_KEYS = ('hardcoded_info', 'file_paths_scanned', 'patterns_checked')
+
+# Unscanned paths listed in the coverage of a merged (sharded) result
+COVERAGE_LIST_LIMIT = 100
+
+
+def merge_coverage(coverages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge the coverage of the shards of a deadline-limited scan."""
+    if not coverages:
+        return {}
+    merged = {
+        'deadline_at': min(c.get('deadline_at', '') for c in coverages),
+        'deadline_reached': any(c.get('deadline_reached') for c in coverages),
+        'enumeration_complete': all(c.get('enumeration_complete', True) for c in coverages)
+    }
+    for key in ('candidate_files', 'scanned_files', 'candidate_bytes', 'scanned_bytes', 'unscanned_paths_count'):
+        merged[key] = sum(int(c.get(key, 0) or 0) for c in coverages)
+    for percent, part, whole in (('percent_files', 'scanned_files', 'candidate_files'),
+                                 ('percent_bytes', 'scanned_bytes', 'candidate_bytes')):
+        merged[percent] = round(100.0 * merged[part] / merged[whole], 1) if merged[whole] else \
+            (100.0 if merged['enumeration_complete'] else 0.0)
+    merged['unscanned_paths'] = sorted(p for c in coverages for p in c.get('unscanned_paths', []))[:COVERAGE_LIST_LIMIT]
+    return merged
+
+
+def write_json(path: str, data: Any):
+    """Write compact JSON atomically."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def merge_raw(raws: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge creds_scan.py results of the shards of one host scan."""
+    if len(raws) == 1:
+        return raws[0]
+    merged = {
+        'scan_timestamp': min((r.get('scan_timestamp', '') for r in raws), default=''),
+        'scanned_files': [],
+        'scanned_files_count': 0,
+        'patterns_found': [],
+        'path_filesystems': {},
+        'total_findings': 0,
+        'suppressed_findings': 0,
+        'resumed_directories': 0,
+        'findings_by_severity': {},
+        'hardcoded_info': []
+    }
+    for raw in raws:
+        if 'scan_config' in raw:
+            merged['scan_config'] = raw['scan_config']
+        if 'patterns_checked' in raw:
+            merged['patterns_checked'] = raw['patterns_checked']
+        merged['scanned_files'].extend(raw.get('scanned_files', []))
+        merged['scanned_files_count'] += int(raw.get('scanned_files_count', 0) or 0)
+        merged['patterns_found'].extend(
+            p for p in raw.get('patterns_found', []) if p not in merged['patterns_found'])
+        merged['path_filesystems'].update(raw.get('path_filesystems', {}))
+        merged['total_findings'] += int(raw.get('total_findings', 0) or 0)
+        merged['suppressed_findings'] += int(raw.get('suppressed_findings', 0) or 0)
+        merged['resumed_directories'] += int(raw.get('resumed_directories', 0) or 0)
+        for severity, count in (raw.get('findings_by_severity') or {}).items():
+            merged['findings_by_severity'][severity] = merged['findings_by_severity'].get(severity, 0) + count
+        merged['hardcoded_info'].extend(raw.get('hardcoded_info', []))
+    coverage = merge_coverage([raw['coverage'] for raw in raws if raw.get('coverage')])
+    if coverage:
+        merged['coverage'] = coverage
+    return merged
+
+
+def build_result(raw: Dict[str, Any], meta: Dict[str, Any], result_file: str) -> Dict[str, Any]:
+    """Build the full server scan result from creds_scan.py output and host metadata."""
+    total_findings = int(raw.get('total_findings', 0) or 0)
+    return {
+        'server_name': meta.get('server_name', ''),
+        'automation_user': meta.get('automation_user', ''),
+        'scan_timestamp': raw.get('scan_timestamp', meta.get('scan_timestamp', '')),
+        'scan_config': raw.get('scan_config', meta.get('scan_config', {})),
+        'patterns_checked': raw.get('patterns_checked', []),
+        'patterns_found': raw.get('patterns_found', []),
+        'file_paths_scanned': raw.get('scanned_files', []),
+        'file_paths_scanned_count': int(raw.get('scanned_files_count', 0) or 0),
+        'paths_requested': meta.get('paths_requested', []),
+        'paths_scanned': meta.get('paths_scanned', []),
+        'paths_missing': meta.get('paths_missing', []),
+        'paths_shared_skipped': meta.get('paths_shared_skipped', []),
+        'path_filesystems': raw.get('path_filesystems', {}),
+        'total_findings': total_findings,
+        'suppressed_findings': int(raw.get('suppressed_findings', 0) or 0),
+        'resumed_directories': int(raw.get('resumed_directories', 0) or 0),
+        'findings_by_severity': raw.get('findings_by_severity', {}),
+        'hardcoded_info': raw.get('hardcoded_info', []),
+        'scan_status': 'findings_detected' if total_findings > 0 else 'clean',
+        'scan_shards': meta.get('scan_shards', []),
+        'coverage': raw.get('coverage', {}),
+        'result_file': result_file
+    }
+
+
+def summarize(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the fact-sized summary of a full server scan result."""
+    summary = {key: value for key, value in result.items() if key not in SPOOL_ONLY_KEYS}
+    summary['files_with_findings'] = len(result.get('hardcoded_info') or [])
+    return summary
+
+
+def preview(result: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    """Return the first findings of a result for display."""
+    entries = []
+    for file_info in result.get('hardcoded_info') or []:
+        for finding in file_info.get('findings') or []:
+            if len(entries) >= limit:
+                return entries
+            entries.append({
+                'file': file_info.get('file', ''),
+                'line': finding.get('line', 0),
+                'type': finding.get('type', ''),
+                'severity': finding.get('severity', 'INFO'),
+                'value': (finding.get('value') or '')[:100]
+            })
+    return entries
+
+
+def main():
+    """Main entry point for result spooling."""
+    parser = argparse.ArgumentParser(description='Spool a host scan result on the controller')
+    parser.add_argument('--raw', required=True, nargs='+',
+                        help='creds_scan.py results file(s) fetched from the host (one per shard)')
+    parser.add_argument('--output', required=True, help='Spool file for the full result')
+    parser.add_argument('--summary-output', required=True, help='Spool file for the result summary')
+    parser.add_argument('--meta', default='{}', help='Host metadata as JSON')
+    parser.add_argument('--preview', type=int, default=20, help='Number of findings to preview')
+
+    args = parser.parse_args()
+
+    raws = []
+    for raw_path in args.raw:
+        if os.path.exists(raw_path):
+            with open(raw_path, 'r', encoding='utf-8') as f:
+                raws.append(json.load(f))
+
+    result = build_result(merge_raw(raws) if raws else {}, json.loads(args.meta), os.path.abspath(args.output))
+    summary = summarize(result)
+    write_json(args.output, result)
+    write_json(args.summary_output, summary)
+    for raw_path in args.raw:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+    print(json.dumps({'summary': summary, 'preview': preview(result, args.preview)}))
+
+
+if __name__ == '__main__':
+    main()
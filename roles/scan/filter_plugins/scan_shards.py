@@ -0,0 +1,84 @@
+"""
+Scan Role - Custom Jinja2 Filters
+=================================
+Filters used by the scan role to split one host's scan into shards that run
+as concurrent scanner processes.
+
+Filters:
+    scan_path_shards:  Split scan paths (and the largest subtrees of a scan
+                       cost plan) into balanced shards.
+"""
+
+import os
+from typing import Any, Dict, List
+
+
+def _units(paths: List[str], plan: Dict[str, Any], shard_count: int, recursive: bool) -> List[Dict[str, Any]]:
+    """
+    Return the units of work to distribute over shards.
+
+    Every path is a unit. With a plan, a path estimated at more than an even
+    share of the total is split: its largest first-level subtrees become
+    units of their own and the path's unit skips them.
+    """
+    path_plans = {p.get('path'): p for p in (plan or {}).get('paths') or []}
+    fair_share = float((plan or {}).get('estimated_seconds', 0)) / max(1, shard_count)
+
+    units = []
+    for path in paths or []:
+        path_plan = path_plans.get(path) or {}
+        cost = float(path_plan.get('estimated_seconds', 1.0))
+        unit = {'path': path, 'cost': cost, 'skip_subtrees': []}
+        units.append(unit)
+        if not recursive or not path_plan or cost <= fair_share:
+            continue
+        for subtree in path_plan.get('largest_subtrees') or []:
+            if unit['cost'] <= fair_share:
+                break
+            subtree_cost = float(subtree.get('estimated_seconds', 0))
+            if subtree_cost <= 0:
+                break
+            units.append({'path': subtree['path'], 'cost': subtree_cost, 'skip_subtrees': []})
+            unit['skip_subtrees'].append(subtree['path'])
+            unit['cost'] = max(0.0, unit['cost'] - subtree_cost)
+    return units
+
+
+def scan_path_shards(paths: List[str], shard_count: int = 1, plan: Dict[str, Any] = None,
+                     recursive: bool = True) -> List[Dict[str, Any]]:
+    """
+    Split paths into at most shard_count shards of similar estimated cost.
+
+    Each shard is {index, paths, skip_subtrees, estimated_seconds}. Units are
+    assigned longest first to the shard with the least work. A shard's
+    skip_subtrees are the subtrees of its paths that other units scan, so no
+    file is scanned twice. Without a plan every path counts the same.
+    """
+    shard_count = max(1, int(shard_count or 1))
+    units = _units(paths, plan, shard_count, recursive)
+    shards = [
+        {'index': index, 'paths': [], 'skip_subtrees': [], 'estimated_seconds': 0.0}
+        for index in range(min(shard_count, len(units)) or 1)
+    ]
+    for unit in sorted(units, key=lambda u: u['cost'], reverse=True):
+        shard = min(shards, key=lambda s: s['estimated_seconds'])
+        shard['paths'].append(unit['path'])
+        shard['skip_subtrees'].extend(unit['skip_subtrees'])
+        shard['estimated_seconds'] += unit['cost']
+
+    # Keep the configured path order within a shard, split subtrees last
+    order = {path: index for index, path in enumerate(paths or [])}
+    for shard in shards:
+        shard['paths'].sort(key=lambda p: (order.get(p, len(order)), p))
+        shard['skip_subtrees'] = sorted(set(os.path.normpath(p) for p in shard['skip_subtrees']))
+        shard['estimated_seconds'] = round(shard['estimated_seconds'], 1)
+    return [shard for shard in shards if shard['paths']]
+
+
+class FilterModule(object):
+    """Ansible filter plugin entry point."""
+
+    def filters(self):
+        return {
+            'scan_path_shards': scan_path_shards,
+        }
@@ -0,0 +1,18 @@
+"""Shared setup of the tests of the role scripts and filter plugins."""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The role scripts are run as files on the controller or the target, not
+# installed as a package
+for directory in (
+    "roles/scan/files",
+    "roles/scan/filter_plugins",
+    "roles/history/files",
+    "roles/email/files",
+    "roles/report/filter_plugins",
+    "playbooks/filter_plugins",
+):
+    sys.path.insert(0, os.path.join(ROOT, directory))
@@ -0,0 +1,237 @@
+"""Tests for the credential scanner (creds_scan.py)."""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import creds_scan
+from creds_scan import CredentialScanner, ReadAhead
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small scan tree with one finding per directory."""
+    root = tmp_path / "app"
+    (root / "config").mkdir(parents=True)
+    (root / "scripts").mkdir()
+    (root / "config" / "db.conf").write_text('password = "s3cretvalue"\n')
+    (root / "scripts" / "deploy.sh").write_text("export API_KEY=abcdef0123456789abcd\n")
+    (root / "README.md").write_text("password = not scanned\n")
+    return root
+
+
+def findings(results):
+    return sorted(
+        (info["file"], f["line"], f["pattern"]) for info in results["hardcoded_info"] for f in info["findings"]
+    )
+
+
+class TestCheckpoint:
+    """Tests for checkpoint writing and resuming (--checkpoint, --resume, --checkpoint-max-age)."""
+
+    def scan(self, tree, checkpoint, resume=False, max_age=3600):
+        scanner = CredentialScanner(checkpoint_path=str(checkpoint), checkpoint_interval=0, checkpoint_max_age=max_age)
+        restored = scanner.start_checkpoint([str(tree)], resume=resume)
+        return scanner, restored, scanner.scan_multiple_paths([str(tree)])
+
+    def test_checkpoint_written(self, tree, tmp_path):
+        """Completed directories should be written to the checkpoint with their findings."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        self.scan(tree, checkpoint)
+        data = json.loads(checkpoint.read_text())
+        assert data["version"] == 1
+        assert sorted(data["directories"]) == sorted(str(p) for p in (tree, tree / "config", tree / "scripts"))
+        assert data["directories"][str(tree / "config")]["files"] == [str(tree / "config" / "db.conf")]
+        assert len(data["directories"][str(tree / "config")]["findings"]) > 0
+        assert not (tmp_path / "scan.checkpoint.json.tmp").exists()
+
+    def test_resume_replays_checkpointed_directories(self, tree, tmp_path):
+        """A resumed scan should take completed directories from the checkpoint instead of reading them."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        _, _, first = self.scan(tree, checkpoint)
+        # Changed after the checkpoint: the resumed scan does not read the file again
+        (tree / "config" / "db.conf").write_text("nothing here\n")
+        scanner, restored, resumed = self.scan(tree, checkpoint, resume=True)
+        assert restored == 3
+        assert resumed["resumed_directories"] == 3
+        assert findings(resumed) == findings(first)
+        assert resumed["scanned_files_count"] == first["scanned_files_count"]
+        assert scanner.resumed == {}
+
+    def test_stale_checkpoint_discarded(self, tree, tmp_path, capsys):
+        """A checkpoint saved longer ago than checkpoint_max_age should not be resumed."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        self.scan(tree, checkpoint)
+        data = json.loads(checkpoint.read_text())
+        data["saved_at"] = (datetime.now() - timedelta(hours=7)).isoformat()
+        checkpoint.write_text(json.dumps(data))
+        (tree / "config" / "db.conf").write_text("nothing here\n")
+        _, restored, results = self.scan(tree, checkpoint, resume=True, max_age=6 * 3600)
+        assert restored == 0
+        assert results["resumed_directories"] == 0
+        assert str(tree / "config" / "db.conf") not in [f[0] for f in findings(results)]
+        assert "older than 21600s" in capsys.readouterr().err
+
+    def test_no_max_age_resumes_old_checkpoint(self, tree, tmp_path):
+        """With checkpoint_max_age 0 the age of a checkpoint should not matter."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        self.scan(tree, checkpoint)
+        data = json.loads(checkpoint.read_text())
+        data["saved_at"] = (datetime.now() - timedelta(days=30)).isoformat()
+        checkpoint.write_text(json.dumps(data))
+        _, restored, _ = self.scan(tree, checkpoint, resume=True, max_age=0)
+        assert restored == 3
+
+    def test_checkpoint_of_other_settings_discarded(self, tree, tmp_path, capsys):
+        """A checkpoint written for other paths or settings should not be resumed."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        self.scan(tree, checkpoint)
+        scanner = CredentialScanner(checkpoint_path=str(checkpoint), max_file_size_kb=1)
+        assert scanner.start_checkpoint([str(tree)], resume=True) == 0
+        assert "other paths or settings" in capsys.readouterr().err
+
+    def test_unreached_entries_kept_in_checkpoint(self, tree, tmp_path):
+        """Restored directories not scanned again yet should stay in a rewritten checkpoint."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        self.scan(tree, checkpoint)
+        before = json.loads(checkpoint.read_text())["directories"]
+        scanner = CredentialScanner(checkpoint_path=str(checkpoint), checkpoint_interval=0)
+        scanner.start_checkpoint([str(tree)], resume=True)
+        scanner.write_checkpoint()
+        assert json.loads(checkpoint.read_text())["directories"] == before
+
+    def test_remove_checkpoint(self, tree, tmp_path):
+        """remove_checkpoint should delete the file once the results are written."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        scanner, _, _ = self.scan(tree, checkpoint)
+        scanner.remove_checkpoint()
+        assert not checkpoint.exists()
+        scanner.remove_checkpoint()
+
+
+class TestDeadlineResume:
+    """Tests for resuming a deadline-limited (prioritized) scan from its checkpoint."""
+
+    def scanner(self, checkpoint, resume, paths):
+        scanner = CredentialScanner(checkpoint_path=str(checkpoint), checkpoint_interval=0)
+        restored = scanner.start_checkpoint(paths, resume=resume, prioritized=True)
+        return scanner, restored
+
+    def test_checkpointed_files_replayed_when_deadline_passed_before_listing(self, tree, tmp_path):
+        """Files of the checkpoint should be replayed even if the deadline stops the listing of their directory."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        paths = [str(tree)]
+        scanner, _ = self.scanner(checkpoint, False, paths)
+        first = scanner.scan_multiple_paths(paths, deadline_at=time.time() + 60)
+        assert first["coverage"]["deadline_reached"] is False
+
+        scanner, restored = self.scanner(checkpoint, True, paths)
+        assert restored == 2
+        resumed = scanner.scan_multiple_paths(paths, deadline_at=time.time() - 1)
+        assert findings(resumed) == findings(first)
+        assert resumed["resumed_directories"] == 2
+        assert resumed["coverage"]["deadline_reached"] is True
+        assert resumed["coverage"]["enumeration_complete"] is False
+        assert resumed["coverage"]["percent_files"] <= 100.0
+        assert scanner.resumed == {}
+
+    def test_deadline_stopped_scan_resumed(self, tree, tmp_path):
+        """A scan stopped at its deadline should be completed by the next run."""
+        checkpoint = tmp_path / "scan.checkpoint.json"
+        paths = [str(tree)]
+        scanner, _ = self.scanner(checkpoint, False, paths)
+        stopped = scanner.scan_multiple_paths(paths, deadline_at=time.time() - 1)
+        assert stopped["total_findings"] == 0
+        assert stopped["coverage"]["unscanned_paths"] == [str(tree)]
+        scanner.write_checkpoint()
+
+        scanner, _ = self.scanner(checkpoint, True, paths)
+        completed = scanner.scan_multiple_paths(paths, deadline_at=time.time() + 60)
+        assert completed["coverage"]["deadline_reached"] is False
+        assert completed["coverage"]["percent_files"] == 100.0
+        assert findings(completed) == findings(CredentialScanner().scan_multiple_paths(paths))
+
+    def test_checkpointed_files_outside_paths_ignored(self, tree, tmp_path):
+        """Checkpoint entries outside the scan paths or no longer present should not be replayed."""
+        scanner = CredentialScanner()
+        scanner.resumed = {
+            "/elsewhere/a.conf": {
+                "findings": [{"file": "/elsewhere/a.conf"}],
+                "files": ["/elsewhere/a.conf"],
+                "suppressed": 0,
+            },
+            str(tree / "gone.conf"): {"findings": [], "files": [str(tree / "gone.conf")], "suppressed": 0},
+        }
+        results = scanner.scan_multiple_paths([str(tree)], deadline_at=time.time() - 1)
+        assert results["scanned_files_count"] == 0
+        assert results["resumed_directories"] == 0
+
+
+def pool_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("ThreadPoolExecutor")]
+
+
+class TestReadAhead:
+    """Tests for the read-ahead thread pool (ReadAhead)."""
+
+    def test_same_findings_with_and_without_read_ahead(self, tree):
+        """Reading files ahead should not change the findings of a scan."""
+        for index in range(30):
+            (tree / "config" / f"app{index}.properties").write_text(f"db.password=value{index}\n" * (index % 3))
+        paths = [str(tree)]
+        plain = CredentialScanner(read_workers=0).scan_multiple_paths(paths)
+        ahead = CredentialScanner(read_workers=4).scan_multiple_paths(paths)
+        assert findings(ahead) == findings(plain)
+        assert ahead["scanned_files"] == plain["scanned_files"]
+        prioritized = CredentialScanner(read_workers=4).scan_multiple_paths(paths, deadline_at=time.time() + 60)
+        assert findings(prioritized) == findings(plain)
+
+    def test_reads_bounded(self, tmp_path, monkeypatch):
+        """No more than workers * 4 files should be read ahead of the consumer."""
+        submitted = []
+        monkeypatch.setattr(ReadAhead, "read", staticmethod(lambda path: submitted.append(path) or path))
+        reader = ReadAhead(workers=2)
+        items = [(index, f"/f{index}", 10) for index in range(50)]
+        for consumed, (key, path, content) in enumerate(reader.stream(items), 1):
+            assert content == path == f"/f{key}"
+            assert len(submitted) - consumed <= reader.max_pending
+        assert len(submitted) == 50
+
+    def test_buffer_budget(self, monkeypatch):
+        """Files should not be read ahead beyond the memory budget, but a large file is read alone."""
+        submitted = []
+        monkeypatch.setattr(ReadAhead, "read", staticmethod(lambda path: submitted.append(path) or path))
+        reader = ReadAhead(workers=4, buffer_mb=1)
+        megabyte = 1024 * 1024
+        stream = reader.stream([(0, "/big", 3 * megabyte), (1, "/a", megabyte // 2), (2, "/b", megabyte // 2)])
+        assert next(stream)[1] == "/big"
+        assert submitted == ["/big"]
+        assert [item[1] for item in stream] == ["/a", "/b"]
+
+    def test_pool_shut_down_when_scan_stops_at_deadline(self, tree, monkeypatch):
+        """A scan stopped at its deadline should cancel pending reads and shut the pool down."""
+        for index in range(200):
+            (tree / "config" / f"app{index}.conf").write_text("key = value\n")
+        scanner = CredentialScanner(read_workers=2)
+        reads = []
+        read = ReadAhead.read
+        monkeypatch.setattr(ReadAhead, "read", staticmethod(lambda path: reads.append(path) or read(path)))
+        scanned = []
+        scan_file = scanner.scan_file
+        deadline_at = time.time() + 3600
+
+        def scan_then_pass_deadline(file_path, content=None):
+            scanned.append(file_path)
+            if len(scanned) == 5:
+                monkeypatch.setattr(creds_scan.time, "time", lambda: deadline_at + 1)
+            return scan_file(file_path, content)
+
+        monkeypatch.setattr(scanner, "scan_file", scan_then_pass_deadline)
+        results = scanner.scan_multiple_paths([str(tree)], deadline_at=deadline_at)
+        assert len(scanned) == 5
+        assert results["coverage"]["deadline_reached"] is True
+        assert len(reads) <= len(scanned) + scanner.reader.max_pending + 1
+        assert pool_threads() == []
@@ -0,0 +1,67 @@
+"""Tests for the findings history store (findings_store.py)."""
+
+import json
+
+import pytest
+
+from findings_store import connect, ingest
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "findings.db"))
+    yield conn
+    conn.close()
+
+
+def server_result(tmp_path, name, files, findings, **summary):
+    """Spool a server result and return its summary, as the scan role does."""
+    result = {
+        "server_name": name,
+        "file_paths_scanned": files,
+        "hardcoded_info": [
+            {"file": file, "findings": [{"line": 1, "pattern": "password_assignment", "value": value}]}
+            for file, value in findings
+        ],
+    }
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(result))
+    return {
+        "server_name": name,
+        "scan_status": "findings_detected" if findings else "clean",
+        "total_findings": len(findings),
+        "result_file": str(path),
+        **summary,
+    }
+
+
+class TestIngest:
+    """Tests for ingest function."""
+
+    def test_unseen_findings_resolved(self, conn, tmp_path):
+        """Open findings not seen again on a scanned host should be resolved."""
+        files = ["/etc/a.conf", "/opt/a.conf"]
+        ingest(conn, "App", [server_result(tmp_path, "web01", files, [(f, "password=x1x1") for f in files])])
+        run = ingest(conn, "App", [server_result(tmp_path, "web01", files, [])])
+        assert run["summary"]["resolved_findings"] == 2
+        assert sorted(entry["file"] for entry in run["delta"]["resolved"]) == files
+
+    def test_failed_host_not_resolved(self, conn, tmp_path):
+        """Findings of a host whose scan failed should stay open."""
+        ingest(conn, "App", [server_result(tmp_path, "web01", ["/etc/a.conf"], [("/etc/a.conf", "password=x1x1")])])
+        failed = {"server_name": "web01", "scan_status": "failed"}
+        run = ingest(conn, "App", [failed])
+        assert run["summary"]["resolved_findings"] == 0
+        assert run["delta"]["resolved"] == []
+
+    def test_deadline_scan_resolves_only_scanned_files(self, conn, tmp_path):
+        """A scan stopped at its deadline should not resolve findings in files it did not reach."""
+        files = ["/etc/a.conf", "/opt/a.conf"]
+        ingest(conn, "App", [server_result(tmp_path, "web01", files, [(f, "password=x1x1") for f in files])])
+        coverage = {"deadline_reached": True, "unscanned_paths": ["/opt"], "unscanned_paths_count": 1}
+        stopped = server_result(tmp_path, "web01", ["/etc/a.conf"], [], coverage=coverage)
+        run = ingest(conn, "App", [stopped])
+        assert [entry["file"] for entry in run["delta"]["resolved"]] == ["/etc/a.conf"]
+        assert run["summary"]["resolved_findings"] == 1
+        still_open = conn.execute("SELECT file FROM findings WHERE resolved_at IS NULL").fetchall()
+        assert [row["file"] for row in still_open] == ["/opt/a.conf"]
@@ -0,0 +1,86 @@
+"""Tests for the email attachment preparation."""
+
+import csv
+import os
+
+from prepare_attachments import split_csv_by_server
+
+STANDARD_HEADER = [
+    "Hostname",
+    "Automation_User",
+    "Scan_Path",
+    "File_With_Hardcoded_Info",
+    "Line_Number",
+    "Finding_Type",
+    "Severity",
+    "Hardcoded_Information",
+]
+DELTA_HEADER = [
+    "Change",
+    "Hostname",
+    "File_With_Hardcoded_Info",
+    "Line_Number",
+    "Finding_Type",
+    "Severity",
+    "First_Seen",
+    "Hardcoded_Information",
+]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as handle:
+        return list(csv.reader(handle))
+
+
+class TestSplitCsvByServer:
+    """Tests for split_csv_by_server function."""
+
+    def test_standard_report_split_by_hostname(self, tmp_path):
+        """The standard report should give one file per host, each with the header."""
+        rows = [
+            ["web01", "ansible", "/etc", "/etc/a.conf", "3", "password", "high", "secret"],
+            ["db01", "ansible", "/etc", "/etc/b.conf", "7", "api_key", "high", "key"],
+            ["web01", "ansible", "/opt", "/opt/c.conf", "1", "token", "medium", "token"],
+        ]
+        source = write_csv(tmp_path / "report.csv", STANDARD_HEADER, rows)
+        out = tmp_path / "out"
+        out.mkdir()
+        paths = split_csv_by_server(source, str(out))
+        assert sorted(os.path.basename(path) for path in paths) == ["report_db01.csv", "report_web01.csv"]
+        web = read_csv(out / "report_web01.csv")
+        assert web[0] == STANDARD_HEADER
+        assert [row[3] for row in web[1:]] == ["/etc/a.conf", "/opt/c.conf"]
+
+    def test_delta_report_split_by_hostname(self, tmp_path):
+        """The delta report starts with Change, but should still be split by host."""
+        rows = [
+            ["NEW", "web01", "/etc/a.conf", "3", "password", "high", "2026-10-01", "secret"],
+            ["RESOLVED", "db01", "/etc/b.conf", "7", "api_key", "high", "2026-09-01", "key"],
+            ["STILL_OPEN", "web01", "", "", "", "", "", "4 findings unchanged since previous run"],
+            ["STILL_OPEN", "db01", "", "", "", "", "", "2 findings unchanged since previous run"],
+        ]
+        source = write_csv(tmp_path / "report_delta.csv", DELTA_HEADER, rows)
+        out = tmp_path / "out"
+        out.mkdir()
+        paths = split_csv_by_server(source, str(out))
+        assert sorted(os.path.basename(path) for path in paths) == [
+            "report_delta_db01.csv",
+            "report_delta_web01.csv",
+        ]
+        web = read_csv(out / "report_delta_web01.csv")
+        assert web[0] == DELTA_HEADER
+        assert [row[0] for row in web[1:]] == ["NEW", "STILL_OPEN"]
+
+    def test_empty_csv_returned_unchanged(self, tmp_path):
+        """A CSV without a header should not be split."""
+        source = tmp_path / "report.csv"
+        source.write_text("")
+        assert split_csv_by_server(str(source), str(tmp_path)) == [str(source)]
@@ -0,0 +1,53 @@
+"""Tests for the report role filters."""
+
+import json
+
+from report_filters import report_dedupe_findings, report_unique_findings
+
+
+def spool(tmp_path, name, root, findings):
+    """Write a spooled result file and return its summary."""
+    result = {
+        "server_name": name,
+        "paths_scanned": [root],
+        "total_findings": len(findings),
+        "hardcoded_info": [
+            {"file": f"{root}/{file}", "findings": [{"line": line, "pattern": pattern, "value": value}]}
+            for file, line, pattern, value in findings
+        ],
+    }
+    path = tmp_path / f"{name}.json"
+    path.write_text(json.dumps(result))
+    return {"server_name": name, "total_findings": len(findings), "result_file": str(path)}
+
+
+class TestReportDedupeFindings:
+    """Tests for report_dedupe_findings and report_unique_findings filters."""
+
+    def test_groups_read_from_spooled_files(self, tmp_path):
+        """Identical findings under different scan roots should be merged into one group."""
+        results = [
+            spool(tmp_path, "web01", "/opt/app-1.2", [("conf/db.ini", 3, "password", "password = s3cret")]),
+            spool(tmp_path, "web02", "/srv/app", [("conf/db.ini", 3, "password", "password  =  s3cret")]),
+            spool(tmp_path, "web03", "/srv/app", [("conf/other.ini", 1, "token", "token = abc")]),
+        ]
+        groups = report_dedupe_findings(results)
+        assert [group["relative_file"] for group in groups] == ["conf/db.ini", "conf/other.ini"]
+        assert groups[0]["servers"] == ["web01", "web02"]
+        assert [occurrence["file"] for occurrence in groups[0]["occurrences"]] == [
+            "/opt/app-1.2/conf/db.ini",
+            "/srv/app/conf/db.ini",
+        ]
+
+    def test_unique_count_matches_groups(self, tmp_path):
+        """The count kept in a fact should equal the number of groups the template renders."""
+        results = [
+            spool(tmp_path, "web01", "/srv/app", [("a.conf", 1, "password", "x"), ("b.conf", 2, "token", "y")]),
+            spool(tmp_path, "web02", "/srv/app", [("a.conf", 1, "password", "x")]),
+        ]
+        assert report_unique_findings(results) == len(report_dedupe_findings(results)) == 2
+
+    def test_no_results(self):
+        """No results should give no groups."""
+        assert report_unique_findings([]) == 0
+        assert report_dedupe_findings(None) == []
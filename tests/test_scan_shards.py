@@ -0,0 +1,78 @@
+"""Tests for the scan role shard splitting filter (scan_shards.py)."""
+
+from scan_shards import scan_path_shards
+
+
+def plan(*paths):
+    """Scan cost plan of paths given as (path, seconds, [(subtree, seconds), ...])."""
+    return {
+        "estimated_seconds": sum(seconds for _, seconds, _ in paths),
+        "paths": [
+            {
+                "path": path,
+                "estimated_seconds": seconds,
+                "largest_subtrees": [{"path": sub, "estimated_seconds": cost} for sub, cost in subtrees],
+            }
+            for path, seconds, subtrees in paths
+        ],
+    }
+
+
+class TestScanPathShards:
+    """Tests for scan_path_shards function."""
+
+    def test_one_shard(self):
+        """A single shard should scan every path."""
+        assert scan_path_shards(["/etc", "/opt"]) == [
+            {"index": 0, "paths": ["/etc", "/opt"], "skip_subtrees": [], "estimated_seconds": 2.0}
+        ]
+
+    def test_paths_spread_without_plan(self):
+        """Without a plan every path should count the same."""
+        shards = scan_path_shards(["/etc", "/opt", "/srv", "/home"], 2)
+        assert [shard["paths"] for shard in shards] == [["/etc", "/srv"], ["/opt", "/home"]]
+
+    def test_no_more_shards_than_paths(self):
+        """Unused shards should be dropped."""
+        assert len(scan_path_shards(["/etc"], 4)) == 1
+        assert scan_path_shards([], 4) == []
+
+    def test_paths_balanced_by_cost(self):
+        """The costliest paths should be spread first, to the shard with the least work."""
+        shards = scan_path_shards(
+            ["/etc", "/opt", "/srv", "/home"],
+            2,
+            plan(("/etc", 10, []), ("/opt", 60, []), ("/srv", 40, []), ("/home", 30, [])),
+        )
+        assert [(shard["paths"], shard["estimated_seconds"]) for shard in shards] == [
+            (["/etc", "/opt"], 70.0),
+            (["/srv", "/home"], 70.0),
+        ]
+
+    def test_large_path_split_into_subtrees(self):
+        """Subtrees of a path above its fair share should become shards skipped by the path's shard."""
+        shards = scan_path_shards(
+            ["/etc", "/data"],
+            3,
+            plan(("/etc", 10, []), ("/data", 110, [("/data/archive", 50), ("/data/logs/", 40), ("/data/x", 5)])),
+        )
+        by_path = {path: shard for shard in shards for path in shard["paths"]}
+        assert by_path["/data"]["skip_subtrees"] == ["/data/archive", "/data/logs"]
+        assert by_path["/data/archive"] is not by_path["/data"]
+        assert by_path["/data/logs/"] is not by_path["/data"]
+        assert "/data/x" not in by_path
+        assert sum(shard["estimated_seconds"] for shard in shards) == 120.0
+        assert sorted(path for shard in shards for path in shard["paths"]) == [
+            "/data",
+            "/data/archive",
+            "/data/logs/",
+            "/etc",
+        ]
+
+    def test_no_subtree_split_without_recursion(self):
+        """A non-recursive scan should not split paths into subtrees."""
+        shards = scan_path_shards(
+            ["/etc", "/data"], 3, plan(("/etc", 10, []), ("/data", 110, [("/data/a", 80)])), False
+        )
+        assert sorted(path for shard in shards for path in shard["paths"]) == ["/data", "/etc"]
+        assert all(shard["skip_subtrees"] == [] for shard in shards)
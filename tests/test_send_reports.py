@@ -0,0 +1,144 @@
+"""Tests for the pooled SMTP delivery against a local aiosmtpd server."""
+
+import argparse
+import smtplib
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from send_reports import is_transient, send_all
+
+
+class RecordingHandler:
+    """aiosmtpd handler recording sessions and messages, replying with queued codes first."""
+
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.sessions = set()
+        self.messages = []
+        self.data_commands = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.data_commands += 1
+        self.sessions.add(id(session))
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope.content)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    """Start a local SMTP server with a given handler, yield its port."""
+    controllers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+        controller.start()
+        controllers.append(controller)
+        return controller.port
+
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+
+def make_args(port, **overrides):
+    options = {
+        "host": "127.0.0.1",
+        "port": port,
+        "username": "",
+        "security": "none",
+        "workers": 1,
+        "max_per_connection": 50,
+        "retries": 2,
+        "retry_delay": 0,
+        "timeout": 5,
+        "cleanup": False,
+    }
+    options.update(overrides)
+    return argparse.Namespace(**options)
+
+
+def make_messages(count):
+    return [
+        {
+            "team_name": f"Team {i}",
+            "from": "scanner@example.com",
+            "to": [f"team{i}@example.com"],
+            "subject": f"Report {i}",
+            "text_body": f"Report body {i}",
+        }
+        for i in range(count)
+    ]
+
+
+class TestIsTransient:
+    """Tests for is_transient function."""
+
+    @pytest.mark.parametrize(
+        "error,expected",
+        [
+            (smtplib.SMTPServerDisconnected("gone"), True),
+            (smtplib.SMTPResponseException(421, b"Service not available"), True),
+            (smtplib.SMTPDataError(451, b"Try again later"), True),
+            (smtplib.SMTPDataError(554, b"Rejected"), False),
+            (smtplib.SMTPSenderRefused(550, b"No", "scanner@example.com"), False),
+            (ConnectionRefusedError(), True),
+        ],
+    )
+    def test_classification(self, error, expected):
+        """4xx replies and connection errors should be retried, 5xx replies not."""
+        assert is_transient(error) is expected
+
+
+class TestSendAll:
+    """Tests for send_all function against a local SMTP server."""
+
+    def test_one_session_delivers_all_messages(self, smtp_server):
+        """One worker should deliver every message over a single SMTP session."""
+        handler = RecordingHandler()
+        report = send_all(make_messages(5), make_args(smtp_server(handler)), None)
+        assert report["sent"] == 5
+        assert report["failed"] == 0
+        assert report["connections"] == 1
+        assert len(handler.sessions) == 1
+        assert len(handler.messages) == 5
+        assert all(b"Message-ID:" in message and b"Date:" in message for message in handler.messages)
+
+    def test_temporary_error_retried(self, smtp_server):
+        """A 4xx reply should be retried on a new session and delivered."""
+        handler = RecordingHandler(["451 Try again later"])
+        report = send_all(make_messages(1), make_args(smtp_server(handler)), None)
+        [result] = report["results"]
+        assert result["sent"] is True
+        assert result["attempts"] == 2
+        assert len(handler.messages) == 1
+        assert report["connections"] == 2
+
+    def test_permanent_error_not_retried(self, smtp_server):
+        """A 5xx reply should fail the message after one attempt."""
+        handler = RecordingHandler(["554 Message rejected"])
+        report = send_all(make_messages(1), make_args(smtp_server(handler)), None)
+        [result] = report["results"]
+        assert result["sent"] is False
+        assert result["attempts"] == 1
+        assert "554" in result["error"]
+        assert handler.data_commands == 1
+        assert handler.messages == []
+
+    def test_temporary_errors_give_up_after_retries(self, smtp_server):
+        """A message failing with 4xx replies should be tried retries + 1 times."""
+        handler = RecordingHandler(["451 Try again later"] * 5)
+        report = send_all(make_messages(1), make_args(smtp_server(handler), retries=2), None)
+        [result] = report["results"]
+        assert result["sent"] is False
+        assert result["attempts"] == 3
+        assert handler.data_commands == 3
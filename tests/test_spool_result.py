@@ -0,0 +1,120 @@
+"""Tests for the controller-side result spooling (spool_result.py)."""
+
+from spool_result import merge_coverage, merge_raw
+
+
+def shard_raw(files, findings, severity_counts, **extra):
+    """creds_scan.py output of one shard."""
+    return {
+        "scan_timestamp": extra.pop("scan_timestamp", "2026-10-19T10:00:00"),
+        "scan_config": {"recursive_scan": True},
+        "patterns_checked": ["password_assignment", "api_key"],
+        "scanned_files": files,
+        "scanned_files_count": len(files),
+        "patterns_found": sorted({f["pattern"] for f in findings}),
+        "path_filesystems": {path: {"fstype": "ext4"} for path in extra.pop("paths", [])},
+        "total_findings": len(findings),
+        "suppressed_findings": extra.pop("suppressed", 0),
+        "resumed_directories": extra.pop("resumed", 0),
+        "findings_by_severity": severity_counts,
+        "hardcoded_info": [{"file": f["file"], "findings": [f]} for f in findings],
+        **extra,
+    }
+
+
+class TestMergeRaw:
+    """Tests for merge_raw function."""
+
+    def test_single_shard_unchanged(self):
+        """A single result should be returned as is."""
+        raw = shard_raw(["/etc/a.conf"], [], {})
+        assert merge_raw([raw]) is raw
+
+    def test_shards_merged(self):
+        """Counts should be summed and lists concatenated across shards."""
+        first = shard_raw(
+            ["/etc/a.conf", "/etc/b.conf"],
+            [{"file": "/etc/a.conf", "pattern": "password_assignment"}],
+            {"HIGH": 1},
+            paths=["/etc"],
+            suppressed=2,
+            resumed=1,
+            scan_timestamp="2026-10-19T10:00:05",
+        )
+        second = shard_raw(
+            ["/opt/c.env"],
+            [
+                {"file": "/opt/c.env", "pattern": "api_key"},
+                {"file": "/opt/c.env", "pattern": "password_assignment"},
+            ],
+            {"HIGH": 2},
+            paths=["/opt"],
+            suppressed=1,
+        )
+        merged = merge_raw([first, second])
+        assert merged["scan_timestamp"] == "2026-10-19T10:00:00"
+        assert merged["scanned_files"] == ["/etc/a.conf", "/etc/b.conf", "/opt/c.env"]
+        assert merged["scanned_files_count"] == 3
+        assert merged["total_findings"] == 3
+        assert merged["suppressed_findings"] == 3
+        assert merged["resumed_directories"] == 1
+        assert merged["findings_by_severity"] == {"HIGH": 3}
+        assert merged["patterns_found"] == ["password_assignment", "api_key"]
+        assert sorted(merged["path_filesystems"]) == ["/etc", "/opt"]
+        assert [info["file"] for info in merged["hardcoded_info"]] == ["/etc/a.conf", "/opt/c.env", "/opt/c.env"]
+        assert merged["patterns_checked"] == ["password_assignment", "api_key"]
+        assert "coverage" not in merged
+
+    def test_shard_coverage_merged(self):
+        """The coverage of deadline-limited shards should be combined."""
+        first = shard_raw(
+            [],
+            [],
+            {},
+            coverage={
+                "deadline_at": "2026-10-19T12:00:00",
+                "deadline_reached": True,
+                "enumeration_complete": True,
+                "candidate_files": 10,
+                "scanned_files": 5,
+                "candidate_bytes": 1000,
+                "scanned_bytes": 400,
+                "unscanned_paths": ["/opt/b"],
+                "unscanned_paths_count": 1,
+            },
+        )
+        second = shard_raw(
+            [],
+            [],
+            {},
+            coverage={
+                "deadline_at": "2026-10-19T12:00:00",
+                "deadline_reached": False,
+                "enumeration_complete": True,
+                "candidate_files": 10,
+                "scanned_files": 10,
+                "candidate_bytes": 1000,
+                "scanned_bytes": 1000,
+                "unscanned_paths": [],
+                "unscanned_paths_count": 0,
+            },
+        )
+        coverage = merge_raw([first, second])["coverage"]
+        assert coverage["deadline_reached"] is True
+        assert coverage["percent_files"] == 75.0
+        assert coverage["percent_bytes"] == 70.0
+        assert coverage["unscanned_paths"] == ["/opt/b"]
+
+
+class TestMergeCoverage:
+    """Tests for merge_coverage function."""
+
+    def test_no_coverage(self):
+        """Shards scanned without a deadline should give no coverage."""
+        assert merge_coverage([]) == {}
+
+    def test_nothing_enumerated(self):
+        """Shards stopped before listing any file should report 0% coverage."""
+        coverage = merge_coverage([{"deadline_reached": True, "enumeration_complete": False}])
+        assert coverage["percent_files"] == 0.0
+        assert coverage["percent_bytes"] == 0.0
@@ -1,6 +1,11 @@
+import os
+
 from flask import Flask
 from flask_restx import Api
 
+from app.capture import CaptureWriter
+from app.request_log import sample_rate
+
 api = Api(
     title="Pod Mutating Webhook API",
     version="1.0",
@@ -10,6 +15,14 @@ api = Api(
 
 def create_app():
     app = Flask(__name__)
+    # /mutate fast path: fast_json parse projected to the fields in use, fast_json responses instead of model marshalling
+    app.config["WEBHOOK_FAST_PATH"] = os.environ.get("WEBHOOK_FAST_PATH", "true").lower() not in ("0", "false", "no")
+    # Largest AdmissionReview body accepted; larger requests get 413
+    app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("WEBHOOK_MAX_BODY_BYTES", str(3 * 1024 * 1024)))
+    # Share of /mutate requests whose payload is dumped to the log (see app/request_log.py)
+    app.config["WEBHOOK_LOG_SAMPLE_RATE"] = sample_rate(os.environ.get("WEBHOOK_LOG_SAMPLE_RATE", "0"))
+    # Opt-in capture of sampled requests for replay, with WEBHOOK_CAPTURE_DIR (see app/capture.py)
+    app.config["WEBHOOK_CAPTURE"] = CaptureWriter.from_environ()
     
     # Initialize Flask-RESTX
     api.init_app(app)
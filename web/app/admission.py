@@ -0,0 +1,113 @@
+"""
+Minimal-field projection of AdmissionReview requests.
+
+should_mutate and the patch builder only need a few fields of an
+AdmissionReview, but the request also carries oldObject, managedFields and
+full container specs. extract_admission_review() returns a minimal view:
+
+    {
+        "apiVersion": ..., "kind": ...,
+        "request": {
+            "uid": ..., "kind": {"kind": ...}, "operation": ..., "namespace": ...,
+            "object": {
+                "metadata": {"name": ..., "labels": {...}, "annotations": {...}},
+                "spec": {
+                    "containers": [{"env": True, "volumeMounts": True}, ...],
+                    "initContainers": True, "volumes": True
+                }
+            }
+        }
+    }
+
+Keys are only present if they are in the request. Under spec the values are
+presence flags: the patch only depends on which fields exist (see
+mutation_logic.patch_shape). Labels and annotations keep their scalar
+values.
+
+This is a projection after a full parse, not a selective parse: the whole
+body is parsed with fast_json (orjson, in C), so parse time and peak memory
+still grow with oldObject and managedFields. What the projection saves is
+what comes after it; the full document is dropped as soon as the view is
+built, so nothing downstream (logging, should_mutate, the patch cache) holds
+on to oldObject or container specs. The size of the body is capped by the
+app's MAX_CONTENT_LENGTH (WEBHOOK_MAX_BODY_BYTES).
+"""
+
+from app import fast_json
+
+REQUEST_FIELDS = ("uid", "operation", "namespace")
+METADATA_MAPS = ("labels", "annotations")
+CONTAINER_FIELDS = ("env", "volumeMounts")
+SPEC_FIELDS = ("initContainers", "volumes")
+
+
+def _is_scalar(value):
+    return not isinstance(value, (dict, list))
+
+
+def _scalars(mapping):
+    return {key: value for key, value in mapping.items() if _is_scalar(value)}
+
+
+def project_admission_review(body):
+    """
+    Return the minimal view of a parsed AdmissionReview.
+
+    Args:
+        body: Parsed AdmissionReview (any JSON value)
+
+    Returns:
+        dict: Minimal view, or body itself if it is not a JSON object
+    """
+    if not isinstance(body, dict):
+        return body
+    view = {key: body[key] for key in ("apiVersion", "kind") if key in body and _is_scalar(body[key])}
+
+    req = body.get("request")
+    if not isinstance(req, dict):
+        return view
+    view["request"] = request = {key: req[key] for key in REQUEST_FIELDS if key in req and _is_scalar(req[key])}
+    kind = req.get("kind")
+    if isinstance(kind, dict) and "kind" in kind and _is_scalar(kind["kind"]):
+        request["kind"] = {"kind": kind["kind"]}
+
+    obj = req.get("object")
+    if not isinstance(obj, dict):
+        return view
+    request["object"] = pod = {}
+
+    meta = obj.get("metadata")
+    if isinstance(meta, dict):
+        pod["metadata"] = metadata = {}
+        if "name" in meta and _is_scalar(meta["name"]):
+            metadata["name"] = meta["name"]
+        for field in METADATA_MAPS:
+            if isinstance(meta.get(field), dict):
+                metadata[field] = _scalars(meta[field])
+
+    spec = obj.get("spec")
+    if isinstance(spec, dict):
+        pod["spec"] = pod_spec = {field: True for field in SPEC_FIELDS if field in spec}
+        if isinstance(spec.get("containers"), list):
+            # One entry per container: patch paths use the container index
+            pod_spec["containers"] = [
+                {field: True for field in CONTAINER_FIELDS if isinstance(container, dict) and field in container}
+                for container in spec["containers"]
+            ]
+    return view
+
+
+def extract_admission_review(data):
+    """
+    Parse a whole AdmissionReview body and project it to its minimal view.
+
+    Args:
+        data: Request body (bytes)
+
+    Returns:
+        dict: Minimal view (see the module docstring)
+
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    return project_admission_review(fast_json.loads(data))
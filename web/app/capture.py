@@ -0,0 +1,200 @@
+"""
+Opt-in capture of AdmissionReview requests for replay.
+
+With WEBHOOK_CAPTURE_DIR set, a sample of the /mutate requests is written
+to rotating JSON-lines files in that directory, one record per request:
+
+    {"time": ..., "uid": ..., "status": 200, "duration_ms": ...,
+     "request": {redacted AdmissionReview}, "response": {AdmissionReview response}}
+
+Settings (environment variables):
+    WEBHOOK_CAPTURE_DIR          Directory of the capture files (unset: off)
+    WEBHOOK_CAPTURE_SAMPLE_RATE  Share of requests captured, 0 to 1 (0.1)
+    WEBHOOK_CAPTURE_MAX_BYTES    Size of a file before it is rotated (10 MiB)
+    WEBHOOK_CAPTURE_BACKUPS      Rotated files kept per worker (5)
+
+Each worker process writes its own file (capture-<pid>.jsonl), so gunicorn
+workers never rotate each other's files.
+
+Requests are redacted before they are written: env values, commands and
+args of all containers, annotation values (other than the mutation
+annotations) and the user info are replaced. The fields the mutation
+depends on (labels, annotations keys, which fields exist) are kept, so a
+replay of the capture (python -m app.replay) produces the same patches.
+"""
+
+import glob
+import logging
+import os
+import random
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from app import fast_json
+from app.request_log import sample_rate
+from app.validators import MUTATE_ANNOTATIONS
+
+REDACTED = "<redacted>"
+POD_OBJECTS = ("object", "oldObject")
+CONTAINER_LISTS = ("containers", "initContainers", "ephemeralContainers")
+
+
+def _redact_container(container):
+    if not isinstance(container, dict):
+        return container
+    container = dict(container)
+    if isinstance(container.get("env"), list):
+        container["env"] = [
+            {**var, "value": REDACTED} if isinstance(var, dict) and "value" in var else var for var in container["env"]
+        ]
+    for field in ("command", "args"):
+        if field in container:
+            container[field] = [REDACTED]
+    return container
+
+
+def _redact_pod(pod):
+    if not isinstance(pod, dict):
+        return pod
+    pod = dict(pod)
+    metadata = pod.get("metadata")
+    if isinstance(metadata, dict) and isinstance(metadata.get("annotations"), dict):
+        annotations = {
+            key: value if key in MUTATE_ANNOTATIONS else REDACTED for key, value in metadata["annotations"].items()
+        }
+        pod["metadata"] = {**metadata, "annotations": annotations}
+    spec = pod.get("spec")
+    if isinstance(spec, dict):
+        spec = dict(spec)
+        for field in CONTAINER_LISTS:
+            if isinstance(spec.get(field), list):
+                spec[field] = [_redact_container(container) for container in spec[field]]
+        pod["spec"] = spec
+    return pod
+
+
+def redact(review):
+    """
+    Return a copy of an AdmissionReview without secrets.
+
+    Args:
+        review: Parsed AdmissionReview request
+
+    Returns:
+        dict: Redacted copy (the input is not modified)
+    """
+    if not isinstance(review, dict) or not isinstance(review.get("request"), dict):
+        return review
+    request = dict(review["request"])
+    if "userInfo" in request:
+        request["userInfo"] = {"username": REDACTED}
+    for field in POD_OBJECTS:
+        if field in request:
+            request[field] = _redact_pod(request[field])
+    return {**review, "request": request}
+
+
+class CaptureWriter:
+    """Writes sampled /mutate requests to rotating per-process files."""
+
+    def __init__(self, directory, rate, max_bytes, backups):
+        self.directory = directory
+        self.rate = rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environ(cls, environ=None):
+        """Return a CaptureWriter if WEBHOOK_CAPTURE_DIR is set, None otherwise."""
+        environ = os.environ if environ is None else environ
+        directory = environ.get("WEBHOOK_CAPTURE_DIR", "")
+        if not directory:
+            return None
+        return cls(
+            directory,
+            sample_rate(environ.get("WEBHOOK_CAPTURE_SAMPLE_RATE", "0.1"), "WEBHOOK_CAPTURE_SAMPLE_RATE"),
+            int(environ.get("WEBHOOK_CAPTURE_MAX_BYTES", str(10 * 1024 * 1024))),
+            int(environ.get("WEBHOOK_CAPTURE_BACKUPS", "5")),
+        )
+
+    def sampled(self):
+        return self.rate > 0 and random.random() < self.rate
+
+    def handler(self):
+        # Opened on first use in each process: the app is created before gunicorn forks.
+        # The lock keeps the threads of a gthread worker from opening the file twice.
+        pid = os.getpid()
+        with self._lock:
+            if self._pid != pid:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"capture-{pid}.jsonl")
+                self._handler = RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backups)
+                self._pid = pid
+            return self._handler
+
+    def write(self, body, review, status, duration):
+        """
+        Write one captured request.
+
+        Args:
+            body: Raw request body (bytes)
+            review: AdmissionReview response, None if the request was rejected
+            status: HTTP status of the response
+            duration: Time spent on the request in seconds
+        """
+        try:
+            request = redact(fast_json.loads(body))
+        except ValueError:
+            request = None
+        record = {
+            "time": time.time(),
+            "uid": ((review or {}).get("response") or {}).get("uid"),
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "request": request,
+            "response": review,
+        }
+        self.handler().handle(logging.makeLogRecord({"msg": fast_json.dumps(record).decode("utf-8")}))
+
+
+def capture_files(paths):
+    """
+    Expand capture paths (files or directories) into files, oldest rotation first.
+
+    capture-1.jsonl.2 was rotated before capture-1.jsonl.1, which was rotated
+    before capture-1.jsonl.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, "*.jsonl*")))
+        else:
+            files.append(path)
+
+    def rotation(path):
+        base, _, suffix = path.partition(".jsonl")
+        return base, -int(suffix[1:]) if suffix[1:].isdigit() else 0
+
+    return sorted(files, key=rotation)
+
+
+def read_capture(paths):
+    """
+    Read the records of capture files, in the order they were captured.
+
+    Args:
+        paths: Capture files or directories
+
+    Returns:
+        list: Capture records (dicts), sorted by time
+    """
+    records = []
+    for path in capture_files(paths):
+        with open(path, "rb") as f:
+            records.extend(fast_json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record.get("time", 0))
+    return records
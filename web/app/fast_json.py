@@ -0,0 +1,47 @@
+"""
+JSON parsing and serialization for the /mutate hot path.
+
+Uses orjson when it is installed (several times faster than the json module
+on AdmissionReview bodies) and the standard library otherwise. Both return
+the same Python objects and compact JSON.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+JSON_LIBRARY = "orjson" if orjson is not None else "json"
+
+
+def loads(data):
+    """
+    Parse a JSON document.
+
+    Args:
+        data: JSON as bytes or str
+
+    Raises:
+        ValueError: If data is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, default=None):
+    """
+    Serialize obj to compact JSON.
+
+    Args:
+        obj: Object to serialize
+        default: Called for objects that are not JSON serializable
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, separators=(",", ":"), default=default).encode()
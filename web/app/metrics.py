@@ -0,0 +1,424 @@
+"""
+Request metrics of the webhook in the Prometheus text format.
+
+GET /metrics returns the metrics of the whole server. With several gunicorn
+workers (see app/serving.py) every worker counts its own requests, so the
+workers share their values through a directory (WEBHOOK_METRICS_DIR, on
+tmpfs by default): each worker writes a snapshot of its metrics there every
+FLUSH_INTERVAL seconds and when it exits, and the worker serving a scrape
+writes its own snapshot, then sums the snapshots of all workers. Every
+scrape therefore returns the complete counters of the server, whichever
+worker serves it, without a worker label:
+
+    rate(webhook_requests_total[5m])
+
+Counters and histograms of a worker that exited (max_requests, crash) are
+folded into an archive snapshot so the totals never go down and the
+directory does not grow with restarts; gauges only sum the live workers.
+Values of a worker that was killed without exiting cleanly may miss its
+last FLUSH_INTERVAL seconds. Without a shared directory (development
+server, tests) /metrics returns the metrics of its own process. Nothing is
+pushed anywhere: the endpoint is scraped locally (curl, a Prometheus
+server, `oc port-forward`).
+
+Metrics:
+    webhook_requests_total{outcome}        mutated, skipped, invalid, error
+    webhook_request_duration_seconds       whole /mutate request
+    webhook_phase_duration_seconds{phase}  parse, should_mutate, patch, serialize
+    webhook_patch_ops                      ops per generated patch
+    webhook_request_body_bytes             AdmissionReview body size
+    webhook_requests_in_flight             /mutate requests being served
+    webhook_patch_cache{stat}              patch cache hits, misses and size
+
+The metric classes only cover what the webhook needs (labelled counters,
+gauges and histograms); they are thread-safe for the gthread workers.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+
+from app.mutation_logic import patch_cache_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+OUTCOMES = ("mutated", "skipped", "invalid", "error")
+PHASES = ("parse", "should_mutate", "patch", "serialize")
+
+# Seconds; admission requests normally take well under a millisecond
+DURATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PATCH_OPS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+BODY_BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Seconds between the snapshots a worker writes to the shared directory
+FLUSH_INTERVAL = 1.0
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class: a named metric with one series per label value tuple."""
+
+    kind = "untyped"
+    # Only live workers count when the snapshots of several workers are summed
+    live_only = False
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def snapshot(self):
+        """Return a copy of the series (label value tuple -> value)."""
+        with self._lock:
+            return {label_values: self._copy(value) for label_values, value in self._series.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def merge(value, other):
+        """Return the sum of two values of a series."""
+        return value + other
+
+    def render(self, series=None):
+        """Return the metric in the text format, from series (see snapshot()) or the values of this process."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        series = self.snapshot() if series is None else series
+        lines.extend(self._render_series(label_values, value) for label_values, value in sorted(series.items()))
+        return "\n".join(lines)
+
+    def _render_series(self, label_values, value):
+        return f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Counter(Metric):
+    """Monotonic counter."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=(), initial=()):
+        super().__init__(name, documentation, labels)
+        # Label values exported as 0 before the first increment
+        for label_values in initial:
+            self._series[tuple(label_values)] = 0
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._series.get(label_values, 0)
+
+
+class Gauge(Metric):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+    live_only = True
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        if not self.labels:
+            self._series[()] = 0
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._series[label_values] = value
+
+    def value(self, *label_values):
+        return self._series.get(label_values, 0)
+
+
+class _Timer:
+    """Context manager observing the time spent in its block."""
+
+    __slots__ = ("histogram", "label_values", "started")
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, labels=(), initial=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        for label_values in initial or ([()] if not self.labels else []):
+            self._series[tuple(label_values)] = self._empty()
+
+    def _empty(self):
+        # Per-bucket counts (not cumulative), sum, count
+        return [[0] * (len(self.buckets) + 1), 0, 0]
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2]]
+
+    @staticmethod
+    def merge(value, other):
+        return [[a + b for a, b in zip(value[0], other[0])], value[1] + other[1], value[2] + other[2]]
+
+    def observe(self, value, *label_values):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = self._empty()
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values):
+        """Return a context manager observing the duration of its block."""
+        return _Timer(self, label_values)
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def _render_series(self, label_values, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            bucket_labels = _format_labels(self.labels, label_values, [("le", le)])
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        labels = _format_labels(self.labels, label_values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return "\n".join(lines)
+
+
+REQUESTS = Counter(
+    "webhook_requests_total", "AdmissionReview requests by outcome", ["outcome"], [(o,) for o in OUTCOMES]
+)
+REQUEST_SECONDS = Histogram("webhook_request_duration_seconds", "Time spent on /mutate requests", DURATION_BUCKETS)
+PHASE_SECONDS = Histogram(
+    "webhook_phase_duration_seconds",
+    "Time spent per phase of /mutate requests",
+    DURATION_BUCKETS,
+    ["phase"],
+    [(p,) for p in PHASES],
+)
+PATCH_OPS = Histogram("webhook_patch_ops", "JSON Patch operations per mutated pod", PATCH_OPS_BUCKETS)
+BODY_BYTES = Histogram("webhook_request_body_bytes", "Size of AdmissionReview request bodies", BODY_BYTES_BUCKETS)
+IN_FLIGHT = Gauge("webhook_requests_in_flight", "/mutate requests being served")
+PATCH_CACHE = Gauge("webhook_patch_cache", "Patch cache hits, misses and size, summed over the workers", ["stat"])
+
+METRICS = (REQUESTS, REQUEST_SECONDS, PHASE_SECONDS, PATCH_OPS, BODY_BYTES, IN_FLIGHT, PATCH_CACHE)
+
+
+def _update_patch_cache():
+    stats = patch_cache_stats()
+    for stat in ("hits", "misses", "size"):
+        PATCH_CACHE.set(stats[stat], stat)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedStore:
+    """
+    Metric snapshots of the workers of one server in a shared directory.
+
+    Each worker writes worker-<pid>.json (atomically, by rename); the
+    snapshots of exited workers are folded into archive.json. Snapshots map
+    metric names to [label values, value] pairs.
+    """
+
+    ARCHIVE = "archive.json"
+
+    def __init__(self, directory, metrics=METRICS, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.metrics = {metric.name: metric for metric in metrics}
+        self.flush_interval = flush_interval
+        self._pid = None
+        self._attach_lock = threading.Lock()
+
+    def reset(self):
+        """Create the directory and remove the snapshots of a previous server (call before forking workers)."""
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") or name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+
+    def attach(self):
+        """Start flushing the snapshots of this process, once per process."""
+        if self._pid == os.getpid():
+            return
+        with self._attach_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while _store is self:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"worker-{pid}.json")
+
+    def _write(self, path, snapshot):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _read(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        return {name: {tuple(labels): value for labels, value in series} for name, series in data.items()}
+
+    def flush(self):
+        """Write the snapshot of this process."""
+        _update_patch_cache()
+        snapshot = {
+            name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+            for name, metric in self.metrics.items()
+        }
+        self._write(self._path(os.getpid()), snapshot)
+
+    def _add(self, total, snapshot, live):
+        for name, series in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None or (metric.live_only and not live):
+                continue
+            merged = total.setdefault(name, {})
+            for labels, value in series.items():
+                merged[labels] = metric.merge(merged[labels], value) if labels in merged else value
+
+    def collect(self):
+        """Return the series of every metric (name -> series) summed over the workers."""
+        self.flush()
+        total = {name: {} for name in self.metrics}
+        # One collector at a time, so a snapshot is never counted twice or
+        # missed while it is folded into the archive
+        with open(os.path.join(self.directory, ".lock"), "w", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(self.directory, self.ARCHIVE)
+            archive = self._read(archive_path)
+            folded = False
+            for name in sorted(os.listdir(self.directory)):
+                if not (name.startswith("worker-") and name.endswith(".json")):
+                    continue
+                path = os.path.join(self.directory, name)
+                snapshot = self._read(path)
+                if _pid_alive(int(name[len("worker-") : -len(".json")])):
+                    self._add(total, snapshot, live=True)
+                    continue
+                self._add(archive, snapshot, live=False)
+                os.remove(path)
+                folded = True
+            if folded:
+                self._write(archive_path, {name: [[list(k), v] for k, v in s.items()] for name, s in archive.items()})
+            self._add(total, archive, live=False)
+        return total
+
+
+# Set by use_shared_store() in the production server
+_store = None
+
+
+def use_shared_store(directory):
+    """
+    Share the metrics of all worker processes through directory.
+
+    Called by the production server before it forks its workers; removes
+    the snapshots left by a previous server.
+
+    Returns:
+        SharedStore: The store of this server
+    """
+    global _store  # pylint: disable=global-statement
+    store = SharedStore(directory)
+    store.reset()
+    _store = store
+    return store
+
+
+def flush_metrics():
+    """Write the snapshot of this worker to the shared store, if there is one (worker exit)."""
+    if _store is not None:
+        _store.flush()
+
+
+def observe_request(entry, duration):
+    """
+    Record a finished /mutate request.
+
+    Args:
+        entry: Summary fields of the request (see app/request_log.py)
+        duration: Time spent on the request in seconds
+    """
+    if _store is not None:
+        _store.attach()
+    REQUESTS.inc(entry.get("outcome", "error"))
+    REQUEST_SECONDS.observe(duration)
+    if entry.get("body_bytes") is not None:
+        BODY_BYTES.observe(entry["body_bytes"])
+    if entry.get("patch_ops"):
+        PATCH_OPS.observe(entry["patch_ops"])
+
+
+def render_metrics():
+    """Return all metrics in the Prometheus text format, summed over the workers with a shared store."""
+    if _store is None:
+        _update_patch_cache()
+        return "\n".join(metric.render() for metric in METRICS) + "\n"
+    _store.attach()
+    collected = _store.collect()
+    return "\n".join(metric.render(collected[metric.name]) for metric in METRICS) + "\n"
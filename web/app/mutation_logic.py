@@ -1,28 +1,82 @@
+import base64
+import json
+import os
+from functools import lru_cache
+
+# Number of distinct pod shapes whose encoded patch is kept (PATCH_CACHE_SIZE)
+PATCH_CACHE_SIZE = int(os.environ.get("PATCH_CACHE_SIZE", "256"))
+# Patch served by the webhook (PATCH_BUILDER): "compact" (build_compact_patch) or "legacy" (build_patch)
+PATCH_BUILDER = os.environ.get("PATCH_BUILDER", "compact")
+
+
+def patch_shape(pod):
+    """
+    Return the parts of a pod the patch depends on.
+
+    Pods of the same Deployment have the same shape and get the same patch:
+    per container whether env and volumeMounts exist, whether initContainers
+    and volumes exist, and the version and labid labels.
+    """
+    spec = pod.get("spec", {})
+    labels = pod.get("metadata", {}).get("labels", {})
+    return (
+        tuple(("env" in container, "volumeMounts" in container) for container in spec.get("containers", [])),
+        "initContainers" in spec,
+        "volumes" in spec,
+        labels.get("version", ""),
+        labels.get("labid", ""),
+    )
+
+
 def make_patch_for_pod(pod):
+    return build_patch(patch_shape(pod))
+
+
+def make_compact_patch_for_pod(pod):
+    return build_compact_patch(patch_shape(pod))
+
+
+@lru_cache(maxsize=PATCH_CACHE_SIZE)
+def _encoded_patch(shape):
+    patch = PATCH_BUILDERS[PATCH_BUILDER](shape)
+    return base64.b64encode(json.dumps(patch).encode()).decode(), patch
+
+
+def encoded_patch_for_pod(pod):
+    """
+    Return the base64-encoded JSON Patch of a pod and the patch ops.
+
+    The patch is built by PATCH_BUILDER and cached by patch_shape (LRU),
+    so pods of the same Deployment are serialized once.
+    The returned ops are shared between requests and must not be modified.
+    """
+    return _encoded_patch(patch_shape(pod))
+
+
+def patch_cache_stats():
+    """Return the hit/miss counters and size of the patch cache."""
+    info = _encoded_patch.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
+
+
+def clear_patch_cache():
+    """Empty the patch cache and reset its counters."""
+    _encoded_patch.cache_clear()
+
+
+def build_patch(shape):
+    """Build the JSON Patch for a pod shape (see patch_shape)."""
     patches = []
-    spec = pod.get("spec", {})
-    
-    # Extract labels from Pod metadata
-    metadata = pod.get("metadata", {})
-    labels = metadata.get("labels", {})
-    version = labels.get("version", "")
-    labid = labels.get("labid", "")
+    container_shapes, has_init_containers, has_volumes, version, labid = shape
 
-    env_additions = [
-        {"name": "HELP", "value": "YES"},
-        {"name": "MUTATE", "value": "true"},
-        {"name": "ACCEPTED", "value": "yes"},
-        {"name": "VERSION", "value": version},
-        {"name": "LABID", "value": labid},
-    ]
+    env_additions = _env_additions(version, labid)
 
-    containers = spec.get("containers", [])
-    for idx, container in enumerate(containers):
+    for idx, (has_env, has_volume_mounts) in enumerate(container_shapes):
         env_path = f"/spec/containers/{idx}/env"
         vol_mount_path = f"/spec/containers/{idx}/volumeMounts"
 
         # --- Ensure 'env' exists ---
-        if "env" not in container:
+        if not has_env:
             patches.append({
                 "op": "add",
                 "path": env_path,
@@ -30,7 +84,7 @@ def make_patch_for_pod(pod):
             })
 
         # --- Ensure 'volumeMounts' exists ---
-        if "volumeMounts" not in container:
+        if not has_volume_mounts:
             patches.append({
                 "op": "add",
                 "path": vol_mount_path,
@@ -53,6 +107,24 @@ def make_patch_for_pod(pod):
             "value": volume_mount
         })
 
+    patches.extend(_pod_patches(has_init_containers, has_volumes, version))
+    return patches
+
+
+def _env_additions(version, labid):
+    return [
+        {"name": "HELP", "value": "YES"},
+        {"name": "MUTATE", "value": "true"},
+        {"name": "ACCEPTED", "value": "yes"},
+        {"name": "VERSION", "value": version},
+        {"name": "LABID", "value": labid},
+    ]
+
+
+def _pod_patches(has_init_containers, has_volumes, version):
+    """Init container and shared volume ops (one op each)."""
+    patches = []
+
     # --- Handle initContainers ---
     # Build download URL using version from labels
     download_url = (
@@ -71,7 +143,7 @@ def make_patch_for_pod(pod):
     }
 
     # If initContainers doesn't exist, create it
-    if "initContainers" not in spec:
+    if not has_init_containers:
         patches.append({
             "op": "add",
             "path": "/spec/initContainers",
@@ -85,7 +157,7 @@ def make_patch_for_pod(pod):
         })
 
     # --- Handle volumes ---
-    if "volumes" not in spec:
+    if not has_volumes:
         patches.append({
             "op": "add",
             "path": "/spec/volumes",
@@ -99,3 +171,40 @@ def make_patch_for_pod(pod):
         })
 
     return patches
+
+
+def build_compact_patch(shape):
+    """
+    Build the JSON Patch for a pod shape with as few ops as possible.
+
+    The patched pod is the same as with build_patch, but a missing env,
+    volumeMounts, initContainers or volumes array is added in one op with
+    all its entries instead of an empty array followed by one append per
+    entry. Existing arrays still get one append per entry: JSON Patch has
+    no op appending several values.
+    """
+    patches = []
+    container_shapes, has_init_containers, has_volumes, version, labid = shape
+    env_additions = _env_additions(version, labid)
+    volume_mount = {"mountPath": "/tmp", "name": "tmp-shared"}
+
+    for idx, (has_env, has_volume_mounts) in enumerate(container_shapes):
+        env_path = f"/spec/containers/{idx}/env"
+        if has_env:
+            patches.extend({"op": "add", "path": env_path + "/-", "value": env} for env in env_additions)
+        else:
+            patches.append({"op": "add", "path": env_path, "value": env_additions})
+
+        vol_mount_path = f"/spec/containers/{idx}/volumeMounts"
+        if has_volume_mounts:
+            patches.append({"op": "add", "path": vol_mount_path + "/-", "value": volume_mount})
+        else:
+            patches.append({"op": "add", "path": vol_mount_path, "value": [volume_mount]})
+
+    patches.extend(_pod_patches(has_init_containers, has_volumes, version))
+    return patches
+
+
+PATCH_BUILDERS = {"compact": build_compact_patch, "legacy": build_patch}
+if PATCH_BUILDER not in PATCH_BUILDERS:
+    raise ValueError(f"PATCH_BUILDER must be one of {', '.join(PATCH_BUILDERS)}, got {PATCH_BUILDER!r}")
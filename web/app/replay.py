@@ -0,0 +1,158 @@
+"""
+Replay of captured AdmissionReview requests.
+
+Sends the requests of a capture (see app/capture.py) to create_app() of the
+current checkout and compares the responses and timings with the recorded
+ones, or with the results of an earlier replay:
+
+    # Replay at the recorded rate and compare with the captured responses
+    python -m app.replay /var/capture
+
+    # 10x faster, save the results of this version
+    python -m app.replay /var/capture --speed 10 --output before.jsonl
+
+    # As fast as possible on another version, compare with the saved results
+    python -m app.replay /var/capture --speed 0 --against before.jsonl
+
+Responses are compared field by field, with the JSON Patch decoded. The exit
+code is 1 if any response differs. Captured durations are measured in the
+webhook (request handling only), replayed durations include the Flask test
+client, so compare timings between replays (--output/--against) to compare
+versions.
+"""
+
+import argparse
+import base64
+import logging
+import sys
+import time
+
+from app import create_app, fast_json
+from app.capture import read_capture
+
+
+def normalize(review):
+    """Return a response with its patch decoded, for comparison."""
+    if not isinstance(review, dict) or not isinstance(review.get("response"), dict):
+        return review
+    response = dict(review["response"])
+    if "patch" in response:
+        response["patch"] = fast_json.loads(base64.b64decode(response["patch"]))
+    return {**review, "response": response}
+
+
+def percentiles(durations):
+    ordered = sorted(durations)
+    if not ordered:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    return {
+        f"p{share}_ms": ordered[max(0, min(len(ordered) - 1, round(share / 100 * len(ordered)) - 1))]
+        for share in (50, 95, 99)
+    }
+
+
+def replay(records, speed=1.0):
+    """
+    Send captured requests to a new app.
+
+    Args:
+        records: Capture records (see app.capture.read_capture)
+        speed: Rate relative to the capture (2 = twice as fast), 0 for no waiting
+
+    Returns:
+        list: Result records (index, uid, status, duration_ms, response)
+    """
+    app = create_app()
+    # Do not capture the replay itself
+    app.config["WEBHOOK_CAPTURE"] = None
+    client = app.test_client()
+
+    results = []
+    first = records[0].get("time", 0) if records else 0
+    started = time.perf_counter()
+    for index, record in enumerate(records):
+        if speed > 0:
+            delay = (record.get("time", first) - first) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        body = fast_json.dumps(record["request"]) if record.get("request") is not None else b"invalid"
+        sent = time.perf_counter()
+        response = client.post("/mutate", data=body, content_type="application/json")
+        duration = time.perf_counter() - sent
+        results.append(
+            {
+                "index": index,
+                "uid": record.get("uid"),
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 3),
+                "response": fast_json.loads(response.get_data()) if response.status_code == 200 else None,
+            }
+        )
+    return results
+
+
+def compare(reference, results):
+    """
+    Compare replay results with reference records (captured or replayed).
+
+    Returns:
+        list: (index, uid, reason) of the requests whose response differs
+    """
+    differences = []
+    for expected, actual in zip(reference, results):
+        if expected.get("status") != actual["status"]:
+            reason = f"status {expected.get('status')} -> {actual['status']}"
+            differences.append((actual["index"], actual["uid"], reason))
+        elif normalize(expected.get("response")) != normalize(actual["response"]):
+            differences.append((actual["index"], actual["uid"], "response differs"))
+    if len(reference) != len(results):
+        differences.append((None, None, f"{len(reference)} reference records, {len(results)} replayed"))
+    return differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay captured AdmissionReview requests against create_app()")
+    parser.add_argument("capture", nargs="+", help="Capture files or directories")
+    parser.add_argument("--speed", type=float, default=1.0, help="Rate relative to the capture, 0 for no waiting")
+    parser.add_argument("--output", help="Write the replay results (JSON lines) to this file")
+    parser.add_argument("--against", help="Compare with the results of an earlier replay instead of the capture")
+    args = parser.parse_args(argv)
+
+    # Compare responses, do not log every request
+    logging.disable(logging.WARNING)
+
+    records = read_capture(args.capture)
+    if not records:
+        print("No captured requests found")
+        return 1
+    results = replay(records, args.speed)
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            for result in results:
+                f.write(fast_json.dumps(result) + b"\n")
+
+    reference = read_capture([args.against]) if args.against else records
+    reference_name = args.against or "capture"
+    differences = compare(reference, results)
+
+    print(f"Replayed {len(results)} requests at {'full speed' if args.speed <= 0 else f'{args.speed:g}x'}")
+    print(f"{'':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, durations in (
+        ("reference" if args.against else "capture", [record.get("duration_ms", 0.0) for record in reference]),
+        ("replay", [result["duration_ms"] for result in results]),
+    ):
+        values = percentiles(durations)
+        print(f"{name:<12} {values['p50_ms']:>8.3f} {values['p95_ms']:>8.3f} {values['p99_ms']:>8.3f}")
+
+    for index, uid, reason in differences[:20]:
+        print(f"DIFFERENT #{index} uid={uid}: {reason}")
+    if differences:
+        print(f"{len(differences)} of {len(results)} responses differ from the {reference_name}")
+        return 1
+    print(f"All responses match the {reference_name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
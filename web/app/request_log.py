@@ -0,0 +1,104 @@
+"""
+Structured request logging for the webhook.
+
+Every /mutate request is logged as a single summary record on the
+"app.requests" logger: outcome (mutated, skipped, invalid, error), pod,
+number of patch ops, body size and duration. The fields of a record are
+passed as `extra` and only formatted when the record is emitted, so nothing
+is formatted for records below the log level.
+
+configure_logging() (called by run.py) writes the records as one JSON object
+per line (LOG_FORMAT=json, the default) or as plain text (LOG_FORMAT=text).
+
+Payload dumps (the parsed request and the patch ops) are only logged for a
+sample of the requests, set by WEBHOOK_LOG_SAMPLE_RATE: from 0 (never, the
+default) to 1 (every request).
+"""
+
+import logging
+import os
+import random
+
+from app import fast_json
+
+logger = logging.getLogger("app.requests")
+
+LOG_FORMATS = ("json", "text")
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record and its `extra` fields as one JSON object."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return fast_json.dumps(entry, default=str).decode("utf-8")
+
+
+def configure_logging(environ=None):
+    """
+    Configure the root logger from LOG_FORMAT and LOG_LEVEL.
+
+    Args:
+        environ: Environment variables (defaults to os.environ)
+    """
+    environ = os.environ if environ is None else environ
+    log_format = environ.get("LOG_FORMAT", "json").lower()
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"LOG_FORMAT must be one of {', '.join(LOG_FORMATS)}, got {log_format!r}")
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+    logging.basicConfig(level=environ.get("LOG_LEVEL", "info").upper(), handlers=[handler], force=True)
+
+
+def sample_rate(value, name="WEBHOOK_LOG_SAMPLE_RATE"):
+    """Parse a sample rate setting, a float between 0 and 1."""
+    rate = float(value)
+    if not 0 <= rate <= 1:
+        raise ValueError(f"{name} must be between 0 and 1, got {value!r}")
+    return rate
+
+
+def sampled(rate):
+    """Return True if the payload of this request should be dumped."""
+    return rate > 0 and random.random() < rate
+
+
+def log_request(entry, duration, payload=None):
+    """
+    Log the summary record of a /mutate request.
+
+    Args:
+        entry: Summary fields (outcome, uid, pod, patch_ops, ...)
+        duration: Time spent on the request in seconds
+        payload: Sampled payload (request, patch) to dump, or None
+    """
+    entry["duration_ms"] = round(duration * 1000, 3)
+    level = logging.INFO if entry.get("outcome") in ("mutated", "skipped") else logging.WARNING
+    if logger.isEnabledFor(level):
+        logger.log(
+            level,
+            "mutate %s %s/%s uid=%s in %.1f ms",
+            entry.get("outcome"),
+            entry.get("namespace") or "-",
+            entry.get("pod") or "-",
+            entry.get("uid") or "-",
+            entry["duration_ms"],
+            extra=entry,
+        )
+    if payload is not None and logger.isEnabledFor(logging.INFO):
+        logger.info("payload uid=%s", entry.get("uid") or "-", extra={"payload": payload})
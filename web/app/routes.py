@@ -5,14 +5,17 @@ This module contains the actual endpoint implementations
 for the mutating admission webhook.
 """
 
-import base64
-import json
-import logging
+import time
 
-from flask import request
-from flask_restx import Namespace, Resource
+from flask import Response, current_app, request
+from flask_restx import Namespace, Resource, marshal
+from werkzeug.exceptions import RequestEntityTooLarge
 
-from app.mutation_logic import make_patch_for_pod
+from app import fast_json
+from app.admission import extract_admission_review
+from app.metrics import CONTENT_TYPE, IN_FLIGHT, PHASE_SECONDS, observe_request, render_metrics
+from app.mutation_logic import encoded_patch_for_pod, patch_cache_stats
+from app.request_log import log_request, logger, sampled
 from app.schemas import register_models
 from app.validators import is_valid_admission_review, should_mutate
 
@@ -23,13 +26,33 @@ webhook_ns = Namespace("webhook", description="Kubernetes Admission Webhook oper
 models = register_models(webhook_ns)
 
 
+def fast_path_enabled():
+    """Return True unless the app runs with WEBHOOK_FAST_PATH disabled."""
+    return current_app.config.get("WEBHOOK_FAST_PATH", True)
+
+
+def respond(review):
+    """
+    Serialize an AdmissionReview response.
+
+    The fast path writes the dict as is with fast_json (orjson when
+    installed); fields that are not set are left out instead of being
+    marshalled as null. Otherwise the response is marshalled through the
+    admission_review_response model.
+    """
+    if fast_path_enabled():
+        return Response(fast_json.dumps(review), status=200, mimetype="application/json")
+    return marshal(review, models["admission_review_response"]), 200
+
+
 @webhook_ns.route("/mutate")
 class MutateResource(Resource):
     """Kubernetes Mutating Admission Webhook endpoint."""
 
     @webhook_ns.doc("mutate_pod")
     @webhook_ns.expect(models["admission_review_request"], validate=False)
-    @webhook_ns.marshal_with(models["admission_review_response"], code=200)
+    # Documents the response model; the response itself is serialized in respond()
+    @webhook_ns.response(200, "Success", models["admission_review_response"])
     @webhook_ns.response(400, "Invalid request")
     def post(self):
         """
@@ -42,87 +65,121 @@ class MutateResource(Resource):
         - An init container that downloads a JAR file
         - A shared emptyDir volume mounted at /tmp
         """
-        # Debug: Log raw request info
-        logging.info("=" * 60)
-        logging.info("🔍 RAW REQUEST DEBUG")
-        logging.info(f"  Content-Type: {request.content_type}")
-        logging.info(f"  Content-Length: {request.content_length}")
-        logging.info(f"  Raw Data: {request.data[:500] if request.data else 'EMPTY'}")
-        
-        # Parse request body
-        try:
-            body = request.get_json(force=True)
-            logging.info(f"  Parsed Body Type: {type(body)}")
-            logging.info(f"  Parsed Body: {body}")
-        except Exception as e:
-            logging.error(f"  JSON Parse Error: {e}")
-            webhook_ns.abort(400, "Invalid JSON")
-
-        # Validate AdmissionReview format
-        if not is_valid_admission_review(body):
-            logging.error(f"  Validation Failed - body: {body}")
-            logging.error(f"  apiVersion: {body.get('apiVersion') if body else 'N/A'}")
-            logging.error(f"  kind: {body.get('kind') if body else 'N/A'}")
-            logging.error(f"  has request: {'request' in body if body else False}")
-            webhook_ns.abort(400, "Invalid AdmissionReview")
-
-        # Extract request details
-        req = body.get("request")
-        uid = req.get("uid")
-        response = {"uid": uid, "allowed": True}
-
-        # Debug: Log incoming request
-        logging.info("=" * 60)
-        logging.info("📥 INCOMING REQUEST")
-        logging.info(f"  UID: {uid}")
-        logging.info(f"  Kind: {req.get('kind', {}).get('kind', 'N/A')}")
-        logging.info(f"  Operation: {req.get('operation', 'N/A')}")
-        
-        pod_meta = req.get("object", {}).get("metadata", {})
-        logging.info(f"  Pod Name: {pod_meta.get('name', 'N/A')}")
-        logging.info(f"  Labels: {pod_meta.get('labels', {})}")
-        logging.info(f"  Annotations: {pod_meta.get('annotations', {})}")
-
-        # Apply mutation if criteria are met
+        started = time.perf_counter()
+        entry = {"outcome": "error", "body_bytes": request.content_length}
+        payload = {} if sampled(current_app.config.get("WEBHOOK_LOG_SAMPLE_RATE", 0.0)) else None
+        capture = current_app.config.get("WEBHOOK_CAPTURE")
+        review = None
+        IN_FLIGHT.inc()
         try:
-            if should_mutate(req):
-                logging.info("✅ MUTATION CRITERIA MET - Applying patches")
-                pod = req.get("object", {})
-                patch = make_patch_for_pod(pod)
-                patch_b64 = base64.b64encode(json.dumps(patch).encode()).decode()
-
-                # Debug: Log patches
-                logging.info(f"  Patches generated: {len(patch)}")
-                for i, p in enumerate(patch):
-                    logging.info(f"    [{i}] {p['op']} {p['path']}")
-
-                response.update({
-                    "patch": patch_b64,
-                    "patchType": "JSONPatch",
-                    "status": {"message": "Pod mutated successfully"}
-                })
+            review = review_admission(entry, payload)
+            with PHASE_SECONDS.time("serialize"):
+                return respond(review)
+        finally:
+            duration = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            observe_request(entry, duration)
+            log_request(entry, duration, payload)
+            if capture is not None and capture.sampled():
+                capture_request(capture, review, entry, duration)
+
+
+def capture_request(capture, review, entry, duration):
+    """Write the current request to the capture files (see app/capture.py)."""
+    if entry.get("reason") == "body too large":
+        # The body was not read
+        return
+    status = 200 if review is not None else 400 if entry.get("outcome") == "invalid" else 500
+    try:
+        capture.write(request.get_data(), review, status, duration)
+    except Exception:  # pylint: disable=broad-except
+        # Capturing must never fail the admission request
+        logger.exception("Capture failed")
+
+
+def review_admission(entry, payload):
+    """
+    Build the AdmissionReview response of the current /mutate request.
+
+    Args:
+        entry: Summary fields of the request log, filled in here
+        payload: Dict receiving the sampled payload dump, or None
+
+    Returns:
+        dict: AdmissionReview response
+    """
+    # Parse request body
+    try:
+        with PHASE_SECONDS.time("parse"):
+            if fast_path_enabled():
+                # Only the fields the mutation needs (see app/admission.py)
+                body = extract_admission_review(request.get_data())
             else:
-                logging.info("⏭️  MUTATION SKIPPED - Criteria not met")
-                response.update({"status": {"message": "No mutation applied"}})
-        except Exception as e:
-            logging.exception("❌ MUTATION FAILED")
+                body = request.get_json(force=True)
+    except RequestEntityTooLarge:
+        # Body above MAX_CONTENT_LENGTH (WEBHOOK_MAX_BODY_BYTES): 413
+        entry.update({"outcome": "invalid", "reason": "body too large"})
+        raise
+    except Exception as e:
+        entry.update({"outcome": "invalid", "reason": f"invalid JSON: {e}"})
+        if payload is not None:
+            payload["body"] = request.get_data()[:500]
+        webhook_ns.abort(400, "Invalid JSON")
+
+    if payload is not None:
+        payload["request"] = body
+
+    # Validate AdmissionReview format
+    if not is_valid_admission_review(body):
+        entry.update({"outcome": "invalid", "reason": "invalid AdmissionReview"})
+        webhook_ns.abort(400, "Invalid AdmissionReview")
+
+    # Extract request details
+    req = body.get("request")
+    uid = req.get("uid")
+    pod = req.get("object") or {}
+    entry.update({
+        "uid": uid,
+        "kind": (req.get("kind") or {}).get("kind"),
+        "operation": req.get("operation"),
+        "namespace": req.get("namespace"),
+        "pod": (pod.get("metadata") or {}).get("name"),
+    })
+    response = {"uid": uid, "allowed": True}
+
+    # Apply mutation if criteria are met
+    try:
+        with PHASE_SECONDS.time("should_mutate"):
+            mutate = should_mutate(req)
+        if mutate:
+            # Cached by pod shape: pods of one Deployment share the patch
+            with PHASE_SECONDS.time("patch"):
+                patch_b64, patch = encoded_patch_for_pod(pod)
+            entry.update({"outcome": "mutated", "patch_ops": len(patch)})
+            if payload is not None:
+                payload["patch"] = [f"{p['op']} {p['path']}" for p in patch]
+
             response.update({
-                "status": {"message": f"Mutation webhook error: {str(e)}"},
-                "allowed": True
+                "patch": patch_b64,
+                "patchType": "JSONPatch",
+                "status": {"message": "Pod mutated successfully"}
             })
-
-        # Debug: Log response
-        logging.info("📤 RESPONSE")
-        logging.info(f"  Allowed: {response.get('allowed')}")
-        logging.info(f"  Status: {response.get('status', {}).get('message', 'N/A')}")
-        logging.info(f"  Has Patch: {'patch' in response}")
-        logging.info("=" * 60)
-
-        return {
-            "apiVersion": "admission.k8s.io/v1",
-            "kind": "AdmissionReview",
-            "response": response
-        }
+        else:
+            entry["outcome"] = "skipped"
+            response.update({"status": {"message": "No mutation applied"}})
+    except Exception as e:
+        logger.exception("Mutation failed uid=%s", uid)
+        entry.update({"outcome": "error", "reason": str(e)})
+        response.update({
+            "status": {"message": f"Mutation webhook error: {str(e)}"},
+            "allowed": True
+        })
+
+    return {
+        "apiVersion": "admission.k8s.io/v1",
+        "kind": "AdmissionReview",
+        "response": response
+    }
 
 
 @webhook_ns.route("/healthz")
@@ -135,7 +192,24 @@ class HealthResource(Resource):
         """
         Health check endpoint.
 
-        Returns the health status of the webhook server.
+        Returns the health status of the webhook server and the
+        patch cache counters of this worker.
         Used by Kubernetes liveness/readiness probes.
         """
-        return {"status": "ok"}
+        return {"status": "ok", "patch_cache": patch_cache_stats()}
+
+
+@webhook_ns.route("/metrics")
+class MetricsResource(Resource):
+    """Prometheus metrics endpoint."""
+
+    @webhook_ns.doc("metrics")
+    @webhook_ns.response(200, "Metrics in the Prometheus text format")
+    def get(self):
+        """
+        Request metrics of the server, summed over its workers.
+
+        Request counts by outcome, latency histograms per phase, patch
+        sizes, body sizes and in-flight requests (see app/metrics.py).
+        """
+        return Response(render_metrics(), status=200, content_type=CONTENT_TYPE)
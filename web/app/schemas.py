@@ -78,8 +78,16 @@ def register_models(namespace):
         "response": fields.Nested(admission_response_model, description="Admission response")
     })
 
+    patch_cache_model = namespace.model("PatchCache", {
+        "hits": fields.Integer(description="Requests served from the patch cache", example=120),
+        "misses": fields.Integer(description="Requests that built and encoded a patch", example=3),
+        "size": fields.Integer(description="Pod shapes currently cached", example=3),
+        "maxsize": fields.Integer(description="Maximum number of cached pod shapes", example=256)
+    })
+
     health_response = namespace.model("HealthResponse", {
-        "status": fields.String(description="Health status", example="ok")
+        "status": fields.String(description="Health status", example="ok"),
+        "patch_cache": fields.Nested(patch_cache_model, description="Patch cache counters (per worker)")
     })
 
     # Return all models as a dictionary for easy access
@@ -94,6 +102,7 @@ def register_models(namespace):
         "status": status_model,
         "admission_response": admission_response_model,
         "admission_review_response": admission_review_response,
+        "patch_cache": patch_cache_model,
         "health_response": health_response,
     }
 
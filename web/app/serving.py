@@ -0,0 +1,139 @@
+"""
+Production server for the webhook.
+
+The API server calls the webhook for every matching pod CREATE, so it has to
+keep up with deploy storms. This module serves the Flask app from
+create_app() with gunicorn: several worker processes with a thread pool
+each, TLS, HTTP keep-alive (the API server reuses its connections) and a
+graceful shutdown on SIGTERM that finishes in-flight admission requests.
+
+All settings come from environment variables (see ENV_SETTINGS). gunicorn is
+only imported when the production server starts, so the app and its tests
+do not depend on it.
+"""
+
+import importlib.util
+import logging
+import os
+import tempfile
+
+from app.metrics import flush_metrics, use_shared_store
+
+DEFAULT_PORT = 8443
+DEFAULT_TLS_CERT_FILE = "/tls/tls.crt"
+DEFAULT_TLS_KEY_FILE = "/tls/tls.key"
+
+# Environment variable -> (gunicorn setting, default)
+ENV_SETTINGS = {
+    "WEB_WORKERS": ("workers", 2),
+    "WEB_THREADS": ("threads", 8),
+    "WEB_TIMEOUT": ("timeout", 30),
+    "WEB_GRACEFUL_TIMEOUT": ("graceful_timeout", 20),
+    "WEB_KEEPALIVE": ("keepalive", 75),
+    "WEB_BACKLOG": ("backlog", 2048),
+    "WEB_MAX_REQUESTS": ("max_requests", 0),
+    "WEB_MAX_REQUESTS_JITTER": ("max_requests_jitter", 0),
+}
+
+
+def _env_int(environ, name, default):
+    value = environ.get(name, "")
+    if value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError as e:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from e
+
+
+def metrics_dir(environ=None):
+    """
+    Return the directory the workers share their metrics through.
+
+    Args:
+        environ: Environment variables (defaults to os.environ)
+
+    Returns:
+        str: WEBHOOK_METRICS_DIR, or a directory on tmpfs (/dev/shm) if there is one
+    """
+    environ = os.environ if environ is None else environ
+    if environ.get("WEBHOOK_METRICS_DIR"):
+        return environ["WEBHOOK_METRICS_DIR"]
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"webhook-metrics-{os.getuid()}")
+
+
+def production_server_available():
+    """Return True if gunicorn is installed."""
+    return importlib.util.find_spec("gunicorn") is not None
+
+
+def server_options(environ=None):
+    """
+    Build the gunicorn settings of the production server.
+
+    Args:
+        environ: Environment variables (defaults to os.environ)
+
+    Returns:
+        dict: gunicorn settings (bind, workers, threads, timeouts, TLS files)
+    """
+    environ = os.environ if environ is None else environ
+
+    options = {
+        "bind": f"0.0.0.0:{_env_int(environ, 'PORT', DEFAULT_PORT)}",
+        # Threaded workers keep idle keep-alive connections off the workers
+        "worker_class": "gthread",
+        # Create the app once in the master; workers fork from it
+        "preload_app": True,
+        "errorlog": "-",
+        "loglevel": environ.get("LOG_LEVEL", "info").lower(),
+    }
+    for name, (setting, default) in ENV_SETTINGS.items():
+        options[setting] = _env_int(environ, name, default)
+    if options["workers"] < 1 or options["threads"] < 1:
+        raise ValueError("WEB_WORKERS and WEB_THREADS must be at least 1")
+
+    # Worker heartbeats on tmpfs, not the (possibly slow) container filesystem
+    if os.path.isdir("/dev/shm"):
+        options["worker_tmp_dir"] = "/dev/shm"
+
+    tls_crt = environ.get("TLS_CERT_FILE", DEFAULT_TLS_CERT_FILE)
+    tls_key = environ.get("TLS_KEY_FILE", DEFAULT_TLS_KEY_FILE)
+    if os.path.exists(tls_crt) and os.path.exists(tls_key):
+        options["certfile"] = tls_crt
+        options["keyfile"] = tls_key
+
+    return options
+
+
+def serve(app, options):
+    """
+    Run the production server until it is stopped (SIGTERM/SIGINT).
+
+    Args:
+        app: Flask app from create_app()
+        options: gunicorn settings from server_options()
+    """
+    from gunicorn.app.base import BaseApplication  # pylint: disable=import-outside-toplevel
+
+    class WebhookServer(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+            # Last metrics snapshot of a worker that is stopped or recycled
+            self.cfg.set("worker_exit", lambda server, worker: flush_metrics())
+
+        def load(self):
+            return app
+
+    logging.info(
+        "Production server: %s workers x %s threads, %s on %s",
+        options["workers"],
+        options["threads"],
+        "HTTPS" if "certfile" in options else "HTTP",
+        options["bind"],
+    )
+    # Workers share their metrics, so /metrics reports the whole server
+    use_shared_store(metrics_dir())
+    WebhookServer().run()
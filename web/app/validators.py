@@ -1,3 +1,13 @@
+# Mutation criteria, shared by should_mutate and the selectors of the
+# MutatingWebhookConfiguration (ocp/webhook.yaml, see app/webhook_config.py)
+MUTATE_LABELS = {"mutate": "true"}
+MUTATE_REQUIRED_LABEL_KEYS = ("labid", "version")
+MUTATE_ANNOTATIONS = {"mutate": "true"}
+# Namespaces the API server does not call the webhook for (control plane and
+# the webhook's own namespace); only used in the namespaceSelector
+EXCLUDED_NAMESPACES = ("kube-system", "webhook-system")
+NAMESPACE_NAME_LABEL = "kubernetes.io/metadata.name"
+
 def is_valid_admission_review(body):
     return (
         isinstance(body, dict)
@@ -20,8 +30,29 @@ def should_mutate(req):
     annotations = meta.get("annotations", {})
 
     return (
-        labels.get("mutate") == "true"
-        and annotations.get("mutate") == "true"
-        and labels.get("version") is not None
-        and labels.get("labid") is not None
+        all(labels.get(key) == value for key, value in MUTATE_LABELS.items())
+        and all(annotations.get(key) == value for key, value in MUTATE_ANNOTATIONS.items())
+        and all(labels.get(key) is not None for key in MUTATE_REQUIRED_LABEL_KEYS)
     )
+
+def object_selector():
+    """
+    Label selector matching the pods should_mutate can mutate.
+
+    Annotations cannot be selected on, so pods that match the selector but
+    lack the annotations still reach the webhook and are skipped there.
+    """
+    return {
+        "matchLabels": dict(MUTATE_LABELS),
+        "matchExpressions": [
+            {"key": key, "operator": "Exists"} for key in MUTATE_REQUIRED_LABEL_KEYS
+        ],
+    }
+
+def namespace_selector():
+    """Namespace selector leaving out EXCLUDED_NAMESPACES."""
+    return {
+        "matchExpressions": [
+            {"key": NAMESPACE_NAME_LABEL, "operator": "NotIn", "values": list(EXCLUDED_NAMESPACES)}
+        ]
+    }
@@ -0,0 +1,134 @@
+"""
+Generator for the selectors of the MutatingWebhookConfiguration.
+
+The namespaceSelector and objectSelector in ocp/webhook.yaml are generated
+from the mutation criteria in app/validators.py, so the API server only
+calls the webhook for pods it may mutate. Regenerate them after changing
+the criteria:
+
+    python -m app.webhook_config ocp/webhook.yaml
+
+With --check the file is left unchanged and the exit code is 1 if its
+selectors are out of date (tests/test_webhook_config.py runs the same check).
+"""
+
+import argparse
+import sys
+
+import yaml
+
+from app.validators import namespace_selector, object_selector
+
+WEBHOOK_NAME = "pod-mutate.webhook.system"
+SELECTOR_KEYS = ("namespaceSelector", "objectSelector")
+
+
+class _ManifestDumper(yaml.SafeDumper):
+    """Dumper indenting block sequences like the hand-written manifests."""
+
+    def increase_indent(self, flow=False, indentless=False):
+        return super().increase_indent(flow, False)
+
+
+def generate_selectors():
+    """
+    Build the selectors of the webhook from the mutation criteria.
+
+    Returns:
+        dict: namespaceSelector and objectSelector
+    """
+    return {
+        "namespaceSelector": namespace_selector(),
+        "objectSelector": object_selector(),
+    }
+
+
+def find_webhook(config, name=WEBHOOK_NAME):
+    """Return the webhook entry called name of a MutatingWebhookConfiguration."""
+    for webhook in config.get("webhooks") or []:
+        if webhook.get("name") == name:
+            return webhook
+    raise ValueError(f"Webhook {name} not found")
+
+
+def _indent(line):
+    return len(line) - len(line.lstrip())
+
+
+def _webhook_span(lines, name=WEBHOOK_NAME):
+    """Return the (start, end) line range of the webhooks list item called name."""
+    for start, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("- name:") and stripped[len("- name:") :].strip().strip("\"'") == name:
+            break
+    else:
+        raise ValueError(f"Webhook {name} not found")
+
+    indent = _indent(lines[start])
+    end = start + 1
+    while end < len(lines) and (not lines[end].strip() or _indent(lines[end]) > indent):
+        end += 1
+    return start, end
+
+
+def _replace_block(lines, key, value, name=WEBHOOK_NAME):
+    """Replace the `key:` entry of the webhook called name (and its nested lines) with value."""
+    first, last = _webhook_span(lines, name)
+    # Keys of the webhook entry are indented past the "- " of its list item
+    key_indent = _indent(lines[first]) + 2
+    for start in range(first + 1, last):
+        if _indent(lines[start]) == key_indent and lines[start].strip().startswith(f"{key}:"):
+            break
+    else:
+        raise ValueError(f"{key} not found in webhook {name}")
+
+    end = start + 1
+    while end < last and lines[end].strip() and _indent(lines[end]) > key_indent:
+        end += 1
+
+    dumped = yaml.dump({key: value}, Dumper=_ManifestDumper, default_flow_style=False, sort_keys=False)
+    block = [" " * key_indent + dumped_line for dumped_line in dumped.splitlines()]
+    return lines[:start] + block + lines[end:]
+
+
+def render_webhook_config(text):
+    """
+    Return the webhook manifest text with generated selectors.
+
+    Only the selector entries of the WEBHOOK_NAME entry are rewritten; other
+    webhooks and the rest of the file (comments, caBundle, formatting) are
+    kept as is.
+    """
+    find_webhook(yaml.safe_load(text))
+    selectors = generate_selectors()
+    lines = text.splitlines()
+    for key in SELECTOR_KEYS:
+        lines = _replace_block(lines, key, selectors[key])
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the webhook selectors from the mutation criteria")
+    parser.add_argument("path", help="MutatingWebhookConfiguration manifest (ocp/webhook.yaml)")
+    parser.add_argument("--check", action="store_true", help="Only report whether the selectors are up to date")
+    args = parser.parse_args(argv)
+
+    with open(args.path, encoding="utf-8") as f:
+        text = f.read()
+    rendered = render_webhook_config(text)
+
+    if args.check:
+        if rendered != text:
+            print(f"{args.path}: selectors are out of date, run python -m app.webhook_config {args.path}")
+            return 1
+        return 0
+
+    if rendered != text:
+        with open(args.path, "w", encoding="utf-8") as f:
+            f.write(rendered)
+        print(f"{args.path}: selectors updated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Benchmarks (not collected by pytest)
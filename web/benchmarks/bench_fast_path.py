@@ -0,0 +1,93 @@
+"""
+Benchmark of the /mutate fast path.
+
+Measures the CPU time per /mutate request (in-process, Flask test client)
+with the response marshalled through the flask-restx model and with the
+fast path, using the standard json module and orjson (if installed).
+
+Usage (from web/):
+    python -m benchmarks.bench_fast_path
+    python -m benchmarks.bench_fast_path --requests 2000 --containers 1 10 50
+"""
+
+import argparse
+import logging
+import time
+
+from app import create_app, fast_json
+
+
+def admission_review(containers):
+    """AdmissionReview of a pod that is mutated, with the given number of containers."""
+    return {
+        "apiVersion": "admission.k8s.io/v1",
+        "kind": "AdmissionReview",
+        "request": {
+            "uid": "bench-uid",
+            "kind": {"kind": "Pod"},
+            "operation": "CREATE",
+            "namespace": "default",
+            "object": {
+                "metadata": {
+                    "name": "bench-pod",
+                    "labels": {"mutate": "true", "version": "1.0", "labid": "lab-1"},
+                    "annotations": {"mutate": "true"},
+                },
+                "spec": {
+                    "containers": [
+                        {
+                            "name": f"app-{i}",
+                            "image": "nginx:latest",
+                            "ports": [{"containerPort": 8080 + i}],
+                            "resources": {"requests": {"cpu": "100m", "memory": "128Mi"}},
+                        }
+                        for i in range(containers)
+                    ]
+                },
+            },
+        },
+    }
+
+
+def cpu_per_request(fast_path, payload, requests):
+    """Return the CPU microseconds per /mutate request."""
+    app = create_app()
+    app.config["WEBHOOK_FAST_PATH"] = fast_path
+    client = app.test_client()
+    for _ in range(min(50, requests)):
+        client.post("/mutate", data=payload, content_type="application/json")
+
+    started = time.process_time()
+    for _ in range(requests):
+        client.post("/mutate", data=payload, content_type="application/json")
+    return (time.process_time() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU time per /mutate request: marshalled vs fast path")
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per measurement")
+    parser.add_argument("--containers", type=int, nargs="+", default=[1, 10, 50], help="Containers per pod")
+    args = parser.parse_args()
+
+    # Measure request handling, not log formatting
+    logging.disable(logging.CRITICAL)
+
+    library = fast_json.orjson
+    modes = [("marshal_with", False, None), ("fast path (json)", True, None)]
+    if library is not None:
+        modes.append(("fast path (orjson)", True, library))
+
+    print(f"{'containers':>10}  {'mode':<20} {'us/request':>10} {'saved':>8}")
+    for containers in args.containers:
+        payload = fast_json.dumps(admission_review(containers))
+        baseline = None
+        for name, fast_path, json_library in modes:
+            fast_json.orjson = json_library
+            micros = cpu_per_request(fast_path, payload, args.requests)
+            baseline = baseline or micros
+            print(f"{containers:>10}  {name:<20} {micros:>10.1f} {100 * (1 - micros / baseline):>7.1f}%")
+    fast_json.orjson = library
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Benchmark suite of /mutate.
+
+Sends the payload mix of benchmarks/payloads.py to /mutate at fixed
+concurrency levels and reports the throughput and the p50/p95/p99 latency.
+Two targets:
+
+    inprocess  create_app() through the Flask test client (one per thread)
+    server     run.py started locally over HTTP (gunicorn, or the Flask
+               server if gunicorn is not installed), one keep-alive
+               connection per thread
+
+Each target is measured --runs times (default 3) and the median of each
+figure over the runs is reported, so one noisy run does not decide the
+result. With --check the exit code is 1 if the median p50 or p95 latency of
+any target and concurrency level is more than --tolerance above
+benchmarks/baseline.json.
+
+The check is manual: no test or CI job runs it. Latencies depend on the
+machine (the committed baseline was recorded on the machine named in it),
+so before comparing, record a baseline on the machine that runs the check
+(--update-baseline) from the commit you compare against, and commit it
+along with changes that are expected to move it.
+
+Usage (from web/):
+    python -m benchmarks.bench_mutate
+    python -m benchmarks.bench_mutate --targets inprocess --concurrency 1 4 --requests 2000 --runs 5
+    python -m benchmarks.bench_mutate --check
+    python -m benchmarks.bench_mutate --update-baseline
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from app import create_app, fast_json
+from benchmarks.payloads import generate_reviews
+
+WEB_DIR = Path(__file__).resolve().parents[1]
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+TARGETS = ("inprocess", "server")
+CHECKED_PERCENTILES = ("p50_ms", "p95_ms")
+SERVER_START_TIMEOUT = 20
+
+
+def percentile(ordered, share):
+    """Nearest-rank percentile of sorted values."""
+    index = max(0, min(len(ordered) - 1, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, wall):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / wall, 1),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def median_result(results):
+    """Median of each figure over the results of several runs."""
+    return {name: round(statistics.median(result[name] for result in results), 3) for name in results[0]}
+
+
+def run_load(new_sender, bodies, concurrency, requests):
+    """
+    Send requests bodies (cycling through them) from concurrency threads.
+
+    Args:
+        new_sender: Called once per thread, returns send(body)
+        bodies: Encoded AdmissionReview bodies
+        concurrency: Number of threads
+        requests: Total number of requests
+
+    Returns:
+        dict: Throughput and latency percentiles (see summarize)
+    """
+    counter = itertools.count()
+    latencies = []
+    errors = []
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker():
+        send = new_sender()
+        own = []
+        ready.wait()
+        try:
+            while (index := next(counter)) < requests:
+                body = bodies[index % len(bodies)]
+                started = time.perf_counter()
+                send(body)
+                own.append(time.perf_counter() - started)
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+        latencies.extend(own)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    if errors:
+        raise RuntimeError(f"{len(errors)} of {concurrency} threads failed: {errors[0]}")
+    return summarize(latencies, wall)
+
+
+def inprocess_sender(app):
+    def new_sender():
+        client = app.test_client()
+
+        def send(body):
+            response = client.post("/mutate", data=body, content_type="application/json")
+            if response.status_code != 200:
+                raise RuntimeError(f"/mutate returned {response.status_code}")
+
+        return send
+
+    return new_sender
+
+
+def server_sender(port):
+    def new_sender():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        headers = {"Content-Type": "application/json"}
+
+        def send(body):
+            connection.request("POST", "/mutate", body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"/mutate returned {response.status}")
+
+        return send
+
+    return new_sender
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(workers):
+    """Start run.py over HTTP on a free port and yield the port."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEBHOOK_SERVER="production",
+        WEB_WORKERS=str(workers),
+        TLS_CERT_FILE="/nonexistent/tls.crt",
+        TLS_KEY_FILE="/nonexistent/tls.key",
+        LOG_LEVEL="warning",
+        LOG_FORMAT="text",
+    )
+    process = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "run.py"], cwd=WEB_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                connection.request("GET", "/healthz")
+                if connection.getresponse().status == 200:
+                    break
+            except OSError:
+                pass
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("local server did not start")
+            time.sleep(0.1)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def run_target(target, bodies, args):
+    """Return {concurrency: results} of one target."""
+    results = {}
+    if target == "inprocess":
+        new_sender = inprocess_sender(create_app())
+        for concurrency in args.concurrency:
+            run_load(new_sender, bodies, concurrency, min(len(bodies), 200))
+            results[concurrency] = run_load(new_sender, bodies, concurrency, args.requests)
+    else:
+        with local_server(args.workers) as port:
+            new_sender = server_sender(port)
+            for concurrency in args.concurrency:
+                run_load(new_sender, bodies, concurrency, min(len(bodies), 200))
+                results[concurrency] = run_load(new_sender, bodies, concurrency, args.requests)
+    return results
+
+
+def result_key(target, concurrency):
+    return f"{target}/c{concurrency}"
+
+
+def load_baseline(path):
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def regressions(results, baseline, tolerance):
+    """Return the (key, percentile, value, baseline) above the baseline plus tolerance."""
+    found = []
+    for key, result in results.items():
+        for name in CHECKED_PERCENTILES:
+            if key in baseline and result[name] > baseline[key][name] * (1 + tolerance):
+                found.append((key, name, result[name], baseline[key][name]))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/mutate throughput and latency at fixed concurrency levels")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Threads sending requests")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--payloads", type=int, default=500, help="Distinct AdmissionReview requests in the mix")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the payload mix")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per target; the median of each figure is used")
+    parser.add_argument("--workers", type=int, default=2, help="WEB_WORKERS of the local server")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Baseline file")
+    parser.add_argument("--check", action="store_true", help="Fail if latency regressed past the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed latency increase (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    # Measure request handling, not log output
+    logging.disable(logging.WARNING)
+
+    bodies = [fast_json.dumps(review) for review in generate_reviews(args.payloads, args.seed)]
+    baseline = load_baseline(args.baseline)
+
+    results = {}
+    print(
+        f"{'target':<10} {'threads':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'p95 vs baseline':>16}"
+    )
+    for target in args.targets:
+        runs = [run_target(target, bodies, args) for _ in range(max(1, args.runs))]
+        for concurrency in args.concurrency:
+            result = median_result([run[concurrency] for run in runs])
+            key = result_key(target, concurrency)
+            results[key] = result
+            change = ""
+            if key in baseline:
+                change = f"{100 * (result['p95_ms'] / baseline[key]['p95_ms'] - 1):+.1f}%"
+            print(
+                f"{target:<10} {concurrency:>7} {result['rps']:>9.1f} {result['p50_ms']:>8.3f} "
+                f"{result['p95_ms']:>8.3f} {result['p99_ms']:>8.3f} {change:>16}"
+            )
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs, "
+                    f"Python {platform.python_version()}, {fast_json.JSON_LIBRARY}",
+                    "requests": args.requests,
+                    "runs": args.runs,
+                    "payloads": args.payloads,
+                    "seed": args.seed,
+                    "results": {**baseline, **results},
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+
+    if args.check:
+        if not baseline:
+            print(f"No baseline in {args.baseline}, run with --update-baseline first")
+            return 1
+        found = regressions(results, baseline, args.tolerance)
+        for key, name, value, reference in found:
+            print(f"REGRESSION {key} {name}: {value:.3f} ms > {reference:.3f} ms + {args.tolerance:.0%}")
+        if found:
+            return 1
+        print(f"No latency regression past the baseline (+{args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Realistic AdmissionReview payloads for the benchmarks.
+
+generate_reviews() builds a reproducible mix of pods (seeded): 1 to 50
+containers, with and without existing env, volumeMounts, initContainers and
+volumes, matched and unmatched by the mutation criteria, and with the bulk
+a real API server sends along (oldObject on UPDATE, managedFields, resources,
+probes, ports).
+"""
+
+import random
+
+# Share of pods matching the mutation criteria (labels and annotation)
+MATCHED_SHARE = 0.7
+MATCHED_LABELS = {"mutate": "true", "version": "1.0", "labid": "lab-1"}
+
+
+def container(rng, index, with_env, with_volume_mounts):
+    spec = {
+        "name": f"app-{index}",
+        "image": f"registry.example.com/team/app-{index}:1.{rng.randint(0, 40)}.0",
+        "imagePullPolicy": "IfNotPresent",
+        "ports": [{"containerPort": 8080 + index, "protocol": "TCP"}],
+        "resources": {
+            "requests": {"cpu": f"{rng.choice([50, 100, 250])}m", "memory": f"{rng.choice([64, 128, 256])}Mi"},
+            "limits": {"cpu": "1", "memory": "512Mi"},
+        },
+        "readinessProbe": {"httpGet": {"path": "/ready", "port": 8080 + index}, "periodSeconds": 10},
+        "terminationMessagePath": "/dev/termination-log",
+        "terminationMessagePolicy": "File",
+    }
+    if with_env:
+        spec["env"] = [{"name": f"SETTING_{i}", "value": str(rng.random())} for i in range(rng.randint(1, 15))]
+    if with_volume_mounts:
+        spec["volumeMounts"] = [{"name": "config", "mountPath": "/etc/app"}]
+    return spec
+
+
+def managed_fields(containers):
+    fields = {f'k:{{"name":"app-{i}"}}': {".": {}, "f:image": {}, "f:ports": {}} for i in range(containers)}
+    return [
+        {
+            "manager": "kube-controller-manager",
+            "operation": "Update",
+            "apiVersion": "v1",
+            "fieldsType": "FieldsV1",
+            "fieldsV1": {"f:spec": {"f:containers": fields}},
+        }
+    ]
+
+
+def admission_review(rng, index):
+    """Return one AdmissionReview request of the mix."""
+    containers = rng.choice([1, 1, 1, 2, 2, 3, 5, 10, 20, 50])
+    matched = rng.random() < MATCHED_SHARE
+    labels = dict(MATCHED_LABELS) if matched else {"app": f"app-{index}"}
+    labels["pod-template-hash"] = f"{rng.getrandbits(32):08x}"
+    annotations = {"mutate": "true"} if matched or rng.random() < 0.5 else {}
+
+    spec = {
+        "containers": [container(rng, i, rng.random() < 0.5, rng.random() < 0.3) for i in range(containers)],
+        "restartPolicy": "Always",
+        "serviceAccountName": "default",
+    }
+    if rng.random() < 0.3:
+        spec["initContainers"] = [{"name": "setup", "image": "busybox", "command": ["sh", "-c", "true"]}]
+    if rng.random() < 0.4:
+        spec["volumes"] = [{"name": "config", "configMap": {"name": "app-config"}}]
+
+    pod = {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": f"bench-pod-{index}",
+            "namespace": "bench",
+            "labels": labels,
+            "annotations": annotations,
+            "managedFields": managed_fields(containers),
+        },
+        "spec": spec,
+    }
+    operation = "CREATE" if rng.random() < 0.9 else "UPDATE"
+    request = {
+        "uid": f"bench-uid-{index}",
+        "kind": {"group": "", "version": "v1", "kind": "Pod"},
+        "resource": {"group": "", "version": "v1", "resource": "pods"},
+        "operation": operation,
+        "namespace": "bench",
+        "userInfo": {"username": "system:serviceaccount:kube-system:replicaset-controller"},
+        "object": pod,
+    }
+    if operation == "UPDATE":
+        request["oldObject"] = pod
+    return {"apiVersion": "admission.k8s.io/v1", "kind": "AdmissionReview", "request": request}
+
+
+def generate_reviews(count, seed=0):
+    """
+    Generate the benchmark mix.
+
+    Args:
+        count: Number of AdmissionReview requests
+        seed: Random seed, the same seed gives the same requests
+
+    Returns:
+        list: AdmissionReview dicts
+    """
+    rng = random.Random(seed)
+    return [admission_review(rng, index) for index in range(count)]
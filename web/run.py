@@ -1,27 +1,40 @@
 import os
 import logging
 from app import create_app
+from app.request_log import configure_logging
+from app.serving import production_server_available, serve, server_options
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+# JSON lines by default, LOG_FORMAT=text for plain text
+configure_logging()
 
 app = create_app()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8443))
-    tls_crt = "/tls/tls.crt"
-    tls_key = "/tls/tls.key"
+    tls_crt = os.environ.get("TLS_CERT_FILE", "/tls/tls.crt")
+    tls_key = os.environ.get("TLS_KEY_FILE", "/tls/tls.key")
+    # production (gunicorn, see app/serving.py) or development (Flask server)
+    server_mode = os.environ.get("WEBHOOK_SERVER", "production")
 
     logging.info("🚀 Starting Mutating Webhook Server")
     logging.info(f"Listening on port {port}")
 
-    if os.path.exists(tls_crt) and os.path.exists(tls_key):
-        try:
-            logging.info("✅ Found TLS certs, starting HTTPS server...")
-            app.run(host="0.0.0.0", port=port, ssl_context=(tls_crt, tls_key))
-        except Exception as e:
-            logging.error(f"❌ Failed to start HTTPS: {e}")
-            logging.warning("Starting HTTP for debug.")
-            app.run(host="0.0.0.0", port=port)
+    if server_mode == "production" and production_server_available():
+        options = server_options()
+        if "certfile" not in options:
+            logging.warning("⚠️ No TLS certs found, running HTTP")
+        serve(app, options)
     else:
-        logging.warning("⚠️ No TLS certs found, running HTTP (dev mode)")
-        app.run(host="0.0.0.0", port=port)
+        if server_mode == "production":
+            logging.warning("⚠️ gunicorn is not installed, falling back to the development server")
+        if os.path.exists(tls_crt) and os.path.exists(tls_key):
+            try:
+                logging.info("✅ Found TLS certs, starting HTTPS server...")
+                app.run(host="0.0.0.0", port=port, ssl_context=(tls_crt, tls_key))
+            except Exception as e:
+                logging.error(f"❌ Failed to start HTTPS: {e}")
+                logging.warning("Starting HTTP for debug.")
+                app.run(host="0.0.0.0", port=port)
+        else:
+            logging.warning("⚠️ No TLS certs found, running HTTP (dev mode)")
+            app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,74 @@
+"""Fixtures and the AdmissionReview factory shared by the tests."""
+
+import copy
+
+import pytest
+
+from app import create_app
+
+# Labels should_mutate accepts
+MUTATE_LABELS = {"mutate": "true", "version": "1.0", "labid": "lab-123"}
+
+
+def make_review(
+    labels=None,
+    annotations=None,
+    containers=None,
+    operation="CREATE",
+    uid="test-uid",
+    name="test-pod",
+    namespace="default",
+    user_info=None,
+    api_server_fields=False,
+    **spec,
+):
+    """
+    Build an AdmissionReview request for a pod.
+
+    Args:
+        labels: Pod labels (default: MUTATE_LABELS)
+        annotations: Pod annotations (default: the mutation annotation)
+        containers: Pod containers (default: one nginx container)
+        operation, uid, name, namespace: Fields of the request
+        user_info: userInfo of the request (default: none)
+        api_server_fields: Add the fields a real API server also sends
+            (kind group and version, resource, userInfo, managedFields, oldObject)
+        **spec: Other pod spec fields (initContainers, volumes, ...)
+
+    Returns:
+        dict: AdmissionReview
+    """
+    pod = {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "labels": dict(MUTATE_LABELS) if labels is None else labels,
+            "annotations": {"mutate": "true"} if annotations is None else annotations,
+        },
+        "spec": {"containers": containers or [{"name": "app", "image": "nginx"}], **spec},
+    }
+    request = {
+        "uid": uid,
+        "kind": {"kind": "Pod"},
+        "operation": operation,
+        "namespace": namespace,
+        "object": pod,
+    }
+    if api_server_fields:
+        pod["metadata"]["managedFields"] = [{"manager": "kubectl", "fieldsV1": {"f:metadata": {}}}] * 20
+        request["kind"] = {"group": "", "version": "v1", "kind": "Pod"}
+        request["resource"] = {"group": "", "version": "v1", "resource": "pods"}
+        request["userInfo"] = {"username": "admin", "groups": ["system:masters"]}
+        request["oldObject"] = copy.deepcopy(pod)
+    if user_info is not None:
+        request["userInfo"] = user_info
+    return {"apiVersion": "admission.k8s.io/v1", "kind": "AdmissionReview", "request": request}
+
+
+@pytest.fixture
+def client():
+    """Create test client"""
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
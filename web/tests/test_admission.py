@@ -0,0 +1,95 @@
+"""Tests for the minimal-field AdmissionReview extraction."""
+
+import json
+
+import pytest
+
+from app.admission import extract_admission_review, project_admission_review
+from app.mutation_logic import make_patch_for_pod
+from app.validators import is_valid_admission_review, should_mutate
+from tests.conftest import make_review
+
+# Requests with the fields a real API server sends (managedFields, oldObject, ...)
+REVIEWS = [
+    make_review(api_server_fields=True, **variant)
+    for variant in (
+        {},
+        {"labels": {}},
+        {"annotations": {}},
+        {"operation": "UPDATE"},
+        {"containers": [{"name": "a", "env": [{"name": "X", "value": "1"}]}, {"name": "b", "volumeMounts": []}]},
+        {"containers": [{"name": f"c{i}", "image": "nginx", "env": []} for i in range(20)], "volumes": []},
+        {"initContainers": [{"name": "init"}], "volumes": [{"name": "data", "emptyDir": {}}]},
+        {"labels": {"mutate": "true", "version": "2.0", "labid": "lab-9", "app.kubernetes.io/name": "web"}},
+    )
+]
+
+
+class TestExtractAdmissionReview:
+    """Tests for extract_admission_review function."""
+
+    def test_minimal_view(self):
+        """Only the fields the mutation needs should be kept."""
+        view = extract_admission_review(json.dumps(make_review(volumes=[], api_server_fields=True)).encode())
+        assert view == {
+            "apiVersion": "admission.k8s.io/v1",
+            "kind": "AdmissionReview",
+            "request": {
+                "uid": "test-uid",
+                "kind": {"kind": "Pod"},
+                "operation": "CREATE",
+                "namespace": "default",
+                "object": {
+                    "metadata": {
+                        "name": "test-pod",
+                        "labels": {"mutate": "true", "version": "1.0", "labid": "lab-123"},
+                        "annotations": {"mutate": "true"},
+                    },
+                    "spec": {"containers": [{}], "volumes": True},
+                },
+            },
+        }
+
+    def test_container_presence_flags_keep_index(self):
+        """Each container should keep its position with env/volumeMounts presence flags."""
+        review = make_review(containers=[{"name": "a", "env": []}, "invalid", {"name": "c", "volumeMounts": []}])
+        view = extract_admission_review(json.dumps(review).encode())
+        assert view["request"]["object"]["spec"]["containers"] == [{"env": True}, {}, {"volumeMounts": True}]
+
+    def test_nested_label_values_dropped(self):
+        """Labels and annotations should only keep scalar values."""
+        view = extract_admission_review(json.dumps(make_review(labels={"mutate": "true", "bad": {"a": 1}})).encode())
+        assert view["request"]["object"]["metadata"]["labels"] == {"mutate": "true"}
+
+    @pytest.mark.parametrize("data", [b"", b"not json", b'{"request": '])
+    def test_invalid_json_raises_value_error(self, data):
+        """Invalid JSON should raise ValueError."""
+        with pytest.raises(ValueError):
+            extract_admission_review(data)
+
+    @pytest.mark.parametrize("body", [[], "text", 5, None])
+    def test_non_object_body_is_invalid(self, body):
+        """A body that is not a JSON object should fail validation."""
+        assert is_valid_admission_review(project_admission_review(body)) is False
+
+    def test_missing_request(self):
+        """A review without a request object should fail validation."""
+        view = project_admission_review(
+            {"apiVersion": "admission.k8s.io/v1", "kind": "AdmissionReview", "request": None}
+        )
+        assert is_valid_admission_review(view) is False
+
+
+class TestViewEquivalence:
+    """The minimal view must give the same decision and patch as the full request."""
+
+    @pytest.mark.parametrize("review", REVIEWS)
+    def test_same_should_mutate(self, review):
+        view = extract_admission_review(json.dumps(review).encode())
+        assert is_valid_admission_review(view) == is_valid_admission_review(review)
+        assert should_mutate(view["request"]) == should_mutate(review["request"])
+
+    @pytest.mark.parametrize("review", REVIEWS)
+    def test_same_patch(self, review):
+        view = extract_admission_review(json.dumps(review).encode())
+        assert make_patch_for_pod(view["request"]["object"]) == make_patch_for_pod(review["request"]["object"])
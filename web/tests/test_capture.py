@@ -0,0 +1,163 @@
+"""Tests for the request capture and its replay."""
+
+import json
+import threading
+
+import pytest
+
+from app import create_app
+from app.capture import REDACTED, CaptureWriter, capture_files, read_capture, redact
+from app.replay import compare, main, replay
+from tests.conftest import make_review
+
+# Pod fields holding secrets that redact() must replace
+SECRET_FIELDS = {
+    "user_info": {"username": "alice", "groups": ["developers"]},
+    "annotations": {"mutate": "true", "secret-note": "hunter2"},
+    "containers": [
+        {
+            "name": "app",
+            "image": "nginx",
+            "command": ["run", "--token=abc"],
+            "env": [{"name": "PASSWORD", "value": "hunter2"}, {"name": "FROM", "valueFrom": {}}],
+        }
+    ],
+    "initContainers": [{"name": "init", "image": "busybox", "args": ["--password=x"]}],
+}
+
+
+@pytest.fixture
+def capture_app(tmp_path):
+    """App capturing every request into tmp_path"""
+    app = create_app()
+    app.config["TESTING"] = True
+    app.config["WEBHOOK_CAPTURE"] = CaptureWriter(str(tmp_path), 1.0, 10 * 1024 * 1024, 2)
+    return app
+
+
+class TestRedact:
+    """Tests for redact function."""
+
+    def test_secrets_redacted(self):
+        """Env values, commands, args, annotation values and user info should be replaced."""
+        request = redact(make_review(**SECRET_FIELDS))["request"]
+        pod = request["object"]
+        container = pod["spec"]["containers"][0]
+        assert request["userInfo"] == {"username": REDACTED}
+        assert container["env"] == [{"name": "PASSWORD", "value": REDACTED}, {"name": "FROM", "valueFrom": {}}]
+        assert container["command"] == [REDACTED]
+        assert pod["spec"]["initContainers"][0]["args"] == [REDACTED]
+        assert pod["metadata"]["annotations"] == {"mutate": "true", "secret-note": REDACTED}
+
+    def test_mutation_fields_kept(self):
+        """Labels and the mutation annotation should be kept."""
+        pod = redact(make_review(**SECRET_FIELDS))["request"]["object"]
+        assert pod["metadata"]["labels"] == make_review(**SECRET_FIELDS)["request"]["object"]["metadata"]["labels"]
+        assert pod["metadata"]["annotations"]["mutate"] == "true"
+
+    def test_input_not_modified(self):
+        """redact should return a copy."""
+        original = make_review(**SECRET_FIELDS)
+        redact(original)
+        assert original == make_review(**SECRET_FIELDS)
+
+    @pytest.mark.parametrize("body", [None, [], "text", {"request": None}])
+    def test_other_bodies_unchanged(self, body):
+        """Bodies that are not AdmissionReviews should be returned as is."""
+        assert redact(body) == body
+
+
+class TestCaptureWriter:
+    """Tests for CaptureWriter."""
+
+    def test_disabled_without_directory(self):
+        """Capture should be off unless WEBHOOK_CAPTURE_DIR is set."""
+        assert CaptureWriter.from_environ({}) is None
+
+    def test_from_environ(self, tmp_path):
+        """Settings should be read from the environment."""
+        writer = CaptureWriter.from_environ(
+            {"WEBHOOK_CAPTURE_DIR": str(tmp_path), "WEBHOOK_CAPTURE_SAMPLE_RATE": "0.5", "WEBHOOK_CAPTURE_BACKUPS": "3"}
+        )
+        assert (writer.directory, writer.rate, writer.backups) == (str(tmp_path), 0.5, 3)
+
+    def test_invalid_sample_rate(self, tmp_path):
+        """A sample rate above 1 should be rejected."""
+        with pytest.raises(ValueError):
+            CaptureWriter.from_environ({"WEBHOOK_CAPTURE_DIR": str(tmp_path), "WEBHOOK_CAPTURE_SAMPLE_RATE": "2"})
+
+    def test_one_handler_per_process(self, tmp_path):
+        """Threads writing their first record at once should share one file handler."""
+        writer = CaptureWriter(str(tmp_path), 1.0, 10 * 1024 * 1024, 2)
+        ready = threading.Barrier(8)
+        handlers = []
+
+        def first_use():
+            ready.wait()
+            handlers.append(writer.handler())
+
+        threads = [threading.Thread(target=first_use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(handler) for handler in handlers}) == 1
+
+    def test_captures_redacted_request_and_response(self, capture_app, tmp_path):
+        """A captured record should hold the redacted request and the response."""
+        response = capture_app.test_client().post("/mutate", data=json.dumps(make_review(**SECRET_FIELDS)))
+        [record] = read_capture([str(tmp_path)])
+        assert record["uid"] == "test-uid"
+        assert record["status"] == 200
+        assert record["response"] == response.get_json()
+        assert record["request"] == redact(make_review(**SECRET_FIELDS))
+        [path] = capture_files([str(tmp_path)])
+        with open(path) as f:
+            assert "hunter2" not in f.read()
+
+    def test_captures_rejected_request(self, capture_app, tmp_path):
+        """Rejected requests should be captured with their status."""
+        capture_app.test_client().post("/mutate", data="not valid json")
+        [record] = read_capture([str(tmp_path)])
+        assert record["status"] == 400
+        assert record["request"] is None
+
+    def test_files_rotate(self, tmp_path):
+        """Files should be rotated at max_bytes and read back in capture order."""
+        app = create_app()
+        app.config["WEBHOOK_CAPTURE"] = CaptureWriter(str(tmp_path), 1.0, 2000, 10)
+        client = app.test_client()
+        for i in range(10):
+            client.post("/mutate", data=json.dumps(make_review(uid=f"uid-{i}", **SECRET_FIELDS)))
+        assert len(capture_files([str(tmp_path)])) > 1
+        assert [record["uid"] for record in read_capture([str(tmp_path)])] == [f"uid-{i}" for i in range(10)]
+
+
+class TestReplay:
+    """Tests for the replay of a capture."""
+
+    def test_replay_matches_capture(self, capture_app, tmp_path):
+        """Replaying a capture on the same version should give the same responses."""
+        client = capture_app.test_client()
+        client.post("/mutate", data=json.dumps(make_review(uid="matched", **SECRET_FIELDS)))
+        client.post("/mutate", data=json.dumps(make_review(uid="skipped", labels={}, **SECRET_FIELDS)))
+        client.post("/mutate", data="not valid json")
+        records = read_capture([str(tmp_path)])
+        assert compare(records, replay(records, speed=0)) == []
+
+    def test_changed_response_detected(self, capture_app, tmp_path):
+        """A different response should be reported."""
+        capture_app.test_client().post("/mutate", data=json.dumps(make_review(**SECRET_FIELDS)))
+        records = read_capture([str(tmp_path)])
+        records[0]["response"]["response"]["allowed"] = False
+        [(index, uid, reason)] = compare(records, replay(records, speed=0))
+        assert (index, uid, reason) == (0, "test-uid", "response differs")
+
+    def test_main_against_earlier_replay(self, capture_app, tmp_path, tmp_path_factory, capsys):
+        """main should save results and compare a later replay with them."""
+        capture_app.test_client().post("/mutate", data=json.dumps(make_review(**SECRET_FIELDS)))
+        capture_dir = str(tmp_path)
+        results = str(tmp_path_factory.mktemp("replay") / "before.jsonl")
+        assert main([capture_dir, "--speed", "0", "--output", results]) == 0
+        assert main([capture_dir, "--speed", "0", "--against", results]) == 0
+        assert "All responses match" in capsys.readouterr().out
@@ -0,0 +1,49 @@
+"""Tests for the fast path JSON helpers."""
+
+import json
+
+import pytest
+
+from app import fast_json
+
+
+@pytest.fixture(params=["orjson", "json"])
+def library(request, monkeypatch):
+    """Run a test with orjson (if installed) and with the json fallback."""
+    if request.param == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+class TestFastJson:
+    """Tests for loads and dumps."""
+
+    DOCUMENT = {"uid": "abc-123", "allowed": True, "status": {"message": "ünïcode"}, "patch": None, "n": [1, 2.5]}
+
+    def test_round_trip(self, library):
+        """dumps followed by loads should return the same document."""
+        assert fast_json.loads(fast_json.dumps(self.DOCUMENT)) == self.DOCUMENT
+
+    def test_dumps_returns_compact_bytes(self, library):
+        """dumps should return compact UTF-8 JSON the json module can read."""
+        data = fast_json.dumps(self.DOCUMENT)
+        assert isinstance(data, bytes)
+        assert b": " not in data
+        assert json.loads(data.decode("utf-8")) == self.DOCUMENT
+
+    def test_loads_accepts_str_and_bytes(self, library):
+        """loads should parse both str and bytes."""
+        assert fast_json.loads('{"a": 1}') == {"a": 1}
+        assert fast_json.loads(b'{"a": 1}') == {"a": 1}
+
+    @pytest.mark.parametrize("data", [b"", b"not json", b'{"a": '])
+    def test_loads_invalid_raises_value_error(self, library, data):
+        """Invalid JSON should raise ValueError."""
+        with pytest.raises(ValueError):
+            fast_json.loads(data)
+
+    def test_dumps_default(self, library):
+        """Objects that are not JSON serializable should go through default."""
+        assert json.loads(fast_json.dumps({"raw": b"abc", "set": {1}}, default=str)) == {"raw": "b'abc'", "set": "{1}"}
@@ -0,0 +1,242 @@
+"""Tests for the /metrics endpoint and the metric classes."""
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from app import metrics
+from app.metrics import DURATION_BUCKETS, Counter, Gauge, Histogram, SharedStore
+from tests.conftest import make_review
+
+
+def series(name, **labels):
+    """Return a series as it appears in /metrics."""
+    pairs = [f'{key}="{value}"' for key, value in labels.items()]
+    return f"{name}{{{','.join(pairs)}}}" if pairs else name
+
+
+def sample(text, series):
+    """Return the value of one series (name plus labels) of a scrape, 0 if absent."""
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+MUTATED = make_review()
+SKIPPED = make_review(labels={})
+
+
+class TestMetricClasses:
+    """Tests for Counter, Gauge and Histogram."""
+
+    def test_counter_render(self):
+        """Counters should export their initial and incremented series."""
+        counter = Counter("test_total", "Test counter", ["outcome"], [("a",)])
+        counter.inc("b", amount=2)
+        assert counter.render() == (
+            "# HELP test_total Test counter\n"
+            "# TYPE test_total counter\n"
+            'test_total{outcome="a"} 0\n'
+            'test_total{outcome="b"} 2'
+        )
+
+    def test_gauge_inc_dec_set(self):
+        """Gauges should go up and down."""
+        gauge = Gauge("test_gauge", "Test gauge")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        assert gauge.value() == 1
+        gauge.set(7)
+        assert "test_gauge 7" in gauge.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Buckets should be cumulative and end with +Inf."""
+        histogram = Histogram("test_seconds", "Test histogram", [0.1, 1.0])
+        for value in (0.05, 0.5, 0.7, 5):
+            histogram.observe(value)
+        text = histogram.render()
+        assert sample(text, 'test_seconds_bucket{le="0.1"}') == 1
+        assert sample(text, 'test_seconds_bucket{le="1.0"}') == 3
+        assert sample(text, 'test_seconds_bucket{le="+Inf"}') == 4
+        assert sample(text, "test_seconds_count") == 4
+        assert sample(text, "test_seconds_sum") == pytest.approx(6.25)
+
+    def test_histogram_time(self):
+        """time() should observe the duration of its block."""
+        histogram = Histogram("test_seconds", "Test histogram", [1.0], ["phase"])
+        with histogram.time("parse"):
+            pass
+        assert histogram.count("parse") == 1
+
+
+class TestMetricsEndpoint:
+    """Tests for /metrics endpoint"""
+
+    def test_metrics_content_type(self, client):
+        """Metrics should be served in the Prometheus text format"""
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+
+    def test_all_outcomes_exported(self, client):
+        """Every outcome should be exported, even before the first request"""
+        text = scrape(client)
+        for outcome in ("mutated", "skipped", "invalid", "error"):
+            assert series("webhook_requests_total", outcome=outcome) in text
+
+    @pytest.mark.parametrize(
+        "data,outcome",
+        [
+            (json.dumps(MUTATED), "mutated"),
+            (json.dumps(SKIPPED), "skipped"),
+            ("not valid json", "invalid"),
+            (json.dumps({"kind": "Other"}), "invalid"),
+        ],
+    )
+    def test_request_counted_by_outcome(self, client, data, outcome):
+        """Each /mutate request should increment the counter of its outcome"""
+        counter = series("webhook_requests_total", outcome=outcome)
+        before = sample(scrape(client), counter)
+        client.post("/mutate", data=data)
+        assert sample(scrape(client), counter) == before + 1
+
+    def test_phase_latencies_observed(self, client):
+        """A mutated request should be timed in every phase"""
+        before = scrape(client)
+        client.post("/mutate", data=json.dumps(MUTATED))
+        after = scrape(client)
+        for phase in ("parse", "should_mutate", "patch", "serialize"):
+            count = series("webhook_phase_duration_seconds_count", phase=phase)
+            assert sample(after, count) == sample(before, count) + 1
+        assert sample(after, series("webhook_request_duration_seconds_count")) == (
+            sample(before, series("webhook_request_duration_seconds_count")) + 1
+        )
+
+    def test_patch_ops_and_body_size(self, client):
+        """Patch op counts and body sizes should be recorded"""
+        data = json.dumps(make_review(containers=[{"name": f"app-{i}", "image": "nginx"} for i in range(3)]))
+        before = scrape(client)
+        client.post("/mutate", data=data)
+        after = scrape(client)
+        assert sample(after, series("webhook_patch_ops_count")) == sample(before, series("webhook_patch_ops_count")) + 1
+        assert sample(after, series("webhook_patch_ops_sum")) > sample(before, series("webhook_patch_ops_sum"))
+        assert sample(after, series("webhook_request_body_bytes_sum")) == (
+            sample(before, series("webhook_request_body_bytes_sum")) + len(data)
+        )
+
+    def test_no_requests_in_flight_after_response(self, client):
+        """The in-flight gauge should be back to 0 after the request"""
+        client.post("/mutate", data=json.dumps(MUTATED))
+        assert sample(scrape(client), series("webhook_requests_in_flight")) == 0
+
+    def test_patch_cache_exported(self, client):
+        """The patch cache counters should be exported"""
+        text = scrape(client)
+        for stat in ("hits", "misses", "size"):
+            assert series("webhook_patch_cache", stat=stat) in text
+
+    def test_series_not_labelled_with_worker(self, client):
+        """Series should not carry a worker label"""
+        text = scrape(client)
+        assert "worker=" not in text
+
+
+def dead_pid():
+    """Return the pid of a process that has exited."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])  # pylint: disable=consider-using-with
+    process.wait()
+    return process.pid
+
+
+def write_snapshot(store, pid, requests=0, in_flight=0, durations=()):
+    """Write the snapshot of another worker to a shared store."""
+    counter = Counter("webhook_requests_total", "", ["outcome"])
+    counter.inc("mutated", amount=requests)
+    gauge = Gauge("webhook_requests_in_flight", "")
+    gauge.set(in_flight)
+    histogram = Histogram("webhook_request_duration_seconds", "", DURATION_BUCKETS)
+    for duration in durations:
+        histogram.observe(duration)
+    snapshot = {
+        metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+        for metric in (counter, gauge, histogram)
+    }
+    with open(os.path.join(store.directory, f"worker-{pid}.json"), "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Shared store of this process for a server with several workers."""
+    store = metrics.use_shared_store(str(tmp_path / "metrics"))
+    yield store
+    metrics._store = None  # pylint: disable=protected-access
+
+
+class TestSharedStore:
+    """Tests for the metrics shared by the workers of the production server."""
+
+    def test_reset_removes_previous_snapshots(self, tmp_path):
+        """Snapshots of a previous server should be removed when the server starts."""
+        directory = tmp_path / "metrics"
+        directory.mkdir()
+        (directory / "worker-1.json").write_text("{}")
+        (directory / "archive.json").write_text("{}")
+        SharedStore(str(directory)).reset()
+        assert list(directory.iterdir()) == []
+
+    def test_scrape_sums_all_workers(self, client, store):
+        """A scrape should return the counters and histograms of every live worker."""
+        counter = series("webhook_requests_total", outcome="mutated")
+        own = sample(scrape(client), counter)
+        write_snapshot(store, os.getppid(), requests=5, in_flight=2, durations=[0.001, 0.2])
+        text = scrape(client)
+        assert sample(text, counter) == own + 5
+        assert sample(text, series("webhook_requests_in_flight")) == 2
+        assert sample(text, series("webhook_request_duration_seconds_bucket", le="0.001")) >= 1
+        assert sample(text, series("webhook_request_duration_seconds_count")) >= 2
+
+    def test_own_requests_counted(self, client, store):
+        """Requests of the worker serving the scrape should be counted without waiting for a flush."""
+        counter = series("webhook_requests_total", outcome="mutated")
+        before = sample(scrape(client), counter)
+        client.post("/mutate", data=json.dumps(MUTATED))
+        assert sample(scrape(client), counter) == before + 1
+        assert os.path.exists(os.path.join(store.directory, f"worker-{os.getpid()}.json"))
+
+    def test_exited_worker_folded_into_archive(self, client, store):
+        """Counters of an exited worker should stay in the totals; its gauges should not."""
+        counter = series("webhook_requests_total", outcome="mutated")
+        own = sample(scrape(client), counter)
+        pid = dead_pid()
+        write_snapshot(store, pid, requests=7, in_flight=3, durations=[0.5])
+        text = scrape(client)
+        assert sample(text, counter) == own + 7
+        assert sample(text, series("webhook_requests_in_flight")) == 0
+        assert not os.path.exists(os.path.join(store.directory, f"worker-{pid}.json"))
+        assert os.path.exists(os.path.join(store.directory, SharedStore.ARCHIVE))
+        # A second exited worker adds to the archive
+        write_snapshot(store, dead_pid(), requests=1)
+        assert sample(scrape(client), counter) == own + 8
+
+    def test_flush_metrics_writes_snapshot(self, store):
+        """flush_metrics (worker exit) should write the snapshot of this process."""
+        metrics.flush_metrics()
+        with open(os.path.join(store.directory, f"worker-{os.getpid()}.json"), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        assert set(snapshot) == {metric.name for metric in metrics.METRICS}
+
+    def test_histogram_merge(self):
+        """Histogram values should be summed bucket by bucket."""
+        histogram = Histogram("test_seconds", "Test histogram", [0.1, 1.0])
+        assert histogram.merge([[1, 0, 2], 5.0, 3], [[0, 1, 1], 1.5, 2]) == [[1, 1, 3], 6.5, 5]
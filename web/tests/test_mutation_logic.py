@@ -1,5 +1,16 @@
+import base64
+import copy
+import json
+
 import pytest
-from app.mutation_logic import make_patch_for_pod
+from app.mutation_logic import (
+    clear_patch_cache,
+    encoded_patch_for_pod,
+    make_compact_patch_for_pod,
+    make_patch_for_pod,
+    patch_cache_stats,
+    patch_shape,
+)
 
 
 class TestMakePatchForPod:
@@ -273,3 +284,133 @@ class TestMakePatchForPod:
             assert patch["op"] in ["add", "remove", "replace", "move", "copy", "test"]
             assert patch["path"].startswith("/")
 
+
+
+def make_pod(name="test-pod", version="1.0", labid="lab-123", containers=None, **spec):
+    return {
+        "metadata": {"name": name, "labels": {"version": version, "labid": labid}},
+        "spec": {"containers": containers or [{"name": "app", "image": "nginx"}], **spec}
+    }
+
+
+class TestPatchCache:
+    """Tests for the shape-keyed patch cache"""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        clear_patch_cache()
+        yield
+        clear_patch_cache()
+
+    def test_encoded_patch_matches_patch(self):
+        """Cached patch should be the base64 JSON of make_compact_patch_for_pod"""
+        pod = make_pod()
+        patch_b64, patch = encoded_patch_for_pod(pod)
+        assert patch == make_compact_patch_for_pod(pod)
+        assert json.loads(base64.b64decode(patch_b64)) == make_compact_patch_for_pod(pod)
+
+    def test_same_shape_hits_cache(self):
+        """Pods of one Deployment (different names, images) should share the cached patch"""
+        first = encoded_patch_for_pod(make_pod(name="web-abc12"))
+        second = encoded_patch_for_pod(make_pod(name="web-def34", containers=[{"name": "app", "image": "nginx:2"}]))
+        assert first[0] == second[0]
+        assert patch_cache_stats()["hits"] == 1
+        assert patch_cache_stats()["misses"] == 1
+        assert patch_cache_stats()["size"] == 1
+
+    @pytest.mark.parametrize("other", [
+        make_pod(version="2.0"),
+        make_pod(labid="lab-456"),
+        make_pod(containers=[{"name": "app", "env": []}]),
+        make_pod(containers=[{"name": "app", "volumeMounts": []}]),
+        make_pod(containers=[{"name": "app"}, {"name": "sidecar"}]),
+        make_pod(initContainers=[]),
+        make_pod(volumes=[]),
+    ])
+    def test_different_shape_misses_cache(self, other):
+        """Any patch-relevant difference should produce its own cache entry"""
+        assert patch_shape(other) != patch_shape(make_pod())
+        encoded_patch_for_pod(make_pod())
+        patch_b64, _ = encoded_patch_for_pod(other)
+        assert json.loads(base64.b64decode(patch_b64)) == make_compact_patch_for_pod(other)
+        assert patch_cache_stats()["misses"] == 2
+        assert patch_cache_stats()["hits"] == 0
+
+    def test_pod_without_labels(self):
+        """A pod without labels should have a shape and be cached"""
+        pod = {"spec": {"containers": [{"name": "app"}]}}
+        patch_b64, patch = encoded_patch_for_pod(pod)
+        assert patch == make_compact_patch_for_pod(pod)
+
+
+def apply_patch(document, patch):
+    """Apply JSON Patch "add" ops (RFC 6902) to a copy of document."""
+    document = copy.deepcopy(document)
+    for op in patch:
+        assert op["op"] == "add"
+        *parents, last = op["path"].lstrip("/").split("/")
+        target = document
+        for key in parents:
+            target = target[int(key)] if isinstance(target, list) else target[key]
+        value = copy.deepcopy(op["value"])
+        if isinstance(target, list):
+            if last == "-":
+                target.append(value)
+            else:
+                target.insert(int(last), value)
+        else:
+            target[last] = value
+    return document
+
+
+EXISTING_ENV = [{"name": "EXISTING", "value": "1"}]
+EXISTING_MOUNTS = [{"name": "config", "mountPath": "/etc/app"}]
+
+POD_SHAPES = [
+    make_pod(),
+    make_pod(containers=[{"name": "app", "env": EXISTING_ENV}]),
+    make_pod(containers=[{"name": "app", "volumeMounts": EXISTING_MOUNTS}]),
+    make_pod(containers=[{"name": "app", "env": EXISTING_ENV, "volumeMounts": EXISTING_MOUNTS}]),
+    make_pod(containers=[{"name": "app", "env": []}, {"name": "sidecar"}, {"name": "proxy", "volumeMounts": []}]),
+    make_pod(containers=[
+        {"name": f"app-{i}", "env": EXISTING_ENV} if i % 2 else {"name": f"app-{i}"} for i in range(50)
+    ]),
+    make_pod(initContainers=[{"name": "setup", "image": "busybox"}]),
+    make_pod(volumes=[{"name": "config", "configMap": {"name": "app"}}]),
+    make_pod(initContainers=[], volumes=[]),
+    make_pod(containers=[]),
+    {"metadata": {}, "spec": {"containers": [{"name": "app"}]}},
+]
+
+
+class TestCompactPatch:
+    """build_compact_patch must give the same pod as build_patch with fewer ops"""
+
+    @pytest.mark.parametrize("pod", POD_SHAPES)
+    def test_same_patched_pod(self, pod):
+        """Applying either patch should give the same pod"""
+        assert apply_patch(pod, make_compact_patch_for_pod(pod)) == apply_patch(pod, make_patch_for_pod(pod))
+
+    @pytest.mark.parametrize("pod", POD_SHAPES)
+    def test_not_more_ops(self, pod):
+        """The compact patch should never have more ops"""
+        assert len(make_compact_patch_for_pod(pod)) <= len(make_patch_for_pod(pod))
+
+    def test_missing_arrays_added_in_one_op(self):
+        """A container without env and volumeMounts should get one op for each"""
+        patch = make_compact_patch_for_pod(make_pod())
+        assert [p["path"] for p in patch] == [
+            "/spec/containers/0/env",
+            "/spec/containers/0/volumeMounts",
+            "/spec/initContainers",
+            "/spec/volumes",
+        ]
+        assert [env["name"] for env in patch[0]["value"]] == ["HELP", "MUTATE", "ACCEPTED", "VERSION", "LABID"]
+
+    def test_existing_env_appended(self):
+        """Existing env vars should be kept and the new ones appended"""
+        pod = make_pod(containers=[{"name": "app", "env": EXISTING_ENV}])
+        patched = apply_patch(pod, make_compact_patch_for_pod(pod))
+        env = patched["spec"]["containers"][0]["env"]
+        assert env[0] == EXISTING_ENV[0]
+        assert [e["name"] for e in env[1:]] == ["HELP", "MUTATE", "ACCEPTED", "VERSION", "LABID"]
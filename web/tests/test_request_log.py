@@ -0,0 +1,122 @@
+"""Tests for the structured request logging."""
+
+import json
+import logging
+
+import pytest
+
+from app import create_app
+from app.request_log import JsonFormatter, configure_logging, log_request, sample_rate, sampled
+from tests.conftest import make_review
+
+
+@pytest.fixture
+def sampled_client():
+    """Test client dumping the payload of every request"""
+    app = create_app()
+    app.config["TESTING"] = True
+    app.config["WEBHOOK_LOG_SAMPLE_RATE"] = 1.0
+    with app.test_client() as client:
+        yield client
+
+
+def request_records(caplog):
+    return [record for record in caplog.records if record.name == "app.requests"]
+
+
+MUTATED = make_review()
+SKIPPED = make_review(labels={})
+
+
+class TestJsonFormatter:
+    """Tests for JsonFormatter."""
+
+    def test_formats_extra_fields(self):
+        """Message, level and extra fields should be written as one JSON object."""
+        record = logging.makeLogRecord(
+            {"name": "app.requests", "levelno": logging.INFO, "levelname": "INFO", "msg": "mutate %s", "args": ("ok",)}
+        )
+        record.uid = "abc"
+        record.raw = b"bytes"
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["message"] == "mutate ok"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "app.requests"
+        assert entry["uid"] == "abc"
+        assert entry["raw"] == "b'bytes'"
+        assert "args" not in entry and "msg" not in entry
+
+
+class TestConfiguration:
+    """Tests for configure_logging and the sample rate."""
+
+    def test_invalid_log_format(self):
+        """An unknown LOG_FORMAT should be rejected."""
+        with pytest.raises(ValueError):
+            configure_logging({"LOG_FORMAT": "xml"})
+
+    @pytest.mark.parametrize("value", ["-0.1", "1.5", "often"])
+    def test_invalid_sample_rate(self, value):
+        """Sample rates outside 0..1 should be rejected."""
+        with pytest.raises(ValueError):
+            sample_rate(value)
+
+    def test_sampled_bounds(self):
+        """A rate of 0 never samples, a rate of 1 always does."""
+        assert not any(sampled(0.0) for _ in range(100))
+        assert all(sampled(1.0) for _ in range(100))
+
+    def test_records_below_level_are_not_logged(self, caplog):
+        """Nothing should be logged when the level is above INFO."""
+        caplog.set_level(logging.ERROR, logger="app.requests")
+        log_request({"outcome": "mutated"}, 0.001, payload={"request": {}})
+        assert request_records(caplog) == []
+
+
+class TestMutateRequestLog:
+    """Each /mutate request should be logged as one summary record."""
+
+    @pytest.mark.parametrize("body,outcome", [(MUTATED, "mutated"), (SKIPPED, "skipped")])
+    def test_single_summary_record(self, client, caplog, body, outcome):
+        """A request should produce one record with its outcome and duration."""
+        caplog.set_level(logging.INFO, logger="app.requests")
+        client.post("/mutate", data=json.dumps(body))
+        [record] = request_records(caplog)
+        assert record.outcome == outcome
+        assert record.uid == "test-uid"
+        assert record.namespace == "default"
+        assert record.pod == "test-pod"
+        assert record.duration_ms >= 0
+        assert record.levelno == logging.INFO
+
+    def test_mutated_record_counts_patch_ops(self, client, caplog):
+        """The summary of a mutated pod should hold the number of patch ops."""
+        caplog.set_level(logging.INFO, logger="app.requests")
+        client.post("/mutate", data=json.dumps(MUTATED))
+        [record] = request_records(caplog)
+        assert record.patch_ops > 0
+
+    @pytest.mark.parametrize("data", ["not valid json", json.dumps({"kind": "Other"})])
+    def test_invalid_request_logged_as_warning(self, client, caplog, data):
+        """Rejected requests should be logged as invalid with a reason."""
+        caplog.set_level(logging.INFO, logger="app.requests")
+        client.post("/mutate", data=data)
+        [record] = request_records(caplog)
+        assert record.outcome == "invalid"
+        assert record.reason
+        assert record.levelno == logging.WARNING
+
+    def test_no_payload_dump_by_default(self, client, caplog):
+        """With the default sample rate of 0 the payload should not be logged."""
+        caplog.set_level(logging.INFO, logger="app.requests")
+        client.post("/mutate", data=json.dumps(MUTATED))
+        assert not any(hasattr(record, "payload") for record in request_records(caplog))
+
+    def test_sampled_payload_dump(self, sampled_client, caplog):
+        """A sampled request should dump the parsed request and the patch ops."""
+        caplog.set_level(logging.INFO, logger="app.requests")
+        sampled_client.post("/mutate", data=json.dumps(MUTATED))
+        summary, dump = request_records(caplog)
+        assert summary.outcome == "mutated"
+        assert dump.payload["request"]["request"]["uid"] == "test-uid"
+        assert len(dump.payload["patch"]) == summary.patch_ops
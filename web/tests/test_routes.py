@@ -4,15 +4,6 @@ import base64
 from app import create_app
 
 
-@pytest.fixture
-def client():
-    """Create test client"""
-    app = create_app()
-    app.config["TESTING"] = True
-    with app.test_client() as client:
-        yield client
-
-
 @pytest.fixture
 def valid_admission_review():
     """Valid AdmissionReview request that should be mutated"""
@@ -73,6 +64,12 @@ class TestHealthEndpoint:
         data = json.loads(response.data)
         assert data["status"] == "ok"
 
+    def test_health_returns_patch_cache_counters(self, client):
+        """Health endpoint should expose the patch cache hit/miss counters"""
+        response = client.get("/healthz")
+        data = json.loads(response.data)
+        assert set(data["patch_cache"]) == {"hits", "misses", "size", "maxsize"}
+
     def test_health_returns_json(self, client):
         """Health endpoint should return JSON content type"""
         response = client.get("/healthz")
@@ -374,3 +371,51 @@ class TestMutateEndpointEdgeCases:
         for p in env_patches:
             assert p["path"].endswith("/-"), "Env patches should append, not replace"
 
+
+
+class TestMutateFastPath:
+    """Tests for the /mutate fast path and the marshalled fallback"""
+
+    @pytest.fixture
+    def marshalled_client(self):
+        """Test client with the fast path disabled"""
+        app = create_app()
+        app.config["TESTING"] = True
+        app.config["WEBHOOK_FAST_PATH"] = False
+        with app.test_client() as client:
+            yield client
+
+    def test_fast_path_omits_unset_fields(self, client, admission_review_no_mutation):
+        """Fast path should leave out patch fields instead of returning null"""
+        response = client.post("/mutate", data=json.dumps(admission_review_no_mutation))
+        data = json.loads(response.data)
+        assert response.content_type == "application/json"
+        assert "patch" not in data["response"]
+        assert "patchType" not in data["response"]
+
+    def test_marshalled_response_matches_fast_path(self, client, marshalled_client, valid_admission_review):
+        """Both paths should return the same patch and status"""
+        fast = json.loads(client.post("/mutate", data=json.dumps(valid_admission_review)).data)
+        marshalled = json.loads(marshalled_client.post("/mutate", data=json.dumps(valid_admission_review)).data)
+        assert fast == marshalled
+
+    def test_marshalled_invalid_json_returns_400(self, marshalled_client):
+        """Fallback path should still reject invalid JSON"""
+        response = marshalled_client.post("/mutate", data="not valid json", content_type="application/json")
+        assert response.status_code == 400
+
+    def test_swagger_documents_response_model(self, client):
+        """Swagger should still describe the AdmissionReview response"""
+        spec = json.loads(client.get("/swagger.json").data)
+        mutate = next(path for name, path in spec["paths"].items() if name.endswith("/mutate"))
+        assert mutate["post"]["responses"]["200"]["schema"]["$ref"] == "#/definitions/AdmissionReviewResponse"
+
+    def test_body_above_limit_returns_413(self, valid_admission_review):
+        """Requests larger than MAX_CONTENT_LENGTH should be rejected with 413"""
+        app = create_app()
+        app.config["TESTING"] = True
+        app.config["MAX_CONTENT_LENGTH"] = 1024
+        valid_admission_review["request"]["object"]["metadata"]["annotations"]["big"] = "x" * 2048
+        with app.test_client() as client:
+            response = client.post("/mutate", data=json.dumps(valid_admission_review))
+        assert response.status_code == 413
@@ -0,0 +1,80 @@
+"""Tests for the production server settings."""
+
+import os
+
+import pytest
+
+from app.serving import metrics_dir, server_options
+
+
+class TestServerOptions:
+    """Tests for server_options function."""
+
+    def test_defaults(self):
+        """Without environment variables the defaults should be used."""
+        options = server_options({"TLS_CERT_FILE": "/nonexistent.crt", "TLS_KEY_FILE": "/nonexistent.key"})
+        assert options["bind"] == "0.0.0.0:8443"
+        assert options["worker_class"] == "gthread"
+        assert options["workers"] == 2
+        assert options["threads"] == 8
+        assert options["keepalive"] == 75
+        assert options["preload_app"] is True
+
+    def test_environment_overrides(self):
+        """Worker count, threads and timeouts should come from the environment."""
+        options = server_options(
+            {
+                "PORT": "9443",
+                "WEB_WORKERS": "4",
+                "WEB_THREADS": "16",
+                "WEB_TIMEOUT": "10",
+                "WEB_GRACEFUL_TIMEOUT": "5",
+                "WEB_KEEPALIVE": "30",
+            }
+        )
+        assert options["bind"] == "0.0.0.0:9443"
+        assert options["workers"] == 4
+        assert options["threads"] == 16
+        assert options["timeout"] == 10
+        assert options["graceful_timeout"] == 5
+        assert options["keepalive"] == 30
+
+    def test_empty_value_uses_default(self):
+        """An empty variable should fall back to the default."""
+        assert server_options({"WEB_WORKERS": ""})["workers"] == 2
+
+    def test_invalid_integer(self):
+        """A non-integer value should raise ValueError naming the variable."""
+        with pytest.raises(ValueError, match="WEB_THREADS"):
+            server_options({"WEB_THREADS": "many"})
+
+    def test_zero_workers(self):
+        """At least one worker should be required."""
+        with pytest.raises(ValueError):
+            server_options({"WEB_WORKERS": "0"})
+
+    def test_tls_files_used_when_present(self, tmp_path):
+        """TLS cert and key should be set only if both files exist."""
+        crt = tmp_path / "tls.crt"
+        key = tmp_path / "tls.key"
+        crt.write_text("cert")
+        env = {"TLS_CERT_FILE": str(crt), "TLS_KEY_FILE": str(key)}
+
+        assert "certfile" not in server_options(env)
+
+        key.write_text("key")
+        options = server_options(env)
+        assert options["certfile"] == str(crt)
+        assert options["keyfile"] == str(key)
+
+
+class TestMetricsDir:
+    """Tests for metrics_dir function."""
+
+    def test_from_environment(self):
+        """WEBHOOK_METRICS_DIR should be used when it is set."""
+        assert metrics_dir({"WEBHOOK_METRICS_DIR": "/run/metrics"}) == "/run/metrics"
+
+    def test_default_per_user(self):
+        """The default directory should be separate for each user."""
+        assert metrics_dir({}).endswith(f"webhook-metrics-{os.getuid()}")
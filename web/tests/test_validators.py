@@ -249,4 +249,3 @@ class TestShouldMutate:
             }
         }
         assert should_mutate(req) is False
-
@@ -0,0 +1,138 @@
+"""Tests for the generated MutatingWebhookConfiguration selectors."""
+
+from pathlib import Path
+
+import pytest
+import yaml
+
+from app.validators import EXCLUDED_NAMESPACES, NAMESPACE_NAME_LABEL, namespace_selector, should_mutate
+from app.webhook_config import find_webhook, generate_selectors, main, render_webhook_config
+from tests.conftest import make_review
+
+WEBHOOK_MANIFEST = Path(__file__).resolve().parents[1] / "ocp" / "webhook.yaml"
+
+
+def selector_matches(selector, labels):
+    """Evaluate a Kubernetes label selector (matchLabels and the set operators)."""
+    for key, value in (selector.get("matchLabels") or {}).items():
+        if labels.get(key) != value:
+            return False
+    for expression in selector.get("matchExpressions") or []:
+        key, operator = expression["key"], expression["operator"]
+        values = expression.get("values") or []
+        if operator == "In" and labels.get(key) not in values:
+            return False
+        if operator == "NotIn" and key in labels and labels[key] in values:
+            return False
+        if operator == "Exists" and key not in labels:
+            return False
+        if operator == "DoesNotExist" and key in labels:
+            return False
+    return True
+
+
+LABEL_SETS = [
+    {},
+    {"mutate": "true"},
+    {"mutate": "false", "version": "1.0", "labid": "lab-1"},
+    {"mutate": "true", "version": "1.0"},
+    {"mutate": "true", "labid": "lab-1"},
+    {"mutate": "true", "version": "1.0", "labid": "lab-1"},
+    {"mutate": "true", "version": "", "labid": ""},
+    {"mutate": "true", "version": "2.0", "labid": "lab-2", "app": "web"},
+    {"version": "1.0", "labid": "lab-1"},
+]
+
+
+class TestWebhookManifest:
+    """The selectors in ocp/webhook.yaml must match the mutation criteria."""
+
+    def test_manifest_selectors_are_generated(self):
+        """Selectors in the manifest should equal the generated ones."""
+        webhook = find_webhook(yaml.safe_load(WEBHOOK_MANIFEST.read_text()))
+        selectors = generate_selectors()
+        assert webhook["namespaceSelector"] == selectors["namespaceSelector"]
+        assert webhook["objectSelector"] == selectors["objectSelector"]
+
+    def test_check_passes_on_manifest(self):
+        """--check should report the manifest as up to date."""
+        assert main(["--check", str(WEBHOOK_MANIFEST)]) == 0
+
+    def test_check_fails_on_stale_manifest(self, tmp_path, capsys):
+        """--check should fail if the selectors are out of date."""
+        stale = tmp_path / "webhook.yaml"
+        stale.write_text(WEBHOOK_MANIFEST.read_text().replace("operator: Exists", "operator: DoesNotExist", 1))
+        assert main(["--check", str(stale)]) == 1
+        assert "out of date" in capsys.readouterr().out
+
+
+class TestRenderWebhookConfig:
+    """Tests for render_webhook_config function."""
+
+    MANIFEST = (
+        "apiVersion: admissionregistration.k8s.io/v1\n"
+        "kind: MutatingWebhookConfiguration\n"
+        "webhooks:\n"
+        "  - name: pod-mutate.webhook.system\n"
+        "    namespaceSelector: {}\n"
+        "    objectSelector:\n"
+        "      matchLabels:\n"
+        "        stale: 'true'\n"
+        "    rules:\n"
+        '      - resources: ["pods"]\n'
+    )
+
+    def test_replaces_selectors(self):
+        """Empty and stale selectors should be replaced."""
+        webhook = find_webhook(yaml.safe_load(render_webhook_config(self.MANIFEST)))
+        assert webhook["namespaceSelector"] == generate_selectors()["namespaceSelector"]
+        assert webhook["objectSelector"] == generate_selectors()["objectSelector"]
+        assert webhook["rules"] == [{"resources": ["pods"]}]
+
+    def test_is_idempotent(self):
+        """Rendering twice should not change the result."""
+        rendered = render_webhook_config(self.MANIFEST)
+        assert render_webhook_config(rendered) == rendered
+
+    def test_leaves_other_webhooks_unchanged(self):
+        """Only the selectors of the pod-mutate webhook entry should be replaced."""
+        other = (
+            "  - name: other.webhook.system\n"
+            "    namespaceSelector: {}\n"
+            "    objectSelector:\n"
+            "      matchLabels:\n"
+            "        other: 'true'\n"
+        )
+        manifest = self.MANIFEST.replace("webhooks:\n", "webhooks:\n" + other)
+        webhooks = yaml.safe_load(render_webhook_config(manifest))["webhooks"]
+        assert webhooks[0] == yaml.safe_load(other)[0]
+        assert webhooks[1]["objectSelector"] == generate_selectors()["objectSelector"]
+
+    def test_missing_webhook(self):
+        """A manifest without the webhook should be rejected."""
+        with pytest.raises(ValueError):
+            render_webhook_config("webhooks:\n  - name: other\n")
+
+
+class TestSelectorsMatchShouldMutate:
+    """The objectSelector must select exactly the pods should_mutate accepts (annotations aside)."""
+
+    @pytest.mark.parametrize("labels", LABEL_SETS)
+    def test_object_selector_agrees_with_should_mutate(self, labels):
+        """With the annotation set, the objectSelector and should_mutate should agree."""
+        selected = selector_matches(generate_selectors()["objectSelector"], labels)
+        assert should_mutate(make_review(labels)["request"]) == selected
+
+
+class TestNamespaceSelector:
+    """The namespaceSelector keeps the webhook out of EXCLUDED_NAMESPACES."""
+
+    @pytest.mark.parametrize("namespace", EXCLUDED_NAMESPACES)
+    def test_excludes_namespace(self, namespace):
+        """Excluded namespaces should not be selected."""
+        assert not selector_matches(namespace_selector(), {NAMESPACE_NAME_LABEL: namespace})
+
+    @pytest.mark.parametrize("namespace", ["default", "team-a"])
+    def test_selects_other_namespaces(self, namespace):
+        """Other namespaces should be selected."""
+        assert selector_matches(namespace_selector(), {NAMESPACE_NAME_LABEL: namespace})